@@ -0,0 +1,50 @@
+import hmac
+from typing import List, Optional
+from fastapi import APIRouter, Depends, Header, HTTPException, Query, Request
+from app.config.settings import settings
+from app.services.container import get_profiler
+from app.services.sampling_profiler import SamplingProfiler
+from app.utils.responses import ORJSONResponse
+
+def require_admin_token(x_admin_token: Optional[str] = Header(None)) -> None:
+    """Admin endpoints need the X-Admin-Token header and do not exist without ADMIN_API_TOKEN"""
+    if not settings.ADMIN_API_TOKEN:
+        raise HTTPException(status_code=404, detail="Not Found")
+    if not hmac.compare_digest(x_admin_token or "", settings.ADMIN_API_TOKEN):
+        raise HTTPException(status_code=401, detail="Invalid admin token")
+
+router = APIRouter(
+    prefix="/api/v1/admin",
+    tags=["admin"],
+    dependencies=[Depends(require_admin_token)],
+    default_response_class=ORJSONResponse
+)
+
+@router.post("/profile")
+async def profile_worker(
+    request: Request,
+    seconds: float = Query(10, gt=0, description="Profile duration, capped at PROFILER_MAX_SECONDS"),
+    interval_ms: float = Query(10, ge=1, le=1000, description="Delay between stack samples"),
+    output: str = Query("speedscope", alias="format", pattern="^(speedscope|collapsed)$"),
+    route: Optional[List[str]] = Query(None, description="Only profile requests for these route templates"),
+    profiler: SamplingProfiler = Depends(get_profiler)
+):
+    """
+    Run the sampling profiler on the worker that serves this request
+
+    Returns a speedscope.app profile (or collapsed stacks for flame graphs)
+    together with event loop stalls and the slow callbacks behind them. With
+    several workers, each call profiles only the worker it lands on.
+    """
+    if not settings.PROFILER_ENABLED:
+        raise HTTPException(status_code=404, detail="Profiler is disabled")
+
+    routes = set(route) if route else None
+    if routes:
+        # Route templates as documented in the (cached) OpenAPI schema
+        known_routes = set(request.app.openapi().get("paths", {}))
+        unknown = sorted(routes - known_routes)
+        if unknown:
+            raise HTTPException(status_code=400, detail=f"Unknown routes: {', '.join(unknown)}")
+
+    return await profiler.profile(seconds, interval_ms, routes=routes, output=output)
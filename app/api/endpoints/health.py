@@ -1,6 +1,9 @@
 from fastapi import APIRouter
+from app.config.settings import settings
+from app.services.container import container
+from app.utils.responses import ORJSONResponse
 
-router = APIRouter(tags=["health"])
+router = APIRouter(tags=["health"], default_response_class=ORJSONResponse)
 
 @router.get("/")
 async def root():
@@ -15,6 +18,31 @@ async def root():
     }
 
 @router.get("/health")
+@router.get("/api/v1/health")
+@router.get("/api/v1/health/live")
 async def health_check():
-    """Health check endpoint"""
-    return {"status": "healthy", "service": "HOM-i Lead API"} 
\ No newline at end of file
+    """Liveness check: the worker is running and serving requests"""
+    return {"status": "healthy", "service": "HOM-i Lead API"}
+
+@router.get("/api/v1/health/ready")
+async def readiness_check():
+    """
+    Readiness check: the worker has started and its upstream dependencies are reachable
+
+    Reads the results cached by the background health monitor, so it never
+    calls an upstream service. Returns 503 when the worker should be drained.
+    """
+    monitor = container.health_monitor
+    dependencies = monitor.get_results()
+    ready = container.ready and monitor.is_ready(dependencies)
+    
+    return ORJSONResponse(
+        status_code=200 if ready else 503,
+        content={
+            "status": "ready" if ready else "not_ready",
+            "service": "HOM-i Lead API",
+            "version": settings.API_VERSION,
+            "required": monitor.required,
+            "dependencies": dependencies
+        }
+    )
@@ -0,0 +1,87 @@
+import os
+import uuid
+from fastapi import APIRouter, Depends, File, HTTPException, UploadFile
+from app.api.endpoints.admin import require_admin_token
+from app.config.settings import settings
+from app.models.schemas import LeadImportJobResponse
+from app.services.lead_import_service import LeadImportService, NDJSON_SUFFIXES
+from app.services.container import get_lead_import_service
+
+# Every imported row creates an upstream lead: same token as the admin endpoints
+router = APIRouter(
+    prefix="/api/v1/lead/import",
+    tags=["imports"],
+    dependencies=[Depends(require_admin_token)]
+)
+
+UPLOAD_CHUNK_SIZE = 1024 * 1024
+
+def _job_response(import_service: LeadImportService, job_id: str) -> LeadImportJobResponse:
+    try:
+        job = import_service.get_job(job_id)
+    except ValueError as e:
+        raise HTTPException(status_code=422, detail=str(e))
+    if not job:
+        raise HTTPException(status_code=404, detail="Import job not found")
+    return LeadImportJobResponse(**job.to_dict())
+
+@router.post("", response_model=LeadImportJobResponse, status_code=202)
+async def create_import_job(
+    file: UploadFile = File(...),
+    import_service: LeadImportService = Depends(get_lead_import_service)
+):
+    """Upload a CSV or NDJSON file of leads and import it in the background"""
+    suffix = os.path.splitext(file.filename or "")[1].lower()
+    if suffix not in (".csv",) + NDJSON_SUFFIXES:
+        raise HTTPException(status_code=422, detail="File must be .csv, .ndjson or .jsonl")
+    
+    try:
+        job_id = uuid.uuid4().hex
+        os.makedirs(import_service.import_dir, exist_ok=True)
+        source_path = os.path.join(import_service.import_dir, f"{job_id}{suffix}")
+        
+        # Stream the upload to disk in chunks, up to LEAD_IMPORT_MAX_UPLOAD_BYTES
+        size = 0
+        with open(source_path, "wb") as destination:
+            while chunk := await file.read(UPLOAD_CHUNK_SIZE):
+                size += len(chunk)
+                if size > settings.LEAD_IMPORT_MAX_UPLOAD_BYTES:
+                    break
+                destination.write(chunk)
+        if size > settings.LEAD_IMPORT_MAX_UPLOAD_BYTES:
+            os.remove(source_path)
+            raise HTTPException(
+                status_code=413,
+                detail=f"File is larger than {settings.LEAD_IMPORT_MAX_UPLOAD_BYTES} bytes"
+            )
+        
+        job = import_service.get_or_create_job(source_path, job_id=job_id)
+        import_service.start(job)
+        return LeadImportJobResponse(**job.to_dict())
+        
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Internal server error: {str(e)}")
+
+@router.get("/{job_id}", response_model=LeadImportJobResponse)
+async def get_import_job(
+    job_id: str,
+    import_service: LeadImportService = Depends(get_lead_import_service)
+):
+    """Get the progress of an import job"""
+    return _job_response(import_service, job_id)
+
+@router.post("/{job_id}/resume", response_model=LeadImportJobResponse, status_code=202)
+async def resume_import_job(
+    job_id: str,
+    import_service: LeadImportService = Depends(get_lead_import_service)
+):
+    """Resume an interrupted or failed import job from its last checkpoint"""
+    response = _job_response(import_service, job_id)
+    if response.status == "completed":
+        raise HTTPException(status_code=409, detail="Import job already completed")
+    
+    if not import_service.is_running(job_id):
+        import_service.start(import_service.get_job(job_id))
+    return _job_response(import_service, job_id)
@@ -1,45 +1,29 @@
-from fastapi import APIRouter, HTTPException
+import asyncio
+import json
+from fastapi import APIRouter, Depends, HTTPException
+from fastapi.responses import StreamingResponse
+from app.config.settings import settings
 from app.models.schemas import LeadCreateRequest, LeadCreateResponse, LeadStatusRequest, LeadStatusResponse
 from app.services.basic_application_service import BasicApplicationService
-from app.services.whatsapp_service import whatsapp_service
-from app.services.database_service import database_service
-from app.utils.validators import (
-    validate_loan_type, validate_loan_amount, validate_loan_tenure,
-    validate_pan_number, validate_mobile_number, validate_pin_code
+from app.services.whatsapp_service import WhatsAppService
+from app.services.database_service import DatabaseService
+from app.services.status_broadcaster import StatusBroadcaster
+from app.services.container import (
+    get_basic_application_service, get_whatsapp_service, get_database_service,
+    get_status_broadcaster
 )
 
 router = APIRouter(prefix="/api/v1/lead", tags=["leads"])
 
-# Initialize services
-basic_app_service = BasicApplicationService()
-
-def validate_lead_data(lead_data: LeadCreateRequest):
-    """Validate lead data using utility validators"""
-    if not validate_loan_type(lead_data.loan_type):
-        raise HTTPException(status_code=422, detail="Invalid loan type")
-    
-    if not validate_loan_amount(lead_data.loan_amount):
-        raise HTTPException(status_code=422, detail="Loan amount must be greater than 0")
-    
-    if not validate_loan_tenure(lead_data.loan_tenure):
-        raise HTTPException(status_code=422, detail="Loan tenure must be greater than 0")
-    
-    if not validate_pan_number(lead_data.pan_number):
-        raise HTTPException(status_code=422, detail="PAN number must be in format: ABCDE1234F")
-    
-    if not validate_mobile_number(lead_data.mobile_number):
-        raise HTTPException(status_code=422, detail="Mobile number must be 10 digits")
-    
-    if not validate_pin_code(lead_data.pin_code):
-        raise HTTPException(status_code=422, detail="PIN code must be 6 digits")
-
 @router.post("/create", response_model=LeadCreateResponse)
-async def create_lead(lead_data: LeadCreateRequest):
+async def create_lead(
+    lead_data: LeadCreateRequest,
+    basic_app_service: BasicApplicationService = Depends(get_basic_application_service),
+    database_service: DatabaseService = Depends(get_database_service),
+    whatsapp_service: WhatsAppService = Depends(get_whatsapp_service)
+):
     """Create a new lead"""
     try:
-        # Validate lead data
-        validate_lead_data(lead_data)
-        
         # Prepare data for Basic Application API
         api_data = {
             "loan_type": lead_data.loan_type,
@@ -66,7 +50,13 @@ async def create_lead(lead_data: LeadCreateRequest):
         
         # Save lead data to Supabase database
         try:
-            db_result = database_service.save_lead_data(api_data, result)
+            if settings.LEAD_WRITE_BEHIND_ENABLED:
+                db_result = await database_service.save_lead_data_batched(api_data, result)
+            else:
+                db_result = database_service.save_lead_data(api_data, result)
+        except HTTPException:
+            # e.g. 409 for a duplicate basic_application_id
+            raise
         except Exception as db_error:
             print(f"Database error: {db_error}")
             raise HTTPException(
@@ -100,17 +90,18 @@ async def create_lead(lead_data: LeadCreateRequest):
         raise HTTPException(status_code=500, detail=f"Internal server error: {str(e)}")
 
 @router.post("/status", response_model=LeadStatusResponse)
-async def get_lead_status(status_request: LeadStatusRequest):
+async def get_lead_status(
+    status_request: LeadStatusRequest,
+    basic_app_service: BasicApplicationService = Depends(get_basic_application_service),
+    database_service: DatabaseService = Depends(get_database_service),
+    whatsapp_service: WhatsAppService = Depends(get_whatsapp_service)
+):
     """Get lead status by various identifiers"""
     try:
         # Validate that at least one identifier is provided
         if not any([status_request.mobile_number, status_request.basic_application_id]):
             raise HTTPException(status_code=400, detail="Either mobile number or basic application ID must be provided")
         
-        # Validate mobile number if provided
-        if status_request.mobile_number and not validate_mobile_number(status_request.mobile_number):
-            raise HTTPException(status_code=422, detail="Mobile number must be 10 digits")
-        
         # Try to get status from Basic Application API using basic application ID or mobile number
         api_status = await basic_app_service.get_lead_status(
             mobile_number=status_request.mobile_number,
@@ -143,7 +134,8 @@ async def get_lead_status(status_request: LeadStatusRequest):
                         await whatsapp_service.send_lead_status_update(
                             phone_number="+91" + mobile_number_for_whatsapp,
                             name=name,
-                            status=str(status)
+                            status=str(status),
+                            basic_application_id=status_request.basic_application_id or lead_data.get("basic_application_id")
                         )
                 except Exception as whatsapp_error:
                     print(f"Failed to send WhatsApp status update: {whatsapp_error}")
@@ -158,4 +150,42 @@ async def get_lead_status(status_request: LeadStatusRequest):
     except HTTPException:
         raise
     except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Internal server error: {str(e)}") 
\ No newline at end of file
+        raise HTTPException(status_code=500, detail=f"Internal server error: {str(e)}")
+
+@router.get("/status/stream/{basic_application_id}")
+async def stream_lead_status(
+    basic_application_id: str,
+    broadcaster: StatusBroadcaster = Depends(get_status_broadcaster)
+):
+    """
+    Subscribe to lead status changes with Server-Sent Events
+    
+    Sends a `status` event with the current status, then one each time the
+    status changes. Comment lines are sent as heartbeats while idle.
+    """
+    subscription = await broadcaster.subscribe(basic_application_id)
+    
+    async def events():
+        try:
+            while True:
+                try:
+                    message = await asyncio.wait_for(
+                        subscription.queue.get(),
+                        timeout=settings.STATUS_STREAM_HEARTBEAT_SECONDS
+                    )
+                except asyncio.TimeoutError:
+                    yield ": keep-alive\n\n"
+                    continue
+                
+                # None marks the end of the stream (worker shutting down)
+                if message is None:
+                    break
+                yield f"event: status\ndata: {json.dumps(message)}\n\n"
+        finally:
+            await broadcaster.unsubscribe(subscription)
+    
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
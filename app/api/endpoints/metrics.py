@@ -0,0 +1,18 @@
+from fastapi import APIRouter, Depends
+from app.services.container import get_worker_metrics
+from app.services.worker_metrics import WorkerMetrics
+from app.utils.responses import ORJSONResponse
+
+router = APIRouter(tags=["metrics"], default_response_class=ORJSONResponse)
+
+@router.get("/metrics")
+async def get_metrics(worker_metrics: WorkerMetrics = Depends(get_worker_metrics)):
+    """
+    Get metrics combined across all worker processes
+
+    Request counts by route and status, supervisor counters (restarts,
+    recycles, reloads) and the write-behind, status stream and WhatsApp event
+    metrics of every live worker, summed. Other workers' numbers are at most
+    METRICS_PUBLISH_INTERVAL_SECONDS old.
+    """
+    return await worker_metrics.get_combined()
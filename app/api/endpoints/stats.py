@@ -0,0 +1,70 @@
+import asyncio
+from typing import Dict, Optional
+from fastapi import APIRouter, Depends, HTTPException
+from app.config.settings import settings
+from app.models.schemas import LeadStatisticsResponse
+from app.services.database_service import DatabaseService
+from app.services.status_broadcaster import StatusBroadcaster
+from app.services.whatsapp_event_buffer import WhatsAppEventBuffer
+from app.services.shared_state import SharedState
+from app.services.container import get_database_service, get_shared_state, get_status_broadcaster, get_whatsapp_event_buffer
+from app.utils.responses import ORJSONResponse
+
+router = APIRouter(prefix="/api/v1/leads", tags=["stats"])
+
+# Short-lived cache entry, shared by all workers, so dashboard polling
+# does not hit the database on every read
+STATS_CACHE_KEY = "cache:lead_statistics"
+
+# Concurrent cache misses on this worker share one database read
+_statistics_load: Optional[asyncio.Task] = None
+
+async def _load_statistics(database_service: DatabaseService, shared_state: SharedState) -> Optional[Dict]:
+    # The Supabase client is synchronous; keep it off the event loop
+    statistics = await asyncio.to_thread(database_service.get_lead_statistics)
+    if statistics:
+        await shared_state.set(STATS_CACHE_KEY, statistics, ttl_seconds=settings.LEAD_STATS_CACHE_TTL_SECONDS)
+    return statistics
+
+@router.get("/stats", response_model=LeadStatisticsResponse)
+async def get_lead_statistics(
+    database_service: DatabaseService = Depends(get_database_service),
+    shared_state: SharedState = Depends(get_shared_state)
+):
+    """Get lead counts by status and for the last 24 hours / 7 days"""
+    global _statistics_load
+    try:
+        statistics = await shared_state.get(STATS_CACHE_KEY)
+        if statistics is None:
+            if _statistics_load is None or _statistics_load.done():
+                _statistics_load = asyncio.create_task(_load_statistics(database_service, shared_state))
+            # Shielded: a disconnecting client must not cancel the read for the others
+            statistics = await asyncio.shield(_statistics_load)
+        
+        if not statistics:
+            raise HTTPException(status_code=503, detail="Lead statistics are not available")
+        
+        return LeadStatisticsResponse(**statistics)
+        
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Internal server error: {str(e)}")
+
+@router.get("/stats/write-behind", response_class=ORJSONResponse)
+async def get_write_behind_metrics(database_service: DatabaseService = Depends(get_database_service)):
+    """Get flush metrics of the write-behind lead insert batcher"""
+    return {
+        "enabled": settings.LEAD_WRITE_BEHIND_ENABLED,
+        "metrics": database_service.lead_write_batcher.get_metrics()
+    }
+
+@router.get("/stats/status-stream", response_class=ORJSONResponse)
+async def get_status_stream_metrics(broadcaster: StatusBroadcaster = Depends(get_status_broadcaster)):
+    """Get connection and poller metrics of the lead status subscription on this worker"""
+    return broadcaster.get_metrics()
+
+@router.get("/stats/whatsapp-events", response_class=ORJSONResponse)
+async def get_whatsapp_event_metrics(event_buffer: WhatsAppEventBuffer = Depends(get_whatsapp_event_buffer)):
+    """Get ingest rate and flush metrics of the Gupshup delivery report buffer"""
+    return event_buffer.get_metrics()
@@ -0,0 +1,42 @@
+import hmac
+from typing import Optional
+from fastapi import APIRouter, Depends, HTTPException, Request
+from app.config.settings import settings
+from app.services.container import get_whatsapp_event_buffer
+from app.services.whatsapp_event_buffer import WhatsAppEventBuffer
+from app.services.whatsapp_service import parse_gupshup_message_events
+from app.utils.responses import ORJSONResponse
+
+router = APIRouter(prefix="/api/v1/whatsapp", tags=["whatsapp"], default_response_class=ORJSONResponse)
+
+@router.post("/webhook")
+async def gupshup_webhook(
+    request: Request,
+    token: Optional[str] = None,
+    event_buffer: WhatsAppEventBuffer = Depends(get_whatsapp_event_buffer)
+):
+    """
+    Receive Gupshup message events (enqueued, sent, delivered, read, failed)
+    
+    Events are buffered in memory and written to whatsapp_messages in batches,
+    so the callback is acknowledged without waiting for the database. The
+    webhook does not exist without GUPSHUP_WEBHOOK_TOKEN.
+    """
+    if not settings.GUPSHUP_WEBHOOK_TOKEN:
+        raise HTTPException(status_code=404, detail="Not Found")
+    if not hmac.compare_digest(token or "", settings.GUPSHUP_WEBHOOK_TOKEN):
+        raise HTTPException(status_code=401, detail="Invalid webhook token")
+    
+    try:
+        body = await request.json()
+    except Exception:
+        raise HTTPException(status_code=400, detail="Invalid JSON body")
+    
+    callbacks = body if isinstance(body, list) else [body]
+    accepted = 0
+    for callback in callbacks:
+        for event in parse_gupshup_message_events(callback):
+            event_buffer.add(event)
+            accepted += 1
+    
+    return {"status": "accepted", "events": accepted}
@@ -1,9 +1,14 @@
 from fastapi import APIRouter
-from app.api.endpoints import leads, health
+from app.api.endpoints import leads, health, stats, imports, whatsapp, admin, metrics
 
 # Create main API router
 api_router = APIRouter()
 
 # Include all endpoint routers
 api_router.include_router(health.router)
-api_router.include_router(leads.router) 
\ No newline at end of file
+api_router.include_router(leads.router)
+api_router.include_router(stats.router)
+api_router.include_router(imports.router)
+api_router.include_router(whatsapp.router)
+api_router.include_router(admin.router)
+api_router.include_router(metrics.router)
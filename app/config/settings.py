@@ -17,6 +17,16 @@ class Settings:
     HOST = os.getenv("HOST", "0.0.0.0")
     PORT = int(os.getenv("PORT", 8000))
     DEBUG = os.getenv("DEBUG", "True").lower() == "true"
+    SERVICE_WARMUP_ENABLED = os.getenv("SERVICE_WARMUP_ENABLED", "True").lower() == "true"
+    
+    # Health Check Configuration
+    HEALTH_PROBE_INTERVAL_SECONDS = float(os.getenv("HEALTH_PROBE_INTERVAL_SECONDS", 15))
+    HEALTH_PROBE_TIMEOUT_SECONDS = float(os.getenv("HEALTH_PROBE_TIMEOUT_SECONDS", 5))
+    HEALTH_REQUIRED_DEPENDENCIES = [
+        name.strip()
+        for name in os.getenv("HEALTH_REQUIRED_DEPENDENCIES", "supabase,basic_api,gupshup").split(",")
+        if name.strip()
+    ]
     
     # Basic Application API Configuration
     BASIC_APPLICATION_API_URL = os.getenv("BASIC_APPLICATION_API_URL", "")
@@ -40,6 +50,13 @@ class Settings:
     GUPSHUP_LEAD_CREATION_SRC_NAME = os.getenv("GUPSHUP_LEAD_CREATION_SRC_NAME", "")
     GUPSHUP_LEAD_STATUS_SRC_NAME = os.getenv("GUPSHUP_LEAD_STATUS_SRC_NAME", "")
     
+    # Gupshup Webhook Configuration (the webhook is disabled while the token is empty)
+    GUPSHUP_WEBHOOK_TOKEN = os.getenv("GUPSHUP_WEBHOOK_TOKEN", "")
+    WHATSAPP_EVENTS_MAX_BATCH_SIZE = int(os.getenv("WHATSAPP_EVENTS_MAX_BATCH_SIZE", 500))
+    WHATSAPP_EVENTS_FLUSH_INTERVAL_MS = float(os.getenv("WHATSAPP_EVENTS_FLUSH_INTERVAL_MS", 1000))
+    # Events that could not be saved at shutdown, re-queued when a worker starts
+    WHATSAPP_EVENTS_SPILL_DIR = os.getenv("WHATSAPP_EVENTS_SPILL_DIR", "whatsapp_events")
+    
     # Legacy WhatsApp API Configuration (fallback)
     WHATSAPP_API_URL = os.getenv("WHATSAPP_API_URL", "https://api.whatsapp.com/send")
     WHATSAPP_API_KEY = os.getenv("WHATSAPP_API_KEY", "")
@@ -48,25 +65,71 @@ class Settings:
     SUPABASE_URL = os.getenv("SUPABASE_URL", "")
     SUPABASE_KEY = os.getenv("SUPABASE_KEY", "")
     
+    # Write-behind batching for lead inserts
+    LEAD_WRITE_BEHIND_ENABLED = os.getenv("LEAD_WRITE_BEHIND_ENABLED", "False").lower() == "true"
+    LEAD_WRITE_BEHIND_MAX_BATCH_SIZE = int(os.getenv("LEAD_WRITE_BEHIND_MAX_BATCH_SIZE", 50))
+    LEAD_WRITE_BEHIND_MAX_DELAY_MS = float(os.getenv("LEAD_WRITE_BEHIND_MAX_DELAY_MS", 5))
+    
+    # Lead Status Subscription Configuration
+    STATUS_STREAM_MAX_CONNECTIONS = int(os.getenv("STATUS_STREAM_MAX_CONNECTIONS", 1000))
+    STATUS_STREAM_POLL_INTERVAL_SECONDS = float(os.getenv("STATUS_STREAM_POLL_INTERVAL_SECONDS", 30))
+    STATUS_STREAM_HEARTBEAT_SECONDS = float(os.getenv("STATUS_STREAM_HEARTBEAT_SECONDS", 15))
+    STATUS_PUBSUB_BACKEND = os.getenv("STATUS_PUBSUB_BACKEND", "memory").lower()  # memory or redis
+    REDIS_URL = os.getenv("REDIS_URL", "redis://localhost:6379/0")
+    
+    # Bulk Lead Import Configuration
+    LEAD_IMPORT_DIR = os.getenv("LEAD_IMPORT_DIR", "imports")
+    LEAD_IMPORT_CONCURRENCY = int(os.getenv("LEAD_IMPORT_CONCURRENCY", 8))
+    LEAD_IMPORT_BATCH_SIZE = int(os.getenv("LEAD_IMPORT_BATCH_SIZE", 100))
+    LEAD_IMPORT_MAX_UPLOAD_BYTES = int(os.getenv("LEAD_IMPORT_MAX_UPLOAD_BYTES", 50 * 1024 * 1024))
+    
+    # Lead Statistics Configuration
+    LEAD_STATS_CACHE_TTL_SECONDS = float(os.getenv("LEAD_STATS_CACHE_TTL_SECONDS", 10))
+    
+    # Traffic Recording Configuration (replayed with scripts/replay_traffic.py)
+    TRAFFIC_RECORDING_ENABLED = os.getenv("TRAFFIC_RECORDING_ENABLED", "False").lower() == "true"
+    TRAFFIC_RECORDING_PATH = os.getenv("TRAFFIC_RECORDING_PATH", "traces/traffic-{pid}.ndjson")
+    TRAFFIC_RECORDING_SALT = os.getenv("TRAFFIC_RECORDING_SALT", "")  # required, recording stays off without it
+    TRAFFIC_RECORDING_SAMPLE_RATE = float(os.getenv("TRAFFIC_RECORDING_SAMPLE_RATE", 1))
+    TRAFFIC_RECORDING_EXCLUDE_PATHS = [
+        path.strip()
+        for path in os.getenv("TRAFFIC_RECORDING_EXCLUDE_PATHS", "/health,/api/v1/health").split(",")
+        if path.strip()
+    ]
+    
+    # Admin API Configuration (admin and import endpoints are disabled while the token is empty)
+    ADMIN_API_TOKEN = os.getenv("ADMIN_API_TOKEN", "")
+    
+    # Sampling Profiler Configuration
+    PROFILER_ENABLED = os.getenv("PROFILER_ENABLED", "True").lower() == "true"
+    PROFILER_MAX_SECONDS = float(os.getenv("PROFILER_MAX_SECONDS", 60))
+    PROFILER_STALL_THRESHOLD_MS = float(os.getenv("PROFILER_STALL_THRESHOLD_MS", 100))
+    
+    # Multi-Worker Configuration (python -m app.supervisor)
+    WORKERS = os.getenv("WORKERS", "1").lower()  # number of worker processes or "auto" (one per CPU, within the container's CPU quota)
+    WORKER_MAX_REQUESTS = int(os.getenv("WORKER_MAX_REQUESTS", 0))  # recycle a worker after this many requests, 0 = never
+    # Random extra requests per worker, so workers started together do not recycle together
+    WORKER_MAX_REQUESTS_JITTER = int(os.getenv("WORKER_MAX_REQUESTS_JITTER", WORKER_MAX_REQUESTS // 10))
+    WORKER_GRACEFUL_TIMEOUT_SECONDS = float(os.getenv("WORKER_GRACEFUL_TIMEOUT_SECONDS", 30))
+    
+    # Cross-Process Shared State (counters, token buckets, hot cache entries, worker metrics)
+    SHARED_STATE_BACKEND = os.getenv("SHARED_STATE_BACKEND", "local").lower()  # local, mmap or redis
+    SHARED_STATE_PATH = os.getenv("SHARED_STATE_PATH", "")  # mmap table file, defaults to /dev/shm
+    SHARED_STATE_SLOTS = int(os.getenv("SHARED_STATE_SLOTS", 4096))
+    SHARED_STATE_SLOT_BYTES = int(os.getenv("SHARED_STATE_SLOT_BYTES", 4096))
+    METRICS_PUBLISH_INTERVAL_SECONDS = float(os.getenv("METRICS_PUBLISH_INTERVAL_SECONDS", 5))
+    
     # Loan Type Mapping
+    # Lookups are case-insensitive and treat underscores as spaces
+    # (see app.utils.validators.normalize_loan_type)
     LOAN_TYPE_MAPPING = {
-        "home_loan": "HL",
         "home loan": "HL",
-        "HOME LOAN": "HL",
-        "Home Loan": "HL",
-        "Home loan": "HL",
-        "Home Loan": "HL",
-        "Loan Against Property": "LAP",
-        "Loan against property": "LAP",
-        "Loan Against Property": "LAP",
-        "loan_against_property": "LAP",
         "loan against property": "LAP",
-        "LAP": "LAP",
         "lap": "LAP",
-        "personal_loan": "PL",
-        "business_loan": "BL",
-        "car_loan": "CL",
-        "education_loan": "EL"
+        "personal loan": "PL",
+        "business loan": "BL",
+        "car loan": "CL",
+        "education loan": "EL"
     }
 
 # Global settings instance
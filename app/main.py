@@ -1,22 +1,65 @@
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
 from app.config.settings import settings
 from app.api.routes import api_router
+from app.middleware.profiler import ProfilerMiddleware
+from app.middleware.request_metrics import RequestMetricsMiddleware
+from app.middleware.traffic_recorder import TrafficRecorderMiddleware
+from app.services.container import container, get_worker_metrics
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Application startup and shutdown"""
+    # Readiness warm-up: build services and pre-open connection pools
+    # before uvicorn starts accepting requests
+    if settings.SERVICE_WARMUP_ENABLED:
+        await container.warm_up()
+    container.ready = True
+    # Probe upstream dependencies in the background for the readiness endpoint
+    await container.health_monitor.start()
+    # Publish this worker's metrics for the combined /metrics view
+    await container.worker_metrics.start()
+    # Re-queue WhatsApp events that a stopped worker could not save
+    container.whatsapp_event_buffer.restore_spilled()
+    yield
+    # Flush queued writes and close service clients
+    await container.shutdown()
 
 # Create FastAPI application
 app = FastAPI(
     title=settings.API_TITLE,
     description=settings.API_DESCRIPTION,
-    version=settings.API_VERSION
+    version=settings.API_VERSION,
+    lifespan=lifespan
 )
 
 # Include API routes
 app.include_router(api_router)
 
+# Request counts by route and status for /metrics
+app.add_middleware(RequestMetricsMiddleware, get_worker_metrics=get_worker_metrics)
+
+# Lets route-filtered profiles attribute samples; idle unless a profile is running
+if settings.PROFILER_ENABLED:
+    app.add_middleware(ProfilerMiddleware, profiler=container.profiler)
+
+# Opt-in: record sanitized request traces for scripts/replay_traffic.py
+if settings.TRAFFIC_RECORDING_ENABLED:
+    if settings.TRAFFIC_RECORDING_SALT:
+        app.add_middleware(TrafficRecorderMiddleware, recorder=container.traffic_recorder)
+    else:
+        print("Traffic recording disabled: TRAFFIC_RECORDING_SALT is not set")
+
 if __name__ == "__main__":
-    import uvicorn
-    uvicorn.run(
-        "app.main:app", 
-        host=settings.HOST, 
-        port=settings.PORT, 
-        reload=settings.DEBUG
-    ) 
\ No newline at end of file
+    if settings.WORKERS != "1":
+        # Several worker processes behind one socket
+        from app.supervisor import main
+        main()
+    else:
+        import uvicorn
+        uvicorn.run(
+            "app.main:app", 
+            host=settings.HOST, 
+            port=settings.PORT, 
+            reload=settings.DEBUG
+        ) 
\ No newline at end of file
@@ -0,0 +1 @@
+# Middleware package for ASGI request hooks
\ No newline at end of file
@@ -0,0 +1,28 @@
+import asyncio
+from app.services.sampling_profiler import SamplingProfiler
+
+
+class ProfilerMiddleware:
+    """
+    ASGI middleware that tells the sampling profiler which request each task serves
+
+    Only does work while a profile is running, so route-filtered profiles can
+    attribute event loop samples to routes.
+    """
+
+    def __init__(self, app, profiler: SamplingProfiler):
+        self.app = app
+        self.profiler = profiler
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not self.profiler.active:
+            await self.app(scope, receive, send)
+            return
+
+        # Routing stores the matched route in this scope, which the sampler reads
+        task = asyncio.current_task()
+        self.profiler.track_request(task, scope)
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            self.profiler.untrack_request(task)
@@ -0,0 +1,45 @@
+from typing import Callable
+from app.services.worker_metrics import WorkerMetrics
+
+
+class RequestMetricsMiddleware:
+    """
+    ASGI middleware that counts requests by route template and status code
+
+    Counts stay in the worker until WorkerMetrics publishes them, so the
+    request path does not touch the shared state.
+    """
+
+    def __init__(self, app, get_worker_metrics: Callable[[], WorkerMetrics]):
+        """
+        Args:
+            app: ASGI application
+            get_worker_metrics: Returns the WorkerMetrics (resolved on the first
+                request, so importing the app does not open the shared state)
+        """
+        self.app = app
+        self.get_worker_metrics = get_worker_metrics
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        status = 500
+
+        async def send_with_status(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            # Set by routing; unmatched paths are grouped so they cannot grow the counters
+            route = scope.get("route")
+            self.get_worker_metrics().count_request(
+                scope["method"],
+                getattr(route, "path", None) or "unmatched",
+                status
+            )
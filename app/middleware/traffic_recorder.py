@@ -0,0 +1,165 @@
+import hashlib
+import hmac
+import json
+import os
+import random
+import time
+from typing import Dict, Iterable
+from app.utils.tracing import end_upstream_trace, start_upstream_trace
+
+# Request fields recorded as keyed hashes, never in clear text
+IDENTIFIER_FIELDS = ("mobile_number", "basic_application_id", "pan_number")
+
+# Larger request bodies are not inspected for identifiers
+MAX_INSPECTED_BODY_BYTES = 64 * 1024
+
+FLUSH_INTERVAL_SECONDS = 1.0
+
+
+class TrafficRecorder:
+    """
+    Append-only writer for sanitized request traces
+
+    Each request becomes one compact JSON line:
+
+        {"ts": 1718000000.123, "method": "POST", "route": "/api/v1/lead/status",
+         "status": 200, "ms": 84.2, "ids": {"mobile_number": "9f2c..."},
+         "upstream": [["supabase.get_lead_by_mobile", 11.3, "hit"], ...]}
+
+    Routes are recorded as templates (path parameters are not expanded) and
+    identifiers as keyed hashes, so the same customer polling repeatedly keeps
+    the same hash without the trace holding personal data. Request and
+    response bodies are never written. Lines are buffered and flushed about
+    once a second.
+    """
+
+    def __init__(self, path: str, salt: str, sample_rate: float = 1.0, exclude_paths: Iterable[str] = ()):
+        """
+        Args:
+            path: Trace file; "{pid}" is replaced with the worker's process ID
+            salt: Key for identifier hashes, the same for all workers so a
+                customer keeps one hash across workers and recycles
+            sample_rate: Fraction of requests recorded (0-1)
+            exclude_paths: Path prefixes that are never recorded (e.g. health probes)
+            
+        Raises:
+            ValueError: If salt is empty
+        """
+        if not salt:
+            raise ValueError("TRAFFIC_RECORDING_SALT must be set to record traffic")
+        self.path = path.replace("{pid}", str(os.getpid()))
+        self.sample_rate = sample_rate
+        self.exclude_paths = tuple(exclude_paths)
+        self._key = salt.encode()
+        self._file = None
+        self._last_flush = 0.0
+        self.records_written = 0
+
+    def should_record(self, path: str) -> bool:
+        if path.startswith(self.exclude_paths):
+            return False
+        return self.sample_rate >= 1 or random.random() < self.sample_rate
+
+    def hash_identifier(self, value: str) -> str:
+        """Keyed hash of an identifier, short enough to keep traces compact"""
+        return hmac.new(self._key, value.encode(), hashlib.sha256).hexdigest()[:16]
+
+    def write(self, record: Dict) -> None:
+        """Append one trace record; called from the event loop thread"""
+        if self._file is None:
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            # Append mode: several workers may share a file, lines are never rewritten
+            self._file = open(self.path, "a", encoding="utf-8")
+
+        self._file.write(json.dumps(record, separators=(",", ":")) + "\n")
+        self.records_written += 1
+
+        now = time.monotonic()
+        if now - self._last_flush >= FLUSH_INTERVAL_SECONDS:
+            self._file.flush()
+            self._last_flush = now
+
+    def close(self) -> None:
+        """Flush and close the trace file"""
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+
+class TrafficRecorderMiddleware:
+    """
+    ASGI middleware that records a trace line for every sampled HTTP request
+
+    Upstream calls made by the services while the request is handled are
+    collected through app.utils.tracing.trace_upstream().
+    """
+
+    def __init__(self, app, recorder: TrafficRecorder):
+        self.app = app
+        self.recorder = recorder
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not self.recorder.should_record(scope["path"]):
+            await self.app(scope, receive, send)
+            return
+
+        body = bytearray()
+        inspect_body = _is_json(scope)
+        response_status = 500
+
+        async def receive_and_capture():
+            message = await receive()
+            if inspect_body and message["type"] == "http.request":
+                if len(body) + len(message.get("body", b"")) <= MAX_INSPECTED_BODY_BYTES:
+                    body.extend(message.get("body", b""))
+            return message
+
+        async def send_and_capture(message):
+            nonlocal response_status
+            if message["type"] == "http.response.start":
+                response_status = message["status"]
+            await send(message)
+
+        ts = time.time()
+        started = time.perf_counter()
+        token = start_upstream_trace()
+        try:
+            await self.app(scope, receive_and_capture, send_and_capture)
+        finally:
+            upstream = end_upstream_trace(token)
+            route = scope.get("route")
+            record = {
+                "ts": round(ts, 3),
+                "method": scope["method"],
+                "route": getattr(route, "path", None) or scope["path"],
+                "status": response_status,
+                "ms": round((time.perf_counter() - started) * 1000, 2),
+                "ids": self._hashed_identifiers(scope.get("path_params") or {}, bytes(body)),
+                "upstream": upstream
+            }
+            try:
+                self.recorder.write(record)
+            except Exception as e:
+                print(f"Failed to write traffic trace: {e}")
+
+    def _hashed_identifiers(self, path_params: Dict, body: bytes) -> Dict[str, str]:
+        values = {key: path_params[key] for key in IDENTIFIER_FIELDS if path_params.get(key)}
+        if body:
+            try:
+                data = json.loads(body)
+            except ValueError:
+                data = None
+            if isinstance(data, dict):
+                for key in IDENTIFIER_FIELDS:
+                    if data.get(key) and key not in values:
+                        values[key] = data[key]
+        return {key: self.recorder.hash_identifier(str(value)) for key, value in values.items()}
+
+
+def _is_json(scope) -> bool:
+    for name, value in scope.get("headers", ()):
+        if name == b"content-type":
+            return b"json" in value
+    return False
@@ -1,5 +1,9 @@
-from pydantic import BaseModel, EmailStr
+from pydantic import BaseModel, EmailStr, field_validator
 from typing import Optional
+from app.utils.validators import (
+    validate_loan_type, validate_loan_amount, validate_loan_tenure,
+    validate_pan_number, validate_mobile_number, validate_pin_code
+)
 
 class LeadCreateRequest(BaseModel):
     loan_type: str
@@ -13,10 +17,59 @@ class LeadCreateRequest(BaseModel):
     email: EmailStr
     dob: str
     pin_code: str
+    
+    @field_validator("loan_type")
+    @classmethod
+    def check_loan_type(cls, value: str) -> str:
+        if not validate_loan_type(value):
+            raise ValueError("Invalid loan type")
+        return value
+    
+    @field_validator("loan_amount")
+    @classmethod
+    def check_loan_amount(cls, value: float) -> float:
+        if not validate_loan_amount(value):
+            raise ValueError("Loan amount must be greater than 0")
+        return value
+    
+    @field_validator("loan_tenure")
+    @classmethod
+    def check_loan_tenure(cls, value: int) -> int:
+        if not validate_loan_tenure(value):
+            raise ValueError("Loan tenure must be greater than 0")
+        return value
+    
+    @field_validator("pan_number")
+    @classmethod
+    def check_pan_number(cls, value: str) -> str:
+        if not validate_pan_number(value):
+            raise ValueError("PAN number must be in format: ABCDE1234F")
+        return value
+    
+    @field_validator("mobile_number")
+    @classmethod
+    def check_mobile_number(cls, value: str) -> str:
+        if not validate_mobile_number(value):
+            raise ValueError("Mobile number must be 10 digits")
+        return value
+    
+    @field_validator("pin_code")
+    @classmethod
+    def check_pin_code(cls, value: str) -> str:
+        if not validate_pin_code(value):
+            raise ValueError("PIN code must be 6 digits")
+        return value
 
 class LeadStatusRequest(BaseModel):
     mobile_number: Optional[str] = None
     basic_application_id: Optional[str] = None
+    
+    @field_validator("mobile_number")
+    @classmethod
+    def check_mobile_number(cls, value: Optional[str]) -> Optional[str]:
+        if value and not validate_mobile_number(value):
+            raise ValueError("Mobile number must be 10 digits")
+        return value
 
 class LeadCreateResponse(BaseModel):
     basic_application_id: str
@@ -24,4 +77,24 @@ class LeadCreateResponse(BaseModel):
 
 class LeadStatusResponse(BaseModel):
     status: str
-    message: str 
\ No newline at end of file
+    message: str
+
+class LeadStatisticsResponse(BaseModel):
+    total_leads: int
+    created_leads: int
+    approved_leads: int
+    rejected_leads: int
+    leads_last_24h: int
+    leads_last_7d: int
+
+class LeadImportJobResponse(BaseModel):
+    job_id: str
+    status: str
+    rows_done: int
+    created: int
+    duplicates: int
+    invalid: int
+    failed: int
+    error: Optional[str] = None
+    started_at: Optional[str] = None
+    updated_at: Optional[str] = None
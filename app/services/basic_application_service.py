@@ -1,5 +1,3 @@
-import httpx
-import requests
 import os
 import uuid
 import time
@@ -11,7 +9,8 @@ from datetime import datetime
 from fastapi import HTTPException
 from typing import Dict, Optional
 from urllib.parse import urlparse, parse_qsl, urlencode
-from app.config.settings import settings
+from app.utils.tracing import trace_upstream
+from app.utils.validators import normalize_loan_type
 
 
 class BasicApplicationService:
@@ -28,8 +27,46 @@ class BasicApplicationService:
         self.BASIC_APPLICATION_API_KEY = os.getenv("BASIC_APPLICATION_API_KEY")
         
         
-        # Loan type mapping
-        self.loan_type_mapping = settings.LOAN_TYPE_MAPPING
+        # Shared HTTP session (connection pool), created on first use
+        self._session = None
+    
+    def _get_session(self):
+        """Get the shared requests session, creating it on first use"""
+        if self._session is None:
+            # Imported lazily to keep application import time low
+            import requests
+            self._session = requests.Session()
+        return self._session
+    
+    def ping(self, timeout: float = 5) -> None:
+        """
+        Check that the Basic Application API is reachable
+        
+        Any HTTP response counts as reachable; only connection errors fail.
+        
+        Raises:
+            RuntimeError: If the API URL is not configured
+            Exception: If the API cannot be reached
+        """
+        if not self.basic_api_url:
+            raise RuntimeError("Basic Application API URL not configured")
+        self._get_session().head(self.basic_api_url, timeout=timeout)
+    
+    def warm_up(self) -> None:
+        """Create the HTTP session and open a connection to the Basic Application API"""
+        if not self.basic_api_url:
+            return
+        
+        try:
+            self.ping()
+        except Exception as e:
+            print(f"Basic Application API warm-up failed: {e}")
+    
+    def close(self) -> None:
+        """Close the shared HTTP session"""
+        if self._session is not None:
+            self._session.close()
+            self._session = None
     
     def _format_date(self, date_str: str) -> str:
         """
@@ -77,7 +114,7 @@ class BasicApplicationService:
             "dateOfBirth": dob,
             "annualIncome": 0,  # Use the same value as working curl
             "id": str(uuid.uuid4()),  # Generate random GUID
-            "loanType": self.loan_type_mapping.get(lead_data.get("loan_type", ""), "HL"),
+            "loanType": normalize_loan_type(lead_data.get("loan_type", "")) or "HL",
             "loanAmountReq": int(lead_data.get("loan_amount", 0)),
             "customerId": "234",  # Use the same value as working curl
             "firstName": lead_data.get("first_name", ""),
@@ -156,7 +193,9 @@ class BasicApplicationService:
             api_url = f"{self.basic_api_url}/api/v1/NewApplication/FullfilmentByBasic"
             headers = self.generate_signature_headers(api_url, "POST", api_payload)
             
-            response = requests.post(api_url, headers=headers, json=api_payload)
+            with trace_upstream("basic_api.create_lead") as call:
+                response = self._get_session().post(api_url, headers=headers, json=api_payload)
+                call["status"] = response.status_code
             
             if response.status_code in [200, 201]:
                 return response.json()
@@ -189,8 +228,9 @@ class BasicApplicationService:
                     detail="Basic Application API URL not configured"
                 )
             
-            # Import database service here to avoid circular imports
-            from app.services.database_service import database_service
+            # Import the container here to avoid circular imports
+            from app.services.container import container
+            database_service = container.database_service
             
             # Initialize variables
             final_mobile_number = None
@@ -227,19 +267,34 @@ class BasicApplicationService:
             
             # Now we have both mobile number and basic_application_id, call the GetActivity API
             if final_mobile_number and final_basic_application_id:
-                api_url = f"{self.basic_api_url}/api/v1/Application/Activity/GetActivity/{final_basic_application_id}/{final_mobile_number}"
-                headers = self.generate_signature_headers(api_url, "GET")
-                
-                response = requests.get(api_url, headers=headers)
-                    
-                if response.status_code == 200:
-                    return response.json()
-                else:
-                    return None
+                return self.get_activity(final_basic_application_id, final_mobile_number)
             else:
                 return None
                     
         except HTTPException:
             raise
         except Exception as e:
+            return None
+    
+    def get_activity(self, basic_application_id: str, mobile_number: str) -> Optional[Dict]:
+        """
+        Call the GetActivity API for a known application ID and mobile number
+        
+        Args:
+            basic_application_id: Basic Application ID
+            mobile_number: Mobile number of the lead
+            
+        Returns:
+            Optional[Dict]: Activity response or None if not found
+        """
+        api_url = f"{self.basic_api_url}/api/v1/Application/Activity/GetActivity/{basic_application_id}/{mobile_number}"
+        headers = self.generate_signature_headers(api_url, "GET")
+        
+        with trace_upstream("basic_api.get_activity") as call:
+            response = self._get_session().get(api_url, headers=headers)
+            call["status"] = response.status_code
+            
+        if response.status_code == 200:
+            return response.json()
+        else:
             return None 
\ No newline at end of file
@@ -0,0 +1,284 @@
+import asyncio
+import os
+import tempfile
+import threading
+from typing import Dict, Optional
+from app.config.settings import settings
+from app.middleware.traffic_recorder import TrafficRecorder
+from app.services.basic_application_service import BasicApplicationService
+from app.services.database_service import DatabaseService
+from app.services.health_monitor import HealthMonitor
+from app.services.lead_import_service import LeadImportService
+from app.services.sampling_profiler import SamplingProfiler
+from app.services.shared_state import LocalSharedState, MmapSharedState, RedisSharedState, SharedState
+from app.services.status_broadcaster import InMemoryStatusBus, RedisStatusBus, StatusBroadcaster
+from app.services.whatsapp_event_buffer import WhatsAppEventBuffer
+from app.services.whatsapp_service import WhatsAppService
+from app.services.worker_metrics import WorkerMetrics
+
+
+class ServiceContainer:
+    """
+    Lazily built, application-scoped service instances
+
+    Services are created on first access instead of at import time, so
+    importing the application does not open clients. The FastAPI lifespan
+    calls warm_up() before serving traffic and shutdown() on exit.
+    """
+
+    def __init__(self):
+        self._lock = threading.RLock()
+        self._database_service: Optional[DatabaseService] = None
+        self._whatsapp_service: Optional[WhatsAppService] = None
+        self._basic_application_service: Optional[BasicApplicationService] = None
+        self._health_monitor: Optional[HealthMonitor] = None
+        self._status_broadcaster: Optional[StatusBroadcaster] = None
+        self._lead_import_service: Optional[LeadImportService] = None
+        self._whatsapp_event_buffer: Optional[WhatsAppEventBuffer] = None
+        self._traffic_recorder: Optional[TrafficRecorder] = None
+        self._profiler: Optional[SamplingProfiler] = None
+        self._shared_state: Optional[SharedState] = None
+        self._worker_metrics: Optional[WorkerMetrics] = None
+        self.ready = False
+
+    @property
+    def database_service(self) -> DatabaseService:
+        if self._database_service is None:
+            with self._lock:
+                if self._database_service is None:
+                    self._database_service = DatabaseService()
+        return self._database_service
+
+    @property
+    def whatsapp_service(self) -> WhatsAppService:
+        if self._whatsapp_service is None:
+            with self._lock:
+                if self._whatsapp_service is None:
+                    self._whatsapp_service = WhatsAppService(event_buffer=self.whatsapp_event_buffer)
+        return self._whatsapp_service
+
+    @property
+    def whatsapp_event_buffer(self) -> WhatsAppEventBuffer:
+        if self._whatsapp_event_buffer is None:
+            with self._lock:
+                if self._whatsapp_event_buffer is None:
+                    self._whatsapp_event_buffer = WhatsAppEventBuffer(
+                        upsert_events=lambda events: self.database_service.upsert_whatsapp_message_events(events),
+                        max_batch_size=settings.WHATSAPP_EVENTS_MAX_BATCH_SIZE,
+                        flush_interval_ms=settings.WHATSAPP_EVENTS_FLUSH_INTERVAL_MS,
+                        spill_dir=settings.WHATSAPP_EVENTS_SPILL_DIR
+                    )
+        return self._whatsapp_event_buffer
+
+    @property
+    def basic_application_service(self) -> BasicApplicationService:
+        if self._basic_application_service is None:
+            with self._lock:
+                if self._basic_application_service is None:
+                    self._basic_application_service = BasicApplicationService()
+        return self._basic_application_service
+
+    @property
+    def health_monitor(self) -> HealthMonitor:
+        if self._health_monitor is None:
+            with self._lock:
+                if self._health_monitor is None:
+                    timeout = settings.HEALTH_PROBE_TIMEOUT_SECONDS
+                    self._health_monitor = HealthMonitor(
+                        probes={
+                            "supabase": lambda: self.health_monitor.run_in_thread(self.database_service.ping),
+                            "basic_api": lambda: self.health_monitor.run_in_thread(self.basic_application_service.ping, timeout),
+                            "gupshup": lambda: self.whatsapp_service.ping(timeout)
+                        },
+                        interval_seconds=settings.HEALTH_PROBE_INTERVAL_SECONDS,
+                        timeout_seconds=timeout,
+                        required=settings.HEALTH_REQUIRED_DEPENDENCIES
+                    )
+        return self._health_monitor
+
+    @property
+    def status_broadcaster(self) -> StatusBroadcaster:
+        if self._status_broadcaster is None:
+            with self._lock:
+                if self._status_broadcaster is None:
+                    if settings.STATUS_PUBSUB_BACKEND == "redis":
+                        bus = RedisStatusBus(settings.REDIS_URL)
+                    else:
+                        bus = InMemoryStatusBus()
+                    self._status_broadcaster = StatusBroadcaster(
+                        get_database_service=lambda: self.database_service,
+                        get_basic_application_service=lambda: self.basic_application_service,
+                        bus=bus,
+                        max_connections=settings.STATUS_STREAM_MAX_CONNECTIONS,
+                        poll_interval_seconds=settings.STATUS_STREAM_POLL_INTERVAL_SECONDS
+                    )
+        return self._status_broadcaster
+
+    @property
+    def lead_import_service(self) -> LeadImportService:
+        if self._lead_import_service is None:
+            with self._lock:
+                if self._lead_import_service is None:
+                    self._lead_import_service = LeadImportService(
+                        get_database_service=lambda: self.database_service,
+                        get_basic_application_service=lambda: self.basic_application_service,
+                        import_dir=settings.LEAD_IMPORT_DIR,
+                        concurrency=settings.LEAD_IMPORT_CONCURRENCY,
+                        batch_size=settings.LEAD_IMPORT_BATCH_SIZE
+                    )
+        return self._lead_import_service
+
+    @property
+    def traffic_recorder(self) -> TrafficRecorder:
+        if self._traffic_recorder is None:
+            with self._lock:
+                if self._traffic_recorder is None:
+                    self._traffic_recorder = TrafficRecorder(
+                        path=settings.TRAFFIC_RECORDING_PATH,
+                        salt=settings.TRAFFIC_RECORDING_SALT,
+                        sample_rate=settings.TRAFFIC_RECORDING_SAMPLE_RATE,
+                        exclude_paths=settings.TRAFFIC_RECORDING_EXCLUDE_PATHS
+                    )
+        return self._traffic_recorder
+
+    @property
+    def profiler(self) -> SamplingProfiler:
+        if self._profiler is None:
+            with self._lock:
+                if self._profiler is None:
+                    self._profiler = SamplingProfiler(
+                        max_seconds=settings.PROFILER_MAX_SECONDS,
+                        stall_threshold_ms=settings.PROFILER_STALL_THRESHOLD_MS
+                    )
+        return self._profiler
+
+    @property
+    def shared_state(self) -> SharedState:
+        if self._shared_state is None:
+            with self._lock:
+                if self._shared_state is None:
+                    if settings.SHARED_STATE_BACKEND == "redis":
+                        self._shared_state = RedisSharedState(settings.REDIS_URL)
+                    elif settings.SHARED_STATE_BACKEND == "mmap":
+                        self._shared_state = MmapSharedState(
+                            path=shared_state_path(),
+                            slots=settings.SHARED_STATE_SLOTS,
+                            slot_bytes=settings.SHARED_STATE_SLOT_BYTES
+                        )
+                    else:
+                        self._shared_state = LocalSharedState()
+        return self._shared_state
+
+    @property
+    def worker_metrics(self) -> WorkerMetrics:
+        if self._worker_metrics is None:
+            with self._lock:
+                if self._worker_metrics is None:
+                    self._worker_metrics = WorkerMetrics(
+                        shared_state=self.shared_state,
+                        collect=self.collect_metrics,
+                        interval_seconds=settings.METRICS_PUBLISH_INTERVAL_SECONDS
+                    )
+        return self._worker_metrics
+
+    def collect_metrics(self) -> Dict[str, Dict]:
+        """Metrics of the services built in this worker, by section"""
+        metrics = {}
+        if self._database_service is not None:
+            metrics["write_behind"] = self._database_service.lead_write_batcher.get_metrics()
+        if self._status_broadcaster is not None:
+            metrics["status_stream"] = self._status_broadcaster.get_metrics()
+        if self._whatsapp_event_buffer is not None:
+            metrics["whatsapp_events"] = self._whatsapp_event_buffer.get_metrics()
+        return metrics
+
+    async def warm_up(self) -> None:
+        """Build all services and pre-open their connection pools concurrently"""
+        await asyncio.gather(
+            asyncio.to_thread(self.database_service.warm_up),
+            asyncio.to_thread(self.basic_application_service.warm_up),
+            self.whatsapp_service.warm_up()
+        )
+
+    async def shutdown(self) -> None:
+        """Flush pending writes and close the services that were built"""
+        self.ready = False
+        if self._profiler is not None:
+            self._profiler.stop()
+        if self._health_monitor is not None:
+            await self._health_monitor.stop()
+        if self._status_broadcaster is not None:
+            await self._status_broadcaster.stop()
+        if self._lead_import_service is not None:
+            await self._lead_import_service.stop()
+        if self._whatsapp_event_buffer is not None:
+            await self._whatsapp_event_buffer.close()
+        if self._database_service is not None:
+            await self._database_service.lead_write_batcher.close()
+        if self._whatsapp_service is not None:
+            await self._whatsapp_service.aclose()
+        if self._basic_application_service is not None:
+            self._basic_application_service.close()
+        if self._traffic_recorder is not None:
+            self._traffic_recorder.close()
+        if self._worker_metrics is not None:
+            await self._worker_metrics.stop()
+        if self._shared_state is not None:
+            await self._shared_state.close()
+
+
+def shared_state_path() -> str:
+    """mmap shared state file: SHARED_STATE_PATH, or one per port on tmpfs"""
+    if settings.SHARED_STATE_PATH:
+        return settings.SHARED_STATE_PATH
+    directory = "/dev/shm" if os.path.isdir("/dev/shm") else tempfile.gettempdir()
+    return os.path.join(directory, f"lead-api-{settings.PORT}.state")
+
+
+# Global service container
+container = ServiceContainer()
+
+
+def get_database_service() -> DatabaseService:
+    """FastAPI dependency for the database service"""
+    return container.database_service
+
+
+def get_whatsapp_service() -> WhatsAppService:
+    """FastAPI dependency for the WhatsApp service"""
+    return container.whatsapp_service
+
+
+def get_basic_application_service() -> BasicApplicationService:
+    """FastAPI dependency for the Basic Application service"""
+    return container.basic_application_service
+
+
+def get_status_broadcaster() -> StatusBroadcaster:
+    """FastAPI dependency for the lead status broadcaster"""
+    return container.status_broadcaster
+
+
+def get_lead_import_service() -> LeadImportService:
+    """FastAPI dependency for the bulk lead import service"""
+    return container.lead_import_service
+
+
+def get_whatsapp_event_buffer() -> WhatsAppEventBuffer:
+    """FastAPI dependency for the WhatsApp message event buffer"""
+    return container.whatsapp_event_buffer
+
+
+def get_profiler() -> SamplingProfiler:
+    """FastAPI dependency for the sampling profiler"""
+    return container.profiler
+
+
+def get_shared_state() -> SharedState:
+    """FastAPI dependency for the cross-process shared state"""
+    return container.shared_state
+
+
+def get_worker_metrics() -> WorkerMetrics:
+    """FastAPI dependency for the combined worker metrics"""
+    return container.worker_metrics
@@ -1,8 +1,21 @@
 import os
-from typing import Dict, Optional, List
-from supabase import create_client, Client
+from typing import Dict, Optional, List, Set, Tuple
 from fastapi import HTTPException
 from app.config.settings import settings
+from app.services.lead_write_batcher import LeadWriteBatcher
+from app.utils.tracing import trace_upstream
+
+# Columns the status path reads from a lead. Both status lookups select only
+# these, so they are answered from the covering indexes (leads_basic_application_id_key,
+# idx_leads_mobile_number_created_at) with index-only scans.
+STATUS_LOOKUP_COLUMNS = "basic_application_id,mobile_number,first_name,last_name,status"
+
+# PAN and mobile numbers per find_existing_lead_keys call (each). It returns at
+# most one row per key, which stays below PostgREST's default max-rows (1000).
+EXISTING_KEYS_PER_CALL = 250
+
+# Postgres error code of a duplicate basic_application_id on insert
+UNIQUE_VIOLATION = "23505"
 
 
 class DatabaseService:
@@ -18,11 +31,92 @@ class DatabaseService:
             self.client = None
         else:
             try:
+                # Imported lazily: the supabase package is slow to import
+                from supabase import create_client
                 self.client = create_client(self.supabase_url, self.supabase_key)
                 print("Supabase client initialized successfully")
             except Exception as e:
                 print(f"Error initializing Supabase client: {e}")
                 self.client = None
+        
+        # Write-behind batching for lead inserts (used when LEAD_WRITE_BEHIND_ENABLED)
+        self.lead_write_batcher = LeadWriteBatcher(
+            insert_batch=self.insert_leads_batch,
+            insert_one=self.insert_lead_row,
+            get_existing=self.get_lead_row,
+            max_batch_size=settings.LEAD_WRITE_BEHIND_MAX_BATCH_SIZE,
+            max_delay_ms=settings.LEAD_WRITE_BEHIND_MAX_DELAY_MS
+        )
+    
+    def _prepare_lead_row(self, lead_data: Dict, basic_api_response: Dict) -> Dict:
+        """
+        Build a leads table row from request data and the Basic API response
+        
+        Args:
+            lead_data: Original lead data from request
+            basic_api_response: Response from Basic Application API
+            
+        Returns:
+            Dict: Row ready to be inserted into the leads table
+            
+        Raises:
+            HTTPException: If the Basic Application ID is missing
+        """
+        # Extract basic application ID from Basic API response
+        basic_application_id = (
+            basic_api_response.get("result", {})
+            .get("basicAppId")
+        )
+        
+        if not basic_application_id:
+            raise HTTPException(
+                status_code=400,
+                detail="Basic Application ID not found in Basic API response"
+            )
+        
+        # Format date for database (convert DD/MM/YYYY to YYYY-MM-DD)
+        dob = lead_data.get("dob", "")
+        if dob:
+            try:
+                if '/' in dob:
+                    # Convert DD/MM/YYYY to YYYY-MM-DD
+                    day, month, year = dob.split('/')
+                    dob = f"{year}-{month.zfill(2)}-{day.zfill(2)}"
+                elif 'T' in dob:
+                    # If it's already in ISO format, extract just the date part
+                    dob = dob.split('T')[0]
+            except Exception as e:
+                dob = None
+        
+        # Prepare data for database with proper type handling
+        relation_id = basic_api_response.get("result", {}).get("id")
+        customer_id = basic_api_response.get("result", {}).get("primaryBorrower", {}).get("customerId")
+        
+        # Ensure string values for VARCHAR fields
+        if relation_id is not None:
+            relation_id = str(relation_id)
+        if customer_id is not None:
+            customer_id = str(customer_id)
+        
+        return {
+            "basic_application_id": str(basic_application_id),
+            "customer_id": customer_id,
+            "relation_id": relation_id,
+            "first_name": str(lead_data.get("first_name", "")),
+            "last_name": str(lead_data.get("last_name", "")),
+            "mobile_number": str(lead_data.get("mobile_number", "")),
+            "email": str(lead_data.get("email", "")),
+            "pan_number": str(lead_data.get("pan_number", "")),
+            "loan_type": str(lead_data.get("loan_type", "")),
+            "loan_amount": float(lead_data.get("loan_amount", 0)),
+            "loan_tenure": int(lead_data.get("loan_tenure", 0)),
+            "gender": str(lead_data.get("gender", "")),
+            "dob": str(dob) if dob else None,
+            "pin_code": str(lead_data.get("pin_code", "")),
+            "basic_api_response": basic_api_response,  # Store full response for reference
+            "status": "created",
+            "created_at": "now()"
+        }
     
     def save_lead_data(self, lead_data: Dict, basic_api_response: Dict) -> Dict:
         """
@@ -42,65 +136,12 @@ class DatabaseService:
             )
         
         try:            
-            # Extract basic application ID from Basic API response
-            basic_application_id = (
-                basic_api_response.get("result", {})
-                .get("basicAppId")
-            )
-            
-            if not basic_application_id:
-                raise HTTPException(
-                    status_code=400,
-                    detail="Basic Application ID not found in Basic API response"
-                )
-            
-            # Format date for database (convert DD/MM/YYYY to YYYY-MM-DD)
-            dob = lead_data.get("dob", "")
-            if dob:
-                try:
-                    if '/' in dob:
-                        # Convert DD/MM/YYYY to YYYY-MM-DD
-                        day, month, year = dob.split('/')
-                        dob = f"{year}-{month.zfill(2)}-{day.zfill(2)}"
-                    elif 'T' in dob:
-                        # If it's already in ISO format, extract just the date part
-                        dob = dob.split('T')[0]
-                except Exception as e:
-                    dob = None
-            
-            # Prepare data for database with proper type handling
-            relation_id = basic_api_response.get("result", {}).get("id")
-            customer_id = basic_api_response.get("result", {}).get("primaryBorrower", {}).get("customerId")
-            
-            # Ensure string values for VARCHAR fields
-            if relation_id is not None:
-                relation_id = str(relation_id)
-            if customer_id is not None:
-                customer_id = str(customer_id)
-            
-            db_data = {
-                "basic_application_id": str(basic_application_id),
-                "customer_id": customer_id,
-                "relation_id": relation_id,
-                "first_name": str(lead_data.get("first_name", "")),
-                "last_name": str(lead_data.get("last_name", "")),
-                "mobile_number": str(lead_data.get("mobile_number", "")),
-                "email": str(lead_data.get("email", "")),
-                "pan_number": str(lead_data.get("pan_number", "")),
-                "loan_type": str(lead_data.get("loan_type", "")),
-                "loan_amount": float(lead_data.get("loan_amount", 0)),
-                "loan_tenure": int(lead_data.get("loan_tenure", 0)),
-                "gender": str(lead_data.get("gender", "")),
-                "dob": str(dob) if dob else None,
-                "pin_code": str(lead_data.get("pin_code", "")),
-                "basic_api_response": basic_api_response,  # Store full response for reference
-                "status": "created",
-                "created_at": "now()"
-            }
-            
+            db_data = self._prepare_lead_row(lead_data, basic_api_response)
+            basic_application_id = db_data["basic_application_id"]
             
             # Insert data into leads table
-            result = self.client.table("leads").insert(db_data).execute()
+            with trace_upstream("supabase.insert_lead"):
+                result = self.client.table("leads").insert(db_data).execute()
             
             if result.data:
                 return {
@@ -123,6 +164,109 @@ class DatabaseService:
                 detail=f"Database error: {str(e)}"
             )
     
+    async def save_lead_data_batched(self, lead_data: Dict, basic_api_response: Dict) -> Dict:
+        """
+        Save lead data through the write-behind batcher
+        
+        The row is queued and written together with other concurrent leads in
+        one multi-row insert. The result has the same shape as save_lead_data.
+        
+        Args:
+            lead_data: Original lead data from request
+            basic_api_response: Response from Basic Application API
+            
+        Returns:
+            Dict: Database operation result
+        """
+        if not self.client:
+            raise HTTPException(
+                status_code=500,
+                detail="Supabase client not initialized. Check database configuration."
+            )
+        
+        db_data = self._prepare_lead_row(lead_data, basic_api_response)
+        # Traced time includes waiting for the batch to be flushed
+        with trace_upstream("supabase.insert_lead"):
+            row = await self.lead_write_batcher.submit(db_data)
+        
+        return {
+            "success": True,
+            "database_id": row.get("id"),
+            "basic_application_id": db_data["basic_application_id"],
+            "message": "Lead data saved to database"
+        }
+    
+    def insert_leads_batch(self, rows: List[Dict]) -> List[Dict]:
+        """
+        Insert several leads in one request, skipping duplicates
+        
+        Rows whose basic_application_id already exists are not inserted and
+        are missing from the returned list.
+        
+        Args:
+            rows: Prepared leads table rows
+            
+        Returns:
+            List[Dict]: Inserted rows as returned by the database
+            
+        Raises:
+            HTTPException: If the database rejected the batch (nothing was written)
+        """
+        # Imported lazily, like the client itself
+        from postgrest.exceptions import APIError
+        
+        try:
+            result = (
+                self.client.table("leads")
+                .upsert(rows, on_conflict="basic_application_id", ignore_duplicates=True)
+                .execute()
+            )
+        except APIError as e:
+            raise HTTPException(status_code=500, detail=f"Database error: {str(e)}")
+        return result.data or []
+    
+    def insert_lead_row(self, row: Dict) -> Dict:
+        """
+        Insert a single prepared lead row
+        
+        Args:
+            row: Prepared leads table row
+            
+        Returns:
+            Dict: Inserted row as returned by the database
+            
+        Raises:
+            HTTPException: 409 if the basic_application_id already exists
+        """
+        try:
+            result = self.client.table("leads").insert(row).execute()
+        except Exception as e:
+            if getattr(e, "code", None) == UNIQUE_VIOLATION:
+                raise HTTPException(
+                    status_code=409,
+                    detail=f"Lead with basic_application_id {row.get('basic_application_id')} already exists"
+                )
+            raise
+        if not result.data:
+            raise HTTPException(
+                status_code=500,
+                detail="Failed to save lead data to database"
+            )
+        return result.data[0]
+    
+    def get_lead_row(self, basic_application_id: str) -> Optional[Dict]:
+        """
+        Get the full leads table row for a basic application ID
+        
+        Args:
+            basic_application_id: Basic Application ID from Basic API
+            
+        Returns:
+            Optional[Dict]: Row as returned by the database or None if not found
+        """
+        result = self.client.table("leads").select("*").eq("basic_application_id", basic_application_id).limit(1).execute()
+        return result.data[0] if result.data else None
+    
     def get_lead_by_application_id(self, basic_application_id: str) -> Optional[Dict]:
         """
         Get lead data by basic application ID
@@ -131,13 +275,15 @@ class DatabaseService:
             basic_application_id: Basicpplication ID from Basic API
             
         Returns:
-            Optional[Dict]: Lead data or None if not found
+            Optional[Dict]: STATUS_LOOKUP_COLUMNS of the lead or None if not found
         """
         if not self.client:
             return None
         
         try:
-            result = self.client.table("leads").select("*").eq("basic_application_id", basic_application_id).execute()
+            with trace_upstream("supabase.get_lead_by_application_id") as call:
+                result = self.client.table("leads").select(STATUS_LOOKUP_COLUMNS).eq("basic_application_id", basic_application_id).limit(1).execute()
+                call["status"] = "hit" if result.data else "miss"
             
             if result.data:
                 return result.data[0]
@@ -148,19 +294,31 @@ class DatabaseService:
     
     def get_lead_by_mobile(self, mobile_number: str) -> Optional[Dict]:
         """
-        Get lead data by mobile number
+        Get the latest lead for a mobile number
+        
+        A mobile number can have several leads; the most recently created one
+        is returned. The query is served by idx_leads_mobile_number_created_at.
         
         Args:
             mobile_number: Mobile number
             
         Returns:
-            Optional[Dict]: Lead data or None if not found
+            Optional[Dict]: STATUS_LOOKUP_COLUMNS of the lead or None if not found
         """
         if not self.client:
             return None
         
         try:
-            result = self.client.table("leads").select("*").eq("mobile_number", mobile_number).execute()
+            with trace_upstream("supabase.get_lead_by_mobile") as call:
+                result = (
+                    self.client.table("leads")
+                    .select(STATUS_LOOKUP_COLUMNS)
+                    .eq("mobile_number", mobile_number)
+                    .order("created_at", desc=True)
+                    .limit(1)
+                    .execute()
+                )
+                call["status"] = "hit" if result.data else "miss"
             
             if result.data:
                 return result.data[0]
@@ -170,6 +328,85 @@ class DatabaseService:
             return None
     
     
+    def find_existing_leads(self, pan_numbers: List[str], mobile_numbers: List[str]) -> Tuple[Set[str], Set[str]]:
+        """
+        Find which PAN numbers and mobile numbers already have leads
+        
+        Calls the find_existing_lead_keys function, which returns each existing
+        key once, EXISTING_KEYS_PER_CALL keys per type at a time, so every key is
+        covered however many leads already share it.
+        
+        Args:
+            pan_numbers: PAN numbers to look up
+            mobile_numbers: Mobile numbers to look up
+            
+        Returns:
+            Tuple[Set[str], Set[str]]: Existing PAN numbers and existing mobile numbers
+            
+        Raises:
+            HTTPException: If the database is not configured or the query fails
+        """
+        if not self.client:
+            raise HTTPException(
+                status_code=500,
+                detail="Supabase client not initialized. Check database configuration."
+            )
+        
+        try:
+            existing = {"pan_number": set(), "mobile_number": set()}
+            pans = sorted(set(pan_numbers))
+            mobiles = sorted(set(mobile_numbers))
+            
+            for start in range(0, max(len(pans), len(mobiles)), EXISTING_KEYS_PER_CALL):
+                end = start + EXISTING_KEYS_PER_CALL
+                result = self.client.rpc(
+                    "find_existing_lead_keys",
+                    {"p_pan_numbers": pans[start:end], "p_mobile_numbers": mobiles[start:end]}
+                ).execute()
+                for row in result.data or []:
+                    existing[row["key_type"]].add(row["key_value"])
+            
+            return existing["pan_number"], existing["mobile_number"]
+            
+        except Exception as e:
+            raise HTTPException(
+                status_code=500,
+                detail=f"Database error: {str(e)}"
+            )
+    
+    def upsert_whatsapp_message_events(self, events: List[Dict]) -> int:
+        """
+        Bulk upsert WhatsApp message events into whatsapp_messages
+        
+        Uses the upsert_whatsapp_message_events database function, so the whole
+        batch is written in one statement. Event keys match the table columns;
+        message_id must be unique within the batch.
+        
+        Args:
+            events: Message events keyed by Gupshup message ID
+            
+        Returns:
+            int: Number of rows inserted or updated
+            
+        Raises:
+            HTTPException: If the database is not configured or the write fails
+        """
+        if not self.client:
+            raise HTTPException(
+                status_code=500,
+                detail="Supabase client not initialized. Check database configuration."
+            )
+        
+        try:
+            result = self.client.rpc("upsert_whatsapp_message_events", {"events": events}).execute()
+            return result.data or 0
+            
+        except Exception as e:
+            raise HTTPException(
+                status_code=500,
+                detail=f"Database error: {str(e)}"
+            )
+    
     def update_lead_status(self, basic_application_id: str, status: str) -> bool:
         """
         Update lead status
@@ -191,6 +428,30 @@ class DatabaseService:
         except Exception as e:
             return False
     
+    def get_lead_statistics(self) -> Optional[Dict]:
+        """
+        Get lead statistics from the lead_statistics view
+        
+        The view reads the lead_stats_hourly / lead_stats_totals rollups, which
+        are kept up to date by triggers on the leads table.
+        
+        Returns:
+            Optional[Dict]: Statistics row or None if unavailable
+        """
+        if not self.client:
+            return None
+        
+        try:
+            with trace_upstream("supabase.get_lead_statistics"):
+                result = self.client.table("lead_statistics").select("*").limit(1).execute()
+            
+            if result.data:
+                return result.data[0]
+            return None
+            
+        except Exception as e:
+            return None
+    
     def get_all_leads(self, limit: int = 100) -> List[Dict]:
         """
         Get all leads with pagination
@@ -211,6 +472,25 @@ class DatabaseService:
         except Exception as e:
             return []
 
-
-# Global database service instance
-database_service = DatabaseService() 
\ No newline at end of file
+    
+    def ping(self) -> None:
+        """
+        Run a minimal query against Supabase
+        
+        Raises:
+            RuntimeError: If the client is not configured
+            Exception: If the query fails
+        """
+        if not self.client:
+            raise RuntimeError("Supabase client not initialized")
+        self.client.table("leads").select("id").limit(1).execute()
+    
+    def warm_up(self) -> None:
+        """Open the connection to Supabase ahead of the first request"""
+        if not self.client:
+            return
+        
+        try:
+            self.ping()
+        except Exception as e:
+            print(f"Supabase warm-up failed: {e}")
@@ -0,0 +1,132 @@
+import asyncio
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+
+class HealthMonitor:
+    """
+    Background prober for upstream dependencies
+
+    Each probe runs on a fixed interval in a background task and its last
+    result is cached, so readiness checks only read memory. A probe that
+    times out keeps running, and the dependency is reported down without
+    starting another probe until it returns: a hung client holds at most one
+    thread per dependency, and blocking probes (run_in_thread) use their own
+    threads rather than the default executor shared with request work.
+    """
+
+    def __init__(
+        self,
+        probes: Dict[str, Callable[[], Awaitable[None]]],
+        interval_seconds: float = 15.0,
+        timeout_seconds: float = 5.0,
+        required: Optional[List[str]] = None
+    ):
+        """
+        Args:
+            probes: Dependency name -> coroutine function that raises when unhealthy
+            interval_seconds: Delay between probe rounds
+            timeout_seconds: Per-probe timeout
+            required: Dependencies that must be up for the worker to be ready
+                (defaults to all probed dependencies)
+        """
+        self.probes = probes
+        self.interval_seconds = interval_seconds
+        self.timeout_seconds = timeout_seconds
+        self.required = list(probes) if required is None else [name for name in required if name in probes]
+
+        self._results: Dict[str, Dict] = {
+            name: {"state": "unknown", "latency_ms": None, "checked_at": None, "error": None}
+            for name in probes
+        }
+        self._checked_monotonic: Dict[str, float] = {}
+        self._in_flight: Dict[str, asyncio.Future] = {}
+        self._task: Optional[asyncio.Task] = None
+        self._executor = ThreadPoolExecutor(max_workers=max(1, len(probes)), thread_name_prefix="health-probe")
+
+    def run_in_thread(self, function: Callable[..., Any], *args: Any) -> Awaitable[Any]:
+        """Run a blocking probe function on the monitor's own threads"""
+        return asyncio.get_running_loop().run_in_executor(self._executor, function, *args)
+
+    async def start(self) -> None:
+        """Run one probe round, then keep probing in the background"""
+        await self.probe_all()
+        if self._task is None:
+            self._task = asyncio.get_running_loop().create_task(self._run())
+
+    async def stop(self) -> None:
+        """Stop the background probe task"""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        # Do not wait for probes stuck on an unreachable dependency
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+    async def probe_all(self) -> None:
+        """Probe every dependency concurrently and cache the results"""
+        await asyncio.gather(*(self._probe(name, probe) for name, probe in self.probes.items()))
+
+    def get_results(self) -> Dict[str, Dict]:
+        """
+        Get the cached probe results
+
+        Results older than three probe intervals are reported as stale.
+
+        Returns:
+            Dict[str, Dict]: Dependency name -> state, latency_ms, checked_at, error
+        """
+        now = time.monotonic()
+        results = {}
+        for name, result in self._results.items():
+            result = dict(result)
+            checked = self._checked_monotonic.get(name)
+            if checked is not None and now - checked > 3 * self.interval_seconds:
+                result["state"] = "stale"
+            results[name] = result
+        return results
+
+    def is_ready(self, results: Optional[Dict[str, Dict]] = None) -> bool:
+        """Whether all required dependencies are currently up"""
+        results = results if results is not None else self.get_results()
+        return all(results[name]["state"] == "up" for name in self.required)
+
+    async def _run(self) -> None:
+        while True:
+            await asyncio.sleep(self.interval_seconds)
+            try:
+                await self.probe_all()
+            except Exception as e:
+                print(f"Health probe round failed: {e}")
+
+    async def _probe(self, name: str, probe: Callable[[], Awaitable[None]]) -> None:
+        started = time.perf_counter()
+        previous = self._in_flight.get(name)
+        if previous is not None and not previous.done():
+            state, error = "down", "Previous probe has not returned yet"
+        else:
+            attempt = asyncio.ensure_future(probe())
+            self._in_flight[name] = attempt
+            # Retrieve late failures so they are not logged as never retrieved
+            attempt.add_done_callback(lambda future: future.cancelled() or future.exception())
+            try:
+                # Shielded: a timed-out probe is left to finish instead of being abandoned mid-call
+                await asyncio.wait_for(asyncio.shield(attempt), timeout=self.timeout_seconds)
+                state, error = "up", None
+            except asyncio.TimeoutError:
+                state, error = "down", f"Timed out after {self.timeout_seconds}s"
+            except Exception as e:
+                state, error = "down", str(e)
+
+        self._results[name] = {
+            "state": state,
+            "latency_ms": round((time.perf_counter() - started) * 1000, 2),
+            "checked_at": datetime.now(timezone.utc).isoformat(),
+            "error": error
+        }
+        self._checked_monotonic[name] = time.monotonic()
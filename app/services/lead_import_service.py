@@ -0,0 +1,415 @@
+import asyncio
+import csv
+import fcntl
+import hashlib
+import json
+import os
+import re
+from dataclasses import asdict, dataclass, field
+from datetime import datetime, timezone
+from itertools import islice
+from typing import Callable, Dict, Iterator, List, Optional, Set, Tuple
+from fastapi import HTTPException
+from pydantic import ValidationError
+from app.models.schemas import LeadCreateRequest
+
+NDJSON_SUFFIXES = (".ndjson", ".jsonl")
+JOB_ID_PATTERN = re.compile(r"[A-Za-z0-9_-]{1,64}")
+
+
+def _now() -> str:
+    return datetime.now(timezone.utc).isoformat()
+
+
+def iter_lead_rows(source_path: str) -> Iterator[Tuple[Optional[Dict], Optional[str]]]:
+    """
+    Stream lead rows from a CSV or NDJSON file without loading it into memory
+
+    CSV files need a header row with the LeadCreateRequest field names. Blank
+    values are dropped so optional fields fall back to their defaults.
+
+    Yields:
+        Tuple[Optional[Dict], Optional[str]]: (row, None) or (None, parse error)
+    """
+    with open(source_path, newline="", encoding="utf-8-sig") as source:
+        if source_path.lower().endswith(NDJSON_SUFFIXES):
+            for line in source:
+                if not line.strip():
+                    continue
+                try:
+                    row = json.loads(line)
+                except json.JSONDecodeError as e:
+                    yield None, f"Invalid JSON: {e}"
+                    continue
+                if not isinstance(row, dict):
+                    yield None, "Invalid JSON: expected an object"
+                    continue
+                yield row, None
+        else:
+            for row in csv.DictReader(source):
+                yield {
+                    key.strip(): value.strip()
+                    for key, value in row.items()
+                    if key and value is not None and value.strip()
+                }, None
+
+
+@dataclass
+class LeadImportJob:
+    """Progress of one import, persisted as a checkpoint file after every batch"""
+
+    job_id: str
+    source_path: str
+    checkpoint_path: str
+    errors_path: str
+    status: str = "pending"  # pending, running, completed, failed, interrupted
+    rows_done: int = 0
+    created: int = 0
+    duplicates: int = 0
+    invalid: int = 0
+    failed: int = 0
+    error: Optional[str] = None
+    started_at: Optional[str] = None
+    updated_at: Optional[str] = None
+    # Rows of the current batch sent to the Basic Application API, saved before
+    # they are sent; reconciled instead of sent again when the batch is resumed
+    sending: List[int] = field(default_factory=list)
+
+    def save(self) -> None:
+        """Write the checkpoint atomically"""
+        self.updated_at = _now()
+        temp_path = f"{self.checkpoint_path}.tmp"
+        with open(temp_path, "w", encoding="utf-8") as checkpoint:
+            json.dump(asdict(self), checkpoint)
+        os.replace(temp_path, self.checkpoint_path)
+
+    @classmethod
+    def load(cls, checkpoint_path: str) -> Optional["LeadImportJob"]:
+        """Load a job from its checkpoint, or None if there is none"""
+        if not os.path.exists(checkpoint_path):
+            return None
+        with open(checkpoint_path, encoding="utf-8") as checkpoint:
+            return cls(**json.load(checkpoint))
+
+    def to_dict(self) -> Dict:
+        return asdict(self)
+
+
+@dataclass
+class _RowOutcome:
+    row_number: int
+    outcome: str  # created, duplicate, invalid, failed
+    detail: Optional[str] = None
+    basic_application_id: Optional[str] = None
+
+
+class LeadImportService:
+    """
+    Bulk lead import from CSV / NDJSON files
+
+    Rows are streamed in batches. Each batch is validated with the request
+    schema, de-duplicated by PAN and mobile number (within the file and against
+    the leads table, one lookup per batch), and created through the Basic
+    Application API with bounded concurrency. A checkpoint is written after
+    every batch, so an interrupted import resumes after the last finished batch.
+
+    Rows are created at most once. The rows of a batch are checkpointed before
+    they are sent; when an interrupted batch is resumed, those rows are not sent
+    again: a row whose lead is in the leads table counts as created, and one
+    whose lead is not (it may exist upstream only) is reported as failed.
+
+    A job runs while its process holds an exclusive lock on the job's lock
+    file, so workers (and scripts/import_leads.py) sharing the import directory
+    never run the same job twice. The lock is released when the process exits,
+    so a job left "running" by a crashed worker can be resumed anywhere.
+    """
+
+    def __init__(
+        self,
+        get_database_service: Callable,
+        get_basic_application_service: Callable,
+        import_dir: str,
+        concurrency: int = 8,
+        batch_size: int = 100
+    ):
+        """
+        Args:
+            get_database_service: Returns the DatabaseService (resolved lazily)
+            get_basic_application_service: Returns the BasicApplicationService (resolved lazily)
+            import_dir: Directory for uploaded files, checkpoints and error reports
+            concurrency: Maximum leads being created at the same time
+            batch_size: Rows read, de-duplicated and checkpointed together
+        """
+        self.get_database_service = get_database_service
+        self.get_basic_application_service = get_basic_application_service
+        self.import_dir = import_dir
+        self.concurrency = max(1, concurrency)
+        self.batch_size = max(1, batch_size)
+        self._tasks: Dict[str, asyncio.Task] = {}
+
+    @staticmethod
+    def job_id_for_path(source_path: str) -> str:
+        """Stable job ID for a file path, so re-running an import resumes it"""
+        return hashlib.sha1(os.path.abspath(source_path).encode()).hexdigest()[:16]
+
+    def get_or_create_job(self, source_path: str, job_id: Optional[str] = None) -> LeadImportJob:
+        """
+        Load the job's checkpoint, or create a new job for the file
+
+        Args:
+            source_path: CSV or NDJSON file to import
+            job_id: Job ID (defaults to one derived from the file path)
+
+        Returns:
+            LeadImportJob: Existing or new job
+        """
+        os.makedirs(self.import_dir, exist_ok=True)
+        job_id = job_id or self.job_id_for_path(source_path)
+        job = LeadImportJob.load(self._checkpoint_path(job_id))
+        if job is None:
+            job = LeadImportJob(
+                job_id=job_id,
+                source_path=os.path.abspath(source_path),
+                checkpoint_path=self._checkpoint_path(job_id),
+                errors_path=os.path.join(self.import_dir, f"{job_id}.errors.ndjson")
+            )
+            job.save()
+        return job
+
+    def get_job(self, job_id: str) -> Optional[LeadImportJob]:
+        """Load a job's current progress from its checkpoint"""
+        return LeadImportJob.load(self._checkpoint_path(job_id))
+
+    def is_running(self, job_id: str) -> bool:
+        """Whether the job is running in this process or any other"""
+        task = self._tasks.get(job_id)
+        if task is not None and not task.done():
+            return True
+        lock_fd = self._try_lock(self._checkpoint_path(job_id))
+        if lock_fd is None:
+            return True
+        os.close(lock_fd)
+        return False
+
+    def start(self, job: LeadImportJob) -> None:
+        """Run a job in the background (used by the import API)"""
+        if self.is_running(job.job_id):
+            return
+        task = asyncio.get_running_loop().create_task(self.run(job))
+        self._tasks[job.job_id] = task
+        task.add_done_callback(lambda _: self._tasks.pop(job.job_id, None))
+
+    async def stop(self) -> None:
+        """Interrupt running jobs; they resume from their last checkpoint"""
+        tasks = list(self._tasks.values())
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+    async def run(
+        self,
+        job: LeadImportJob,
+        on_progress: Optional[Callable[[LeadImportJob], None]] = None
+    ) -> LeadImportJob:
+        """
+        Import a file, resuming after the job's last checkpointed row
+
+        Does nothing while another process runs the job.
+
+        Args:
+            job: Job to run
+            on_progress: Called after every checkpoint
+
+        Returns:
+            LeadImportJob: The job with its final status and counts, or its
+                current progress if it is running elsewhere
+        """
+        lock_fd = self._try_lock(job.checkpoint_path)
+        if lock_fd is None:
+            print(f"Import job {job.job_id} is already running in another process")
+            return LeadImportJob.load(job.checkpoint_path) or job
+
+        try:
+            # Another process may have advanced the job since it was loaded
+            job = LeadImportJob.load(job.checkpoint_path) or job
+            return await self._run_locked(job, on_progress)
+        finally:
+            # Closing the descriptor releases the lock
+            os.close(lock_fd)
+
+    async def _run_locked(
+        self,
+        job: LeadImportJob,
+        on_progress: Optional[Callable[[LeadImportJob], None]]
+    ) -> LeadImportJob:
+        if job.status == "completed":
+            return job
+
+        job.status = "running"
+        job.error = None
+        job.started_at = job.started_at or _now()
+        job.save()
+
+        # PAN / mobile numbers accepted earlier in this run
+        seen_pans = set()
+        seen_mobiles = set()
+        # Rows the interrupted run may have created
+        sent_before = set(job.sending)
+
+        try:
+            rows = islice(enumerate(iter_lead_rows(job.source_path), start=1), job.rows_done, None)
+            while True:
+                batch = list(islice(rows, self.batch_size))
+                if not batch:
+                    break
+
+                outcomes = await self._import_batch(job, batch, seen_pans, seen_mobiles, sent_before)
+                self._record(job, outcomes)
+                job.rows_done = batch[-1][0]
+                job.sending = []
+                job.save()
+                if on_progress is not None:
+                    on_progress(job)
+
+            job.status = "completed"
+        except asyncio.CancelledError:
+            job.status = "interrupted"
+            job.save()
+            raise
+        except Exception as e:
+            job.status = "failed"
+            job.error = str(e.detail) if isinstance(e, HTTPException) else str(e)
+
+        job.save()
+        return job
+
+    async def _import_batch(
+        self,
+        job: LeadImportJob,
+        batch: List[Tuple[int, Tuple[Optional[Dict], Optional[str]]]],
+        seen_pans: set,
+        seen_mobiles: set,
+        sent_before: set
+    ) -> List[_RowOutcome]:
+        outcomes: List[_RowOutcome] = []
+        valid: List[Tuple[int, LeadCreateRequest]] = []
+
+        for row_number, (row, parse_error) in batch:
+            if parse_error:
+                outcomes.append(_RowOutcome(row_number, "invalid", parse_error))
+                continue
+            try:
+                valid.append((row_number, LeadCreateRequest(**row)))
+            except ValidationError as e:
+                detail = "; ".join(f"{'.'.join(map(str, err['loc']))}: {err['msg']}" for err in e.errors())
+                outcomes.append(_RowOutcome(row_number, "invalid", detail))
+
+        if not valid:
+            return outcomes
+
+        # One lookup per identifier type for the whole batch
+        existing_pans, existing_mobiles = await asyncio.to_thread(
+            self.get_database_service().find_existing_leads,
+            [lead.pan_number for _, lead in valid],
+            [lead.mobile_number for _, lead in valid]
+        )
+
+        to_create: List[Tuple[int, LeadCreateRequest]] = []
+        for row_number, lead in valid:
+            if row_number in sent_before:
+                seen_pans.add(lead.pan_number)
+                seen_mobiles.add(lead.mobile_number)
+                outcomes.append(self._reconcile(row_number, lead, existing_pans, existing_mobiles))
+            elif lead.pan_number in existing_pans or lead.pan_number in seen_pans:
+                outcomes.append(_RowOutcome(row_number, "duplicate", f"PAN {lead.pan_number} already has a lead"))
+            elif lead.mobile_number in existing_mobiles or lead.mobile_number in seen_mobiles:
+                outcomes.append(_RowOutcome(row_number, "duplicate", f"Mobile {lead.mobile_number} already has a lead"))
+            else:
+                seen_pans.add(lead.pan_number)
+                seen_mobiles.add(lead.mobile_number)
+                to_create.append((row_number, lead))
+
+        # Checkpoint the rows before sending them, so a crash cannot make them be sent twice
+        job.sending = [row_number for row_number, _ in to_create]
+        job.save()
+
+        semaphore = asyncio.Semaphore(self.concurrency)
+
+        async def create(row_number: int, lead: LeadCreateRequest) -> _RowOutcome:
+            async with semaphore:
+                return await self._create_lead(row_number, lead)
+
+        outcomes.extend(await asyncio.gather(*(create(row_number, lead) for row_number, lead in to_create)))
+        return outcomes
+
+    @staticmethod
+    def _reconcile(row_number: int, lead: LeadCreateRequest, existing_pans: Set[str], existing_mobiles: Set[str]) -> _RowOutcome:
+        """Outcome of a row sent by an interrupted run, without sending it again"""
+        # The row was not a duplicate when it was sent, so a stored lead is its own
+        if lead.pan_number in existing_pans or lead.mobile_number in existing_mobiles:
+            return _RowOutcome(row_number, "created", "Created before the import was interrupted")
+        return _RowOutcome(
+            row_number,
+            "failed",
+            "Import was interrupted while this lead was being created; it may exist in the "
+            "Basic Application API without a leads table row and was not sent again"
+        )
+
+    async def _create_lead(self, row_number: int, lead: LeadCreateRequest) -> _RowOutcome:
+        """Create one lead in the Basic Application API and save it to the database"""
+        api_data = lead.model_dump()
+        try:
+            # Both clients are synchronous; run them in worker threads
+            result = await asyncio.to_thread(self.get_basic_application_service().create_lead, api_data)
+            basic_application_id = result.get("result", {}).get("basicAppId")
+            if not basic_application_id:
+                return _RowOutcome(row_number, "failed", "Failed to generate Basic Application ID")
+            await asyncio.to_thread(self.get_database_service().save_lead_data, api_data, result)
+            return _RowOutcome(row_number, "created", basic_application_id=str(basic_application_id))
+        except HTTPException as e:
+            return _RowOutcome(row_number, "failed", str(e.detail))
+        except Exception as e:
+            return _RowOutcome(row_number, "failed", str(e))
+
+    @staticmethod
+    def _record(job: LeadImportJob, outcomes: List[_RowOutcome]) -> None:
+        """Add a batch's outcomes to the job counts and error report"""
+        rejected = []
+        for outcome in outcomes:
+            if outcome.outcome == "created":
+                job.created += 1
+            elif outcome.outcome == "duplicate":
+                job.duplicates += 1
+            elif outcome.outcome == "invalid":
+                job.invalid += 1
+            else:
+                job.failed += 1
+            if outcome.outcome != "created":
+                rejected.append(outcome)
+
+        if rejected:
+            with open(job.errors_path, "a", encoding="utf-8") as errors:
+                for outcome in sorted(rejected, key=lambda o: o.row_number):
+                    errors.write(json.dumps({
+                        "row": outcome.row_number,
+                        "reason": outcome.outcome,
+                        "detail": outcome.detail
+                    }) + "\n")
+
+    @staticmethod
+    def _try_lock(checkpoint_path: str) -> Optional[int]:
+        """Take the job's lock without waiting; None if another process holds it"""
+        # A separate file: checkpoints are replaced on every save
+        lock_fd = os.open(f"{checkpoint_path}.lock", os.O_RDWR | os.O_CREAT, 0o644)
+        try:
+            fcntl.flock(lock_fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            os.close(lock_fd)
+            return None
+        return lock_fd
+
+    def _checkpoint_path(self, job_id: str) -> str:
+        # Job IDs become file names; reject anything that could escape import_dir
+        if not JOB_ID_PATTERN.fullmatch(job_id):
+            raise ValueError(f"Invalid import job ID: {job_id}")
+        return os.path.join(self.import_dir, f"{job_id}.checkpoint.json")
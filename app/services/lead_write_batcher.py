@@ -0,0 +1,227 @@
+import asyncio
+import time
+from typing import Callable, Dict, List, Optional, Tuple
+from fastapi import HTTPException
+
+
+class LeadWriteBatcher:
+    """Write-behind batcher that groups concurrent lead inserts into multi-row inserts"""
+
+    def __init__(
+        self,
+        insert_batch: Callable[[List[Dict]], List[Dict]],
+        insert_one: Callable[[Dict], Dict],
+        get_existing: Optional[Callable[[str], Optional[Dict]]] = None,
+        max_batch_size: int = 50,
+        max_delay_ms: float = 5.0
+    ):
+        """
+        Args:
+            insert_batch: Inserts a list of rows in one request, skipping rows whose
+                basic_application_id already exists, and returns the inserted rows.
+                Raises HTTPException when the database rejects the batch (nothing
+                was written); other errors (e.g. a timeout) leave it unknown
+                whether the batch was committed
+            insert_one: Inserts a single row and returns it, raising a 409
+                HTTPException if its basic_application_id exists; used to
+                isolate failures when a whole batch is rejected
+            get_existing: Returns the stored row for a basic_application_id; used
+                when a row retried after a batch that may have been committed
+                already exists
+            max_batch_size: Flush as soon as this many rows are pending
+            max_delay_ms: Flush at the latest this long after the first pending row
+        """
+        self.insert_batch = insert_batch
+        self.insert_one = insert_one
+        self.get_existing = get_existing
+        self.max_batch_size = max(1, max_batch_size)
+        self.max_delay_ms = max_delay_ms
+
+        self._pending: List[Tuple[Dict, asyncio.Future]] = []
+        self._timer: Optional[asyncio.TimerHandle] = None
+        self._in_flight: set = set()
+
+        self._metrics = {
+            "batches_flushed": 0,
+            "rows_written": 0,
+            "rows_failed": 0,
+            "flushes_by_size": 0,
+            "flushes_by_timer": 0,
+            "flushes_on_close": 0,
+            "fallback_flushes": 0,
+            "total_flush_latency_ms": 0.0,
+            "max_flush_latency_ms": 0.0,
+            "last_flush_latency_ms": 0.0,
+            "max_batch_size_seen": 0
+        }
+
+    async def submit(self, row: Dict) -> Dict:
+        """
+        Queue a row for insertion and wait for its batch to be written
+
+        Args:
+            row: Prepared leads table row
+
+        Returns:
+            Dict: The inserted row as returned by the database
+
+        Raises:
+            HTTPException: 409 if the basic_application_id already exists,
+                500 for other database errors
+        """
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._pending.append((row, future))
+
+        if len(self._pending) >= self.max_batch_size:
+            self._start_flush("flushes_by_size")
+        elif self._timer is None:
+            self._timer = loop.call_later(
+                self.max_delay_ms / 1000,
+                self._start_flush,
+                "flushes_by_timer"
+            )
+
+        return await future
+
+    async def close(self) -> None:
+        """Flush pending rows and wait for in-flight batches to finish"""
+        if self._pending:
+            self._start_flush("flushes_on_close")
+        if self._in_flight:
+            await asyncio.gather(*self._in_flight, return_exceptions=True)
+
+    def get_metrics(self) -> Dict:
+        """
+        Get flush metrics
+
+        Returns:
+            Dict: Counters, flush latencies and the current queue depth
+        """
+        metrics = dict(self._metrics)
+        batches = metrics["batches_flushed"]
+        metrics["avg_batch_size"] = (
+            (metrics["rows_written"] + metrics["rows_failed"]) / batches if batches else 0.0
+        )
+        metrics["avg_flush_latency_ms"] = (
+            metrics["total_flush_latency_ms"] / batches if batches else 0.0
+        )
+        metrics["pending_rows"] = len(self._pending)
+        metrics["in_flight_batches"] = len(self._in_flight)
+        return metrics
+
+    def _start_flush(self, reason: str) -> None:
+        """Take the pending rows and write them in a background task"""
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+
+        batch, self._pending = self._pending, []
+        if not batch:
+            return
+
+        self._metrics[reason] += 1
+        task = asyncio.get_running_loop().create_task(self._flush(batch))
+        self._in_flight.add(task)
+        task.add_done_callback(self._in_flight.discard)
+
+    async def _flush(self, batch: List[Tuple[Dict, asyncio.Future]]) -> None:
+        """Write one batch and resolve each caller's future with its own outcome"""
+        started = time.perf_counter()
+        rows = [row for row, _ in batch]
+
+        fell_back = False
+        try:
+            # The Supabase client is synchronous; keep it off the event loop
+            outcomes, fell_back = await asyncio.to_thread(self._write, rows)
+        except Exception as e:
+            outcomes = [e] * len(rows)
+
+        for (_, future), outcome in zip(batch, outcomes):
+            if future.done():
+                # Caller went away (e.g. request cancelled)
+                continue
+            if isinstance(outcome, Exception):
+                future.set_exception(outcome)
+            else:
+                future.set_result(outcome)
+
+        latency_ms = (time.perf_counter() - started) * 1000
+        failed = sum(1 for outcome in outcomes if isinstance(outcome, Exception))
+        # Metrics are only updated here, on the event loop thread
+        self._metrics["fallback_flushes"] += fell_back
+        self._metrics["batches_flushed"] += 1
+        self._metrics["rows_written"] += len(outcomes) - failed
+        self._metrics["rows_failed"] += failed
+        self._metrics["total_flush_latency_ms"] += latency_ms
+        self._metrics["last_flush_latency_ms"] = latency_ms
+        self._metrics["max_flush_latency_ms"] = max(self._metrics["max_flush_latency_ms"], latency_ms)
+        self._metrics["max_batch_size_seen"] = max(self._metrics["max_batch_size_seen"], len(rows))
+
+    def _write(self, rows: List[Dict]) -> Tuple[List, bool]:
+        """
+        Insert rows, returning the inserted row or an exception for each input row
+
+        Runs in a worker thread.
+
+        Returns:
+            Tuple[List, bool]: Outcomes and whether the batch was retried row by row
+        """
+        outcomes: List = [None] * len(rows)
+
+        # Duplicates within the batch: only the first occurrence is inserted
+        unique_indexes: List[int] = []
+        seen: Dict[str, int] = {}
+        for index, row in enumerate(rows):
+            application_id = row.get("basic_application_id")
+            if application_id in seen:
+                outcomes[index] = self._duplicate_error(application_id)
+            else:
+                seen[application_id] = index
+                unique_indexes.append(index)
+
+        unique_rows = [rows[index] for index in unique_indexes]
+
+        try:
+            inserted = self.insert_batch(unique_rows)
+        except Exception as e:
+            # Retry row by row so only the bad rows fail
+            batch_may_be_committed = not isinstance(e, HTTPException)
+            for index in unique_indexes:
+                outcomes[index] = self._write_one(rows[index], batch_may_be_committed)
+            return outcomes, True
+
+        inserted_by_id = {str(row.get("basic_application_id")): row for row in inserted}
+        for index in unique_indexes:
+            application_id = rows[index].get("basic_application_id")
+            inserted_row = inserted_by_id.get(str(application_id))
+            # Rows skipped by the conflict clause already existed in the table
+            outcomes[index] = inserted_row if inserted_row is not None else self._duplicate_error(application_id)
+
+        return outcomes, False
+
+    def _write_one(self, row: Dict, batch_may_be_committed: bool):
+        """Insert a row from a failed batch, returning the row or an exception"""
+        try:
+            return self.insert_one(row)
+        except HTTPException as e:
+            if e.status_code != 409 or not batch_may_be_committed or self.get_existing is None:
+                return e
+        except Exception as e:
+            return HTTPException(status_code=500, detail=f"Database error: {str(e)}")
+
+        # The failed batch (e.g. a timeout or a dropped response) may have
+        # inserted this row itself, so the conflict is not a duplicate request:
+        # report the stored row as saved.
+        try:
+            existing = self.get_existing(row["basic_application_id"])
+        except Exception as e:
+            return HTTPException(status_code=500, detail=f"Database error: {str(e)}")
+        return existing if existing is not None else self._duplicate_error(row["basic_application_id"])
+
+    @staticmethod
+    def _duplicate_error(basic_application_id: str) -> HTTPException:
+        return HTTPException(
+            status_code=409,
+            detail=f"Lead with basic_application_id {basic_application_id} already exists"
+        )
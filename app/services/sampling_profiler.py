@@ -0,0 +1,366 @@
+import asyncio
+import math
+import os
+import sys
+import threading
+import time
+from collections import Counter, defaultdict
+from datetime import datetime, timezone
+from typing import Dict, List, Optional, Set, Tuple
+from fastapi import HTTPException
+
+MAX_STACK_DEPTH = 128
+
+# Event loop heartbeat; a late heartbeat means a callback blocked the loop
+WATCHDOG_INTERVAL_SECONDS = 0.02
+
+# Stalls reported individually (the longest ones)
+MAX_REPORTED_STALLS = 50
+
+# Innermost frames of threads that are waiting, not running Python code
+IDLE_FRAMES = {
+    ("selectors.py", "select"),
+    ("threading.py", "wait"),
+    ("thread.py", "_worker"),
+    ("queue.py", "get")
+}
+
+PROJECT_ROOT = os.getcwd() + os.sep
+
+# Stack: frame labels from the outermost frame to the innermost
+Stack = Tuple[str, ...]
+
+
+class _ProfileSession:
+    """Samples and loop stalls collected during one profile run"""
+
+    def __init__(self, loop: asyncio.AbstractEventLoop, interval_seconds: float, routes: Optional[Set[str]], stall_threshold_ms: float):
+        self.loop = loop
+        self.loop_thread_id = threading.get_ident()
+        self.interval_seconds = interval_seconds
+        self.routes = routes
+        self.stall_threshold_ms = stall_threshold_ms
+
+        # (thread name, stack) -> sample count
+        self.stacks: Counter = Counter()
+        self.samples = 0
+        self.idle_samples = 0
+
+        # Heartbeat state, written on the loop thread and read by the sampler
+        self.last_tick = time.perf_counter()
+        self.expected_tick = self.last_tick + WATCHDOG_INTERVAL_SECONDS
+        self.lags_ms: List[float] = []
+        self.stalls: List[Dict] = []
+        # last_tick before a stall -> loop thread stacks sampled while it lasted
+        self.stall_stacks: Dict[float, Counter] = defaultdict(Counter)
+        self.stall_routes: Dict[float, Optional[str]] = {}
+
+        self.stop_event = threading.Event()
+        self.stopped = asyncio.Event()
+        self.timer: Optional[asyncio.TimerHandle] = None
+
+
+class SamplingProfiler:
+    """
+    On-demand statistical profiler for the running worker
+
+    A background thread samples the Python stacks of the worker's threads at a
+    fixed interval while a profile runs, and a heartbeat on the event loop
+    measures how late it runs to detect stalls. Stacks sampled during a stall
+    show which callback blocked the loop. Nothing runs between profiles, so it
+    is safe to keep enabled in production.
+
+    With a route filter, only event loop samples taken while a request for one
+    of the routes is running are kept (requests are tracked by ProfilerMiddleware).
+    Work in worker threads cannot be attributed to a request, so it is only
+    included in unfiltered profiles.
+    """
+
+    def __init__(self, max_seconds: float = 60.0, stall_threshold_ms: float = 100.0):
+        """
+        Args:
+            max_seconds: Longest allowed profile
+            stall_threshold_ms: Event loop delay reported as a stall
+        """
+        self.max_seconds = max_seconds
+        self.stall_threshold_ms = stall_threshold_ms
+        self._session: Optional[_ProfileSession] = None
+        # Request task -> ASGI scope, only filled while a profile runs
+        self._requests: Dict[asyncio.Task, Dict] = {}
+        # Caches keyed by code object, only used by the sampler thread and
+        # cleared after each profile so they do not keep code objects alive
+        self._labels: Dict[object, str] = {}
+        self._idle_codes: Dict[object, bool] = {}
+
+    @property
+    def active(self) -> bool:
+        return self._session is not None
+
+    def track_request(self, task: asyncio.Task, scope: Dict) -> None:
+        self._requests[task] = scope
+
+    def untrack_request(self, task: asyncio.Task) -> None:
+        self._requests.pop(task, None)
+
+    async def profile(self, seconds: float, interval_ms: float, routes: Optional[Set[str]] = None, output: str = "speedscope") -> Dict:
+        """
+        Profile the worker for a number of seconds
+
+        Args:
+            seconds: Profile duration (capped at max_seconds)
+            interval_ms: Delay between stack samples
+            routes: Only profile requests for these route templates (None for everything)
+            output: "speedscope" (speedscope.app JSON) or "collapsed" (flame graph text)
+
+        Returns:
+            Dict: Profile, sample counts and event loop stall report
+
+        Raises:
+            HTTPException: 409 if a profile is already running on this worker
+        """
+        if self._session is not None:
+            raise HTTPException(status_code=409, detail="A profile is already running on this worker")
+
+        seconds = min(max(seconds, 0.1), self.max_seconds)
+        session = _ProfileSession(asyncio.get_running_loop(), max(interval_ms, 1.0) / 1000, routes, self.stall_threshold_ms)
+        self._session = session
+        self._requests.clear()
+
+        sampler = threading.Thread(target=self._sample, args=(session,), name="sampling-profiler", daemon=True)
+        started_at = datetime.now(timezone.utc)
+        started = time.perf_counter()
+        session.timer = session.loop.call_later(WATCHDOG_INTERVAL_SECONDS, self._tick, session)
+        sampler.start()
+        try:
+            await asyncio.wait_for(session.stopped.wait(), timeout=seconds)
+        except asyncio.TimeoutError:
+            pass
+        finally:
+            session.stop_event.set()
+            session.timer.cancel()
+            # The sampler wakes up within one interval
+            await asyncio.to_thread(sampler.join)
+            self._session = None
+            self._requests.clear()
+            self._labels.clear()
+            self._idle_codes.clear()
+
+        return {
+            "pid": os.getpid(),
+            "started_at": started_at.isoformat(),
+            "duration_seconds": round(time.perf_counter() - started, 3),
+            "interval_ms": session.interval_seconds * 1000,
+            "routes": sorted(routes) if routes else None,
+            "samples": session.samples,
+            "idle_samples": session.idle_samples,
+            "format": output,
+            "profile": self._collapsed(session) if output == "collapsed" else self._speedscope(session, started_at),
+            "event_loop": self._loop_report(session)
+        }
+
+    def stop(self) -> None:
+        """End a running profile early (on shutdown); it still returns what was collected"""
+        if self._session is not None:
+            self._session.stopped.set()
+
+    def _tick(self, session: _ProfileSession) -> None:
+        """Event loop heartbeat"""
+        now = time.perf_counter()
+        lag_ms = max(0.0, (now - session.expected_tick) * 1000)
+        session.lags_ms.append(lag_ms)
+        if lag_ms >= session.stall_threshold_ms:
+            session.stalls.append({
+                "key": session.last_tick,
+                "at": datetime.now(timezone.utc).isoformat(),
+                "duration_ms": round(lag_ms, 1)
+            })
+        else:
+            session.stall_stacks.pop(session.last_tick, None)
+            session.stall_routes.pop(session.last_tick, None)
+
+        session.last_tick = now
+        session.expected_tick = now + WATCHDOG_INTERVAL_SECONDS
+        if not session.stop_event.is_set():
+            session.timer = session.loop.call_later(WATCHDOG_INTERVAL_SECONDS, self._tick, session)
+
+    def _sample(self, session: _ProfileSession) -> None:
+        """Sampler thread"""
+        own_id = threading.get_ident()
+        thread_names: Dict[int, str] = {}
+        while not session.stop_event.wait(session.interval_seconds):
+            if len(thread_names) != threading.active_count():
+                thread_names = {thread.ident: thread.name for thread in threading.enumerate()}
+
+            for thread_id, frame in sys._current_frames().items():
+                if thread_id == own_id:
+                    continue
+                on_loop = thread_id == session.loop_thread_id
+                if session.routes is not None and not on_loop:
+                    continue
+
+                route = None
+                if on_loop:
+                    route = self._current_route(session.loop)
+                    if session.routes is not None and route not in session.routes:
+                        continue
+
+                if self._is_idle(frame.f_code):
+                    session.idle_samples += 1
+                    continue
+                stack = self._stack(frame)
+
+                session.samples += 1
+                thread_name = "event-loop" if on_loop else thread_names.get(thread_id, f"thread-{thread_id}")
+                session.stacks[(thread_name, stack)] += 1
+
+                # Loop thread is running past its heartbeat: part of a (possible) stall
+                if on_loop and time.perf_counter() - session.expected_tick > session.interval_seconds:
+                    key = session.last_tick
+                    session.stall_stacks[key][stack] += 1
+                    session.stall_routes.setdefault(key, route)
+
+    def _current_route(self, loop: asyncio.AbstractEventLoop) -> Optional[str]:
+        task = asyncio.current_task(loop)
+        scope = self._requests.get(task) if task is not None else None
+        if scope is None:
+            return None
+        route = scope.get("route")
+        return getattr(route, "path", None)
+
+    def _stack(self, frame) -> Stack:
+        labels = []
+        while frame is not None and len(labels) < MAX_STACK_DEPTH:
+            labels.append(self._label(frame.f_code))
+            frame = frame.f_back
+        labels.reverse()
+        return tuple(labels)
+
+    def _label(self, code) -> str:
+        label = self._labels.get(code)
+        if label is None:
+            label = f"{code.co_name} ({_short_path(code.co_filename)}:{code.co_firstlineno})"
+            self._labels[code] = label
+        return label
+
+    def _is_idle(self, code) -> bool:
+        idle = self._idle_codes.get(code)
+        if idle is None:
+            idle = (os.path.basename(code.co_filename), code.co_name) in IDLE_FRAMES
+            self._idle_codes[code] = idle
+        return idle
+
+    @staticmethod
+    def _collapsed(session: _ProfileSession) -> str:
+        """Brendan Gregg's collapsed stack format, one "frame;frame;frame count" line per stack"""
+        return "\n".join(
+            f"{';'.join((thread_name,) + stack)} {count}"
+            for (thread_name, stack), count in session.stacks.most_common()
+        )
+
+    @staticmethod
+    def _speedscope(session: _ProfileSession, started_at: datetime) -> Dict:
+        """speedscope.app file with one sampled profile per thread"""
+        frame_index: Dict[str, int] = {}
+        frames: List[Dict] = []
+        by_thread: Dict[str, List[Tuple[List[int], int]]] = defaultdict(list)
+
+        for (thread_name, stack), count in session.stacks.items():
+            indexes = []
+            for label in stack:
+                if label not in frame_index:
+                    frame_index[label] = len(frames)
+                    name, _, location = label.rpartition(" (")
+                    file, _, line = location.rstrip(")").rpartition(":")
+                    frames.append({"name": name, "file": file, "line": int(line)})
+                indexes.append(frame_index[label])
+            by_thread[thread_name].append((indexes, count))
+
+        interval_ms = session.interval_seconds * 1000
+        profiles = []
+        for thread_name, stacks in sorted(by_thread.items(), key=lambda item: item[0] != "event-loop"):
+            total = sum(count for _, count in stacks) * interval_ms
+            profiles.append({
+                "type": "sampled",
+                "name": thread_name,
+                "unit": "milliseconds",
+                "startValue": 0,
+                "endValue": total,
+                "samples": [indexes for indexes, _ in stacks],
+                "weights": [count * interval_ms for _, count in stacks]
+            })
+
+        return {
+            "$schema": "https://www.speedscope.app/file-format-schema.json",
+            "name": f"Worker {os.getpid()} at {started_at.isoformat()}",
+            "exporter": "HOM-i Lead API sampling profiler",
+            "activeProfileIndex": 0,
+            "shared": {"frames": frames},
+            "profiles": profiles
+        }
+
+    @staticmethod
+    def _loop_report(session: _ProfileSession) -> Dict:
+        """Event loop lag, the longest stalls and the callbacks that caused them"""
+        stalls = []
+        slow_callbacks: Dict[Tuple[Optional[str], str], Dict] = {}
+        for stall in session.stalls:
+            stacks = session.stall_stacks.get(stall["key"])
+            stack = stacks.most_common(1)[0][0] if stacks else None
+            route = session.stall_routes.get(stall["key"])
+            location = _callback_location(stack) if stack else "unknown (not sampled)"
+            stalls.append({
+                "at": stall["at"],
+                "duration_ms": stall["duration_ms"],
+                "route": route,
+                "location": location,
+                "stack": ";".join(stack) if stack else None
+            })
+
+            callback = slow_callbacks.setdefault((route, location), {
+                "location": location,
+                "route": route,
+                "count": 0,
+                "total_ms": 0.0,
+                "max_ms": 0.0
+            })
+            callback["count"] += 1
+            callback["total_ms"] = round(callback["total_ms"] + stall["duration_ms"], 1)
+            callback["max_ms"] = max(callback["max_ms"], stall["duration_ms"])
+
+        lags = sorted(session.lags_ms)
+        return {
+            "stall_threshold_ms": session.stall_threshold_ms,
+            "lag_ms": {
+                "p50": _percentile(lags, 50),
+                "p99": _percentile(lags, 99),
+                "max": round(lags[-1], 1) if lags else None
+            },
+            "stall_count": len(stalls),
+            "stalled_ms": round(sum(stall["duration_ms"] for stall in stalls), 1),
+            "stalls": sorted(stalls, key=lambda stall: stall["duration_ms"], reverse=True)[:MAX_REPORTED_STALLS],
+            "slow_callbacks": sorted(slow_callbacks.values(), key=lambda callback: callback["total_ms"], reverse=True)
+        }
+
+
+def _short_path(filename: str) -> str:
+    if filename.startswith(PROJECT_ROOT):
+        return filename[len(PROJECT_ROOT):]
+    marker = "site-packages" + os.sep
+    if marker in filename:
+        return filename.split(marker, 1)[1]
+    return os.path.basename(filename)
+
+
+def _callback_location(stack: Stack) -> str:
+    """Innermost project frame of a stack, or its innermost frame"""
+    for label in reversed(stack):
+        if " (app/" in label:
+            return label
+    return stack[-1]
+
+
+def _percentile(ordered: List[float], q: float) -> Optional[float]:
+    if not ordered:
+        return None
+    index = min(len(ordered) - 1, max(0, math.ceil(q / 100 * len(ordered)) - 1))
+    return round(ordered[index], 1)
@@ -0,0 +1,424 @@
+import fcntl
+import hashlib
+import mmap
+import os
+import struct
+import threading
+import time
+from typing import Any, Dict, Optional, Tuple, Union
+import orjson
+from app.utils.cache import TTLCache
+
+KEY_PREFIX = "lead-api:"
+
+# Token bucket in Redis: KEYS[1] = bucket, ARGV = rate, capacity, tokens, now
+TOKEN_BUCKET_SCRIPT = """
+local bucket = redis.call('HMGET', KEYS[1], 'tokens', 'updated')
+local rate, capacity, wanted, now = tonumber(ARGV[1]), tonumber(ARGV[2]), tonumber(ARGV[3]), tonumber(ARGV[4])
+local tokens = tonumber(bucket[1]) or capacity
+local updated = tonumber(bucket[2]) or now
+tokens = math.min(capacity, tokens + math.max(0, now - updated) * rate)
+local allowed = 0
+if tokens >= wanted then
+    tokens = tokens - wanted
+    allowed = 1
+end
+redis.call('HSET', KEYS[1], 'tokens', tokens, 'updated', now)
+redis.call('EXPIRE', KEYS[1], math.ceil(capacity / rate) + 1)
+return allowed
+"""
+
+
+def _refill(tokens: float, updated: float, now: float, rate_per_second: float, capacity: float) -> float:
+    return min(capacity, tokens + max(0.0, now - updated) * rate_per_second)
+
+
+class LocalSharedState:
+    """
+    Shared state for a single worker process
+
+    Same interface as MmapSharedState and RedisSharedState:
+    - get / set / delete: JSON-serializable values with an optional time to live
+    - incr / counters: integer counters
+    - take_token: token bucket rate limiting
+    - items: values under a key prefix (e.g. per-worker metric snapshots)
+    """
+
+    def __init__(self, max_entries: int = 4096):
+        self._values = TTLCache(ttl_seconds=float("inf"), max_entries=max_entries)
+        self._counters: Dict[str, int] = {}
+        self._buckets: Dict[str, Tuple[float, float]] = {}
+        self._lock = threading.Lock()
+
+    async def get(self, key: str) -> Optional[Any]:
+        return self._values.get(key)
+
+    async def set(self, key: str, value: Any, ttl_seconds: Optional[float] = None) -> None:
+        self._values.set(key, value, ttl_seconds=ttl_seconds)
+
+    async def delete(self, key: str) -> None:
+        self._values.invalidate(key)
+
+    async def items(self, prefix: str) -> Dict[str, Any]:
+        return {
+            key: value for key, value in self._values.items()
+            if isinstance(key, str) and key.startswith(prefix)
+        }
+
+    async def incr(self, key: str, amount: int = 1) -> int:
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + amount
+            return self._counters[key]
+
+    async def counters(self, prefix: str) -> Dict[str, int]:
+        with self._lock:
+            return {key: value for key, value in self._counters.items() if key.startswith(prefix)}
+
+    async def take_token(self, key: str, rate_per_second: float, capacity: float, tokens: float = 1) -> bool:
+        with self._lock:
+            now = time.time()
+            available, updated = self._buckets.get(key, (capacity, now))
+            available = _refill(available, updated, now, rate_per_second, capacity)
+            allowed = available >= tokens
+            self._buckets[key] = (available - tokens if allowed else available, now)
+            return allowed
+
+    async def close(self) -> None:
+        pass
+
+
+class MmapSharedState:
+    """
+    Shared state for all worker processes on one host, in a memory-mapped file
+
+    The file is a fixed-size open-addressing hash table: every slot holds one
+    key with a counter, a token bucket or a JSON value. Operations take an
+    exclusive flock on the file and only touch a few slots, so they cost
+    microseconds and can run on the event loop. Values larger than a slot
+    are not stored (set() returns without caching), and new keys are dropped
+    once the table is full.
+    """
+
+    MAGIC = b"LEADSTv1"
+    # magic, slots, slot_bytes
+    HEADER = struct.Struct("<8sII")
+    # state, kind, key_len, value_len, expires_at, key_hash
+    SLOT_HEADER = struct.Struct("<BBHIdQ")
+    KEY_BYTES = 104
+    VALUE_OFFSET = SLOT_HEADER.size + KEY_BYTES
+
+    EMPTY, USED, DELETED = 0, 1, 2
+    VALUE, COUNTER, BUCKET = 1, 2, 3
+    # Deleted or expired slots a probe may pass before the table is rehashed
+    MAX_DEAD_PROBES = 8
+
+    def __init__(self, path: str, slots: int = 4096, slot_bytes: int = 4096, reset: bool = False):
+        """
+        Args:
+            path: Table file, ideally on tmpfs (/dev/shm); created when missing
+            slots: Number of keys the table can hold
+            slot_bytes: Size of a slot, including its 128-byte header and key
+            reset: Clear the table (done once by the supervisor at startup)
+        """
+        self.path = path
+        self._lock = threading.Lock()
+        self._fd = os.open(path, os.O_RDWR | os.O_CREAT, 0o600)
+
+        fcntl.flock(self._fd, fcntl.LOCK_EX)
+        try:
+            header = os.pread(self._fd, self.HEADER.size, 0)
+            if reset or len(header) < self.HEADER.size or header[:8] != self.MAGIC:
+                size = self.HEADER.size + slots * slot_bytes
+                os.ftruncate(self._fd, 0)
+                os.ftruncate(self._fd, size)
+                os.pwrite(self._fd, self.HEADER.pack(self.MAGIC, slots, slot_bytes), 0)
+            else:
+                # Attach to an existing table with its own geometry
+                _, slots, slot_bytes = self.HEADER.unpack(header)
+        finally:
+            fcntl.flock(self._fd, fcntl.LOCK_UN)
+
+        self.slots = slots
+        self.slot_bytes = slot_bytes
+        self.max_value_bytes = slot_bytes - self.VALUE_OFFSET
+        self._map = mmap.mmap(self._fd, self.HEADER.size + slots * slot_bytes)
+
+    async def get(self, key: str) -> Optional[Any]:
+        with self._locked():
+            slot, found = self._find(key)
+            if not found:
+                return None
+            _, kind, _, value_len, _, _ = self._slot_header(slot)
+            if kind != self.VALUE:
+                return None
+            start = self._value_offset(slot)
+            return orjson.loads(self._map[start:start + value_len])
+
+    async def set(self, key: str, value: Any, ttl_seconds: Optional[float] = None) -> None:
+        data = orjson.dumps(value)
+        if len(data) > self.max_value_bytes:
+            return
+        expires_at = time.time() + ttl_seconds if ttl_seconds else 0.0
+        with self._locked():
+            slot, _ = self._find(key, create=True)
+            if slot is not None:
+                self._write(slot, key, self.VALUE, data, expires_at)
+
+    async def delete(self, key: str) -> None:
+        with self._locked():
+            slot, found = self._find(key)
+            if found:
+                self._release(slot)
+
+    async def items(self, prefix: str) -> Dict[str, Any]:
+        result = {}
+        with self._locked():
+            for slot, key, kind, value_len in self._scan(prefix):
+                if kind == self.VALUE:
+                    start = self._value_offset(slot)
+                    result[key] = orjson.loads(self._map[start:start + value_len])
+        return result
+
+    async def incr(self, key: str, amount: int = 1) -> int:
+        with self._locked():
+            slot, found = self._find(key, create=True)
+            if slot is None:
+                return 0
+            _, kind, _, _, _, _ = self._slot_header(slot)
+            current = struct.unpack_from("<q", self._map, self._value_offset(slot))[0] if found and kind == self.COUNTER else 0
+            value = current + amount
+            self._write(slot, key, self.COUNTER, struct.pack("<q", value), 0.0)
+            return value
+
+    async def counters(self, prefix: str) -> Dict[str, int]:
+        result = {}
+        with self._locked():
+            for slot, key, kind, _ in self._scan(prefix):
+                if kind == self.COUNTER:
+                    result[key] = struct.unpack_from("<q", self._map, self._value_offset(slot))[0]
+        return result
+
+    async def take_token(self, key: str, rate_per_second: float, capacity: float, tokens: float = 1) -> bool:
+        with self._locked():
+            slot, found = self._find(key, create=True)
+            if slot is None:
+                # Table full: fail open rather than rejecting traffic
+                return True
+            now = time.time()
+            _, kind, _, _, _, _ = self._slot_header(slot)
+            if found and kind == self.BUCKET:
+                available, updated = struct.unpack_from("<dd", self._map, self._value_offset(slot))
+            else:
+                available, updated = capacity, now
+            available = _refill(available, updated, now, rate_per_second, capacity)
+            allowed = available >= tokens
+            if allowed:
+                available -= tokens
+            # An idle bucket is full again after capacity / rate seconds
+            expires_at = now + capacity / rate_per_second + 1
+            self._write(slot, key, self.BUCKET, struct.pack("<dd", available, now), expires_at)
+            return allowed
+
+    async def close(self) -> None:
+        self._map.close()
+        os.close(self._fd)
+
+    def _locked(self):
+        return _FileLock(self._lock, self._fd)
+
+    def _slot_offset(self, slot: int) -> int:
+        return self.HEADER.size + slot * self.slot_bytes
+
+    def _value_offset(self, slot: int) -> int:
+        return self._slot_offset(slot) + self.VALUE_OFFSET
+
+    def _slot_header(self, slot: int) -> Tuple[int, int, int, int, float, int]:
+        return self.SLOT_HEADER.unpack_from(self._map, self._slot_offset(slot))
+
+    def _slot_key(self, slot: int, key_len: int) -> bytes:
+        start = self._slot_offset(slot) + self.SLOT_HEADER.size
+        return self._map[start:start + key_len]
+
+    def _find(self, key: str, create: bool = False) -> Tuple[Optional[int], bool]:
+        """
+        Find the slot of a key; expired entries count as free
+
+        Deleted and expired slots right before the empty slot that ends a probe
+        are emptied on the way, and a probe that passes MAX_DEAD_PROBES of them
+        rehashes the table, so lookups do not slow down as keys of recycled
+        workers pile up.
+
+        Returns:
+            Tuple[Optional[int], bool]: (slot, True) when the key exists; with create,
+                (free slot, False) when it does not; (None, False) otherwise
+        """
+        encoded = key.encode()
+        if len(encoded) > self.KEY_BYTES:
+            raise ValueError(f"Shared state key longer than {self.KEY_BYTES} bytes: {key}")
+        key_hash = int.from_bytes(hashlib.blake2b(encoded, digest_size=8).digest(), "little")
+
+        now = time.time()
+        free = None
+        dead = 0
+        for probe in range(self.slots):
+            slot = (key_hash + probe) % self.slots
+            state, _, key_len, _, expires_at, slot_hash = self._slot_header(slot)
+            if state == self.EMPTY:
+                self._empty_before(slot, now)
+                return (free if free is not None else slot, False) if create else (None, False)
+            if state == self.USED and slot_hash == key_hash and self._slot_key(slot, key_len) == encoded:
+                if expires_at and expires_at <= now:
+                    if create:
+                        return slot, False
+                    self._release(slot)
+                    return None, False
+                return slot, True
+            if state == self.DELETED or (expires_at and expires_at <= now):
+                dead += 1
+                if dead >= self.MAX_DEAD_PROBES:
+                    self._rehash(now)
+                    return self._find(key, create)
+                if free is None and create:
+                    free = slot
+        # Table full
+        return free, False
+
+    def _release(self, slot: int) -> None:
+        """Free a slot; it can only become empty when no probe continues past it"""
+        self._map[self._slot_offset(slot)] = self.DELETED
+        following = (slot + 1) % self.slots
+        if self._slot_header(following)[0] == self.EMPTY:
+            self._empty_before(following, time.time())
+
+    def _empty_before(self, slot: int, now: float) -> None:
+        """
+        Empty the deleted and expired slots before an empty slot
+
+        A probe that reaches one of them would stop at the empty slot anyway,
+        so no key can live further along.
+        """
+        for _ in range(self.slots - 1):
+            slot = (slot - 1) % self.slots
+            state, _, _, _, expires_at, _ = self._slot_header(slot)
+            if not (state == self.DELETED or (state == self.USED and expires_at and expires_at <= now)):
+                return
+            self._map[self._slot_offset(slot)] = self.EMPTY
+
+    def _rehash(self, now: float) -> None:
+        """Rebuild the table in place with only the live keys"""
+        live = []
+        for slot in range(self.slots):
+            state, _, _, value_len, expires_at, key_hash = self._slot_header(slot)
+            offset = self._slot_offset(slot)
+            if state == self.USED and not (expires_at and expires_at <= now):
+                live.append((key_hash, self._map[offset:offset + self.VALUE_OFFSET + value_len]))
+            self._map[offset] = self.EMPTY
+
+        for key_hash, data in live:
+            slot = key_hash % self.slots
+            while self._map[self._slot_offset(slot)] != self.EMPTY:
+                slot = (slot + 1) % self.slots
+            offset = self._slot_offset(slot)
+            self._map[offset:offset + len(data)] = data
+
+    def _write(self, slot: int, key: str, kind: int, data: bytes, expires_at: float) -> None:
+        encoded = key.encode()
+        key_hash = int.from_bytes(hashlib.blake2b(encoded, digest_size=8).digest(), "little")
+        offset = self._slot_offset(slot)
+        start = offset + self.VALUE_OFFSET
+        self._map[start:start + len(data)] = data
+        self._map[offset + self.SLOT_HEADER.size:offset + self.SLOT_HEADER.size + len(encoded)] = encoded
+        self.SLOT_HEADER.pack_into(self._map, offset, self.USED, kind, len(encoded), len(data), expires_at, key_hash)
+
+    def _scan(self, prefix: str):
+        now = time.time()
+        encoded_prefix = prefix.encode()
+        for slot in range(self.slots):
+            state, kind, key_len, value_len, expires_at, _ = self._slot_header(slot)
+            if state != self.USED or (expires_at and expires_at <= now):
+                continue
+            key = self._slot_key(slot, key_len)
+            if key.startswith(encoded_prefix):
+                yield slot, key.decode(), kind, value_len
+
+
+class _FileLock:
+    """Thread lock plus exclusive flock: flock alone does not exclude threads sharing the descriptor"""
+
+    def __init__(self, lock: threading.Lock, fd: int):
+        self._thread_lock = lock
+        self._fd = fd
+
+    def __enter__(self):
+        self._thread_lock.acquire()
+        fcntl.flock(self._fd, fcntl.LOCK_EX)
+
+    def __exit__(self, *exc_info):
+        fcntl.flock(self._fd, fcntl.LOCK_UN)
+        self._thread_lock.release()
+
+
+class RedisSharedState:
+    """
+    Shared state for workers on any number of hosts, in Redis (or a Redis-compatible server)
+
+    Requires the optional `redis` package.
+    """
+
+    def __init__(self, redis_url: str, namespace: str = KEY_PREFIX):
+        # Imported lazily: redis is only needed for this backend
+        import redis.asyncio as redis
+
+        self._redis = redis.from_url(redis_url)
+        self._namespace = namespace
+        self._take_token = self._redis.register_script(TOKEN_BUCKET_SCRIPT)
+
+    async def get(self, key: str) -> Optional[Any]:
+        data = await self._redis.get(self._namespace + key)
+        return orjson.loads(data) if data is not None else None
+
+    async def set(self, key: str, value: Any, ttl_seconds: Optional[float] = None) -> None:
+        px = int(ttl_seconds * 1000) if ttl_seconds else None
+        await self._redis.set(self._namespace + key, orjson.dumps(value), px=px)
+
+    async def delete(self, key: str) -> None:
+        await self._redis.delete(self._namespace + key)
+
+    async def items(self, prefix: str) -> Dict[str, Any]:
+        keys = [key async for key in self._redis.scan_iter(match=f"{self._namespace}{prefix}*")]
+        if not keys:
+            return {}
+        values = await self._redis.mget(keys)
+        return {
+            key.decode()[len(self._namespace):]: orjson.loads(value)
+            for key, value in zip(keys, values)
+            if value is not None
+        }
+
+    async def incr(self, key: str, amount: int = 1) -> int:
+        return await self._redis.incrby(self._namespace + key, amount)
+
+    async def counters(self, prefix: str) -> Dict[str, int]:
+        keys = [key async for key in self._redis.scan_iter(match=f"{self._namespace}{prefix}*")]
+        if not keys:
+            return {}
+        values = await self._redis.mget(keys)
+        return {
+            key.decode()[len(self._namespace):]: int(value)
+            for key, value in zip(keys, values)
+            if value is not None
+        }
+
+    async def take_token(self, key: str, rate_per_second: float, capacity: float, tokens: float = 1) -> bool:
+        allowed = await self._take_token(
+            keys=[self._namespace + key],
+            args=[rate_per_second, capacity, tokens, time.time()]
+        )
+        return bool(allowed)
+
+    async def close(self) -> None:
+        await self._redis.aclose()
+
+
+# Any of the backends above; they share the same async interface
+SharedState = Union[LocalSharedState, MmapSharedState, RedisSharedState]
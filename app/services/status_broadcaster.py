@@ -0,0 +1,361 @@
+import asyncio
+import json
+import os
+import uuid
+from datetime import datetime, timezone
+from typing import Callable, Dict, Optional, Set
+from fastapi import HTTPException
+
+STATUS_CHANNEL_PREFIX = "lead-status:"
+STATUS_NOT_FOUND_MESSAGE = "We couldn’t find your details. You can track your application manually at: https://www.basichomeloan.com/track-your-application"
+
+MessageHandler = Callable[[str, Dict], None]
+
+
+class InMemoryStatusBus:
+    """Status pub/sub bus for a single worker process"""
+
+    def __init__(self):
+        self._on_message: Optional[MessageHandler] = None
+        self._last: Dict[str, Dict] = {}
+
+    async def start(self, on_message: MessageHandler) -> None:
+        self._on_message = on_message
+
+    async def stop(self) -> None:
+        self._on_message = None
+
+    async def publish(self, basic_application_id: str, message: Dict) -> None:
+        self._last[basic_application_id] = message
+        if self._on_message is not None:
+            self._on_message(basic_application_id, message)
+
+    async def get_last(self, basic_application_id: str) -> Optional[Dict]:
+        return self._last.get(basic_application_id)
+
+    async def forget(self, basic_application_id: str) -> None:
+        self._last.pop(basic_application_id, None)
+
+    async def acquire_poller(self, basic_application_id: str, ttl_seconds: float) -> bool:
+        # Only one poller per application exists in a single process
+        return True
+
+    async def release_poller(self, basic_application_id: str) -> None:
+        pass
+
+
+class RedisStatusBus:
+    """
+    Status pub/sub bus shared by all workers through Redis
+
+    Status changes are published on a channel per application and the latest
+    message is kept under a key, so subscribers on any worker receive them. A
+    short-lived lock per application makes one worker the poller.
+    Requires the optional `redis` package.
+    """
+
+    def __init__(self, redis_url: str, last_message_ttl_seconds: int = 3600):
+        # Imported lazily: redis is only needed for multi-worker deployments
+        import redis.asyncio as redis
+
+        self._redis = redis.from_url(redis_url, decode_responses=True)
+        self._last_message_ttl_seconds = last_message_ttl_seconds
+        self._worker_id = f"{os.getpid()}-{uuid.uuid4().hex[:8]}"
+        self._pubsub = None
+        self._listener: Optional[asyncio.Task] = None
+
+    async def start(self, on_message: MessageHandler) -> None:
+        self._pubsub = self._redis.pubsub()
+        await self._pubsub.psubscribe(f"{STATUS_CHANNEL_PREFIX}*")
+        self._listener = asyncio.get_running_loop().create_task(self._listen(on_message))
+
+    async def stop(self) -> None:
+        if self._listener is not None:
+            self._listener.cancel()
+            try:
+                await self._listener
+            except asyncio.CancelledError:
+                pass
+            self._listener = None
+        if self._pubsub is not None:
+            await self._pubsub.aclose()
+            self._pubsub = None
+        await self._redis.aclose()
+
+    async def publish(self, basic_application_id: str, message: Dict) -> None:
+        data = json.dumps(message)
+        await self._redis.set(self._last_key(basic_application_id), data, ex=self._last_message_ttl_seconds)
+        await self._redis.publish(f"{STATUS_CHANNEL_PREFIX}{basic_application_id}", data)
+
+    async def get_last(self, basic_application_id: str) -> Optional[Dict]:
+        data = await self._redis.get(self._last_key(basic_application_id))
+        return json.loads(data) if data else None
+
+    async def forget(self, basic_application_id: str) -> None:
+        # Other workers may still have subscribers; the key expires on its own
+        pass
+
+    async def acquire_poller(self, basic_application_id: str, ttl_seconds: float) -> bool:
+        key = self._lock_key(basic_application_id)
+        ttl = max(1, int(ttl_seconds))
+        if await self._redis.set(key, self._worker_id, nx=True, ex=ttl):
+            return True
+        if await self._redis.get(key) == self._worker_id:
+            await self._redis.expire(key, ttl)
+            return True
+        return False
+
+    async def release_poller(self, basic_application_id: str) -> None:
+        key = self._lock_key(basic_application_id)
+        if await self._redis.get(key) == self._worker_id:
+            await self._redis.delete(key)
+
+    async def _listen(self, on_message: MessageHandler) -> None:
+        async for item in self._pubsub.listen():
+            if item.get("type") != "pmessage":
+                continue
+            try:
+                basic_application_id = item["channel"][len(STATUS_CHANNEL_PREFIX):]
+                on_message(basic_application_id, json.loads(item["data"]))
+            except Exception as e:
+                print(f"Invalid status message on {item.get('channel')}: {e}")
+
+    @staticmethod
+    def _last_key(basic_application_id: str) -> str:
+        return f"{STATUS_CHANNEL_PREFIX}last:{basic_application_id}"
+
+    @staticmethod
+    def _lock_key(basic_application_id: str) -> str:
+        return f"{STATUS_CHANNEL_PREFIX}poller:{basic_application_id}"
+
+
+class StatusSubscription:
+    """One client's subscription to status changes of an application"""
+
+    def __init__(self, basic_application_id: str, queue_size: int):
+        self.basic_application_id = basic_application_id
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=queue_size)
+        self.last_status: Optional[str] = None
+
+    def push(self, message: Optional[Dict]) -> None:
+        """Queue a message, dropping the oldest one for slow consumers"""
+        if self.queue.full():
+            self.queue.get_nowait()
+        self.queue.put_nowait(message)
+
+
+class StatusBroadcaster:
+    """
+    Fans out lead status changes to subscribers
+
+    Each application with subscribers has one poller task that calls the
+    GetActivity API on an interval and publishes a message on the bus only
+    when the status changes. With a shared bus (Redis) only one worker polls
+    each application, and every worker delivers to its own subscribers.
+    """
+
+    def __init__(
+        self,
+        get_database_service: Callable,
+        get_basic_application_service: Callable,
+        bus=None,
+        max_connections: int = 1000,
+        poll_interval_seconds: float = 30.0,
+        queue_size: int = 8
+    ):
+        """
+        Args:
+            get_database_service: Returns the DatabaseService (resolved lazily)
+            get_basic_application_service: Returns the BasicApplicationService (resolved lazily)
+            bus: InMemoryStatusBus or RedisStatusBus (defaults to in-memory)
+            max_connections: Maximum concurrent subscriptions on this worker
+            poll_interval_seconds: Delay between upstream polls per application
+            queue_size: Pending messages kept per subscriber
+        """
+        self.get_database_service = get_database_service
+        self.get_basic_application_service = get_basic_application_service
+        self.bus = bus or InMemoryStatusBus()
+        self.max_connections = max_connections
+        self.poll_interval_seconds = poll_interval_seconds
+        self.queue_size = queue_size
+
+        self._subscribers: Dict[str, Set[StatusSubscription]] = {}
+        self._pollers: Dict[str, asyncio.Task] = {}
+        self._mobile_numbers: Dict[str, str] = {}
+        self._started = False
+        self._start_lock = asyncio.Lock()
+
+        self._metrics = {
+            "connections_opened": 0,
+            "connections_rejected": 0,
+            "peak_connections": 0,
+            "upstream_polls": 0,
+            "messages_published": 0,
+            "messages_delivered": 0
+        }
+
+    async def subscribe(self, basic_application_id: str) -> StatusSubscription:
+        """
+        Subscribe to status changes of an application
+
+        The current status is queued immediately when it is already known.
+
+        Raises:
+            HTTPException: 503 when the worker has no free subscription slots
+        """
+        if self.active_connections >= self.max_connections:
+            self._metrics["connections_rejected"] += 1
+            raise HTTPException(status_code=503, detail="Too many status subscriptions, retry later")
+
+        # Take the slot before the first await, so concurrent subscribes cannot
+        # all pass the check above
+        subscription = StatusSubscription(basic_application_id, self.queue_size)
+        self._subscribers.setdefault(basic_application_id, set()).add(subscription)
+        self._metrics["connections_opened"] += 1
+        self._metrics["peak_connections"] = max(self._metrics["peak_connections"], self.active_connections)
+
+        try:
+            await self._ensure_started()
+        except BaseException:
+            await self.unsubscribe(subscription)
+            raise
+
+        last = await self.bus.get_last(basic_application_id)
+        if last is not None:
+            self._offer(subscription, last)
+
+        if basic_application_id not in self._pollers:
+            self._pollers[basic_application_id] = asyncio.get_running_loop().create_task(
+                self._poll(basic_application_id)
+            )
+
+        return subscription
+
+    async def unsubscribe(self, subscription: StatusSubscription) -> None:
+        """Remove a subscription; the poller stops when its last subscriber leaves"""
+        subscribers = self._subscribers.get(subscription.basic_application_id)
+        if subscribers is None:
+            return
+        subscribers.discard(subscription)
+        if not subscribers:
+            del self._subscribers[subscription.basic_application_id]
+            poller = self._pollers.pop(subscription.basic_application_id, None)
+            if poller is not None:
+                poller.cancel()
+
+    async def stop(self) -> None:
+        """Stop all pollers and end every open subscription"""
+        for poller in self._pollers.values():
+            poller.cancel()
+        await asyncio.gather(*self._pollers.values(), return_exceptions=True)
+        self._pollers.clear()
+
+        for subscribers in self._subscribers.values():
+            for subscription in subscribers:
+                subscription.push(None)
+        self._subscribers.clear()
+
+        if self._started:
+            await self.bus.stop()
+            self._started = False
+
+    @property
+    def active_connections(self) -> int:
+        return sum(len(subscribers) for subscribers in self._subscribers.values())
+
+    def get_metrics(self) -> Dict:
+        """
+        Get subscription metrics for this worker
+
+        Returns:
+            Dict: Connection counts, active pollers and message counters
+        """
+        return {
+            **self._metrics,
+            "active_connections": self.active_connections,
+            "max_connections": self.max_connections,
+            "subscribed_applications": len(self._subscribers),
+            "active_pollers": len(self._pollers),
+            "backend": type(self.bus).__name__
+        }
+
+    async def _ensure_started(self) -> None:
+        if self._started:
+            return
+        async with self._start_lock:
+            if not self._started:
+                await self.bus.start(self._deliver)
+                self._started = True
+
+    def _deliver(self, basic_application_id: str, message: Dict) -> None:
+        """Called by the bus for every published message"""
+        for subscription in list(self._subscribers.get(basic_application_id, ())):
+            self._offer(subscription, message)
+
+    def _offer(self, subscription: StatusSubscription, message: Dict) -> None:
+        """Queue a message unless the subscriber already has this status"""
+        if message.get("status") == subscription.last_status:
+            return
+        subscription.last_status = message.get("status")
+        subscription.push(message)
+        self._metrics["messages_delivered"] += 1
+
+    async def _poll(self, basic_application_id: str) -> None:
+        try:
+            while basic_application_id in self._subscribers:
+                if await self.bus.acquire_poller(basic_application_id, self.poll_interval_seconds * 3):
+                    try:
+                        message = await self._fetch_status(basic_application_id)
+                        last = await self.bus.get_last(basic_application_id)
+                        if last is None or last.get("status") != message["status"]:
+                            await self.bus.publish(basic_application_id, message)
+                            self._metrics["messages_published"] += 1
+                    except Exception as e:
+                        print(f"Status poll failed for {basic_application_id}: {e}")
+                await asyncio.sleep(self.poll_interval_seconds)
+        finally:
+            # A client may have subscribed again while this poller was stopping;
+            # its new poller owns the application's state from then on
+            if basic_application_id not in self._subscribers:
+                self._mobile_numbers.pop(basic_application_id, None)
+                try:
+                    await self.bus.release_poller(basic_application_id)
+                    if basic_application_id not in self._subscribers:
+                        await self.bus.forget(basic_application_id)
+                except Exception as e:
+                    print(f"Failed to release status poller for {basic_application_id}: {e}")
+
+    async def _fetch_status(self, basic_application_id: str) -> Dict:
+        """Get the current status message for an application from the GetActivity API"""
+        self._metrics["upstream_polls"] += 1
+
+        # The mobile number never changes, so look it up only once per poller
+        mobile_number = self._mobile_numbers.get(basic_application_id)
+        if mobile_number is None:
+            lead_data = await asyncio.to_thread(
+                self.get_database_service().get_lead_by_application_id, basic_application_id
+            )
+            mobile_number = lead_data.get("mobile_number") if lead_data else None
+            if mobile_number:
+                self._mobile_numbers[basic_application_id] = mobile_number
+
+        activity = None
+        if mobile_number:
+            # The Basic API client is synchronous; keep it off the event loop
+            activity = await asyncio.to_thread(
+                self.get_basic_application_service().get_activity, basic_application_id, mobile_number
+            )
+
+        if activity:
+            status = str(activity.get("result", {}).get("latestStatus", "Not found"))
+            message = f"Your lead status is: {status}"
+        else:
+            status = "Not Found"
+            message = STATUS_NOT_FOUND_MESSAGE
+
+        return {
+            "basic_application_id": basic_application_id,
+            "status": status,
+            "message": message,
+            "updated_at": datetime.now(timezone.utc).isoformat()
+        }
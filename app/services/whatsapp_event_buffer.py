@@ -0,0 +1,272 @@
+import asyncio
+import glob
+import json
+import os
+import time
+from collections import deque
+from typing import Callable, Deque, Dict, List, Optional, Tuple
+
+# Later statuses win when events for the same message are merged
+STATUS_RANK = {
+    "submitted": 0,
+    "enqueued": 1,
+    "sent": 2,
+    "delivered": 3,
+    "read": 4,
+    "failed": 5
+}
+
+RATE_WINDOW_SECONDS = 60
+
+SPILL_FILE_PREFIX = "unsaved-events-"
+
+
+class WhatsAppEventBuffer:
+    """
+    In-memory buffer for WhatsApp message events with batched persistence
+
+    Events are merged per Gupshup message ID as they arrive, so a sent /
+    delivered / read burst for one message becomes a single row. The buffer is
+    flushed as one bulk upsert when it holds max_batch_size messages or
+    flush_interval_ms after the first buffered event.
+
+    Events that still cannot be saved at shutdown are written to spill_dir
+    and buffered again by restore_spilled when a worker starts.
+    """
+
+    def __init__(
+        self,
+        upsert_events: Callable[[List[Dict]], int],
+        max_batch_size: int = 500,
+        flush_interval_ms: float = 1000.0,
+        max_buffered: int = 10000,
+        spill_dir: Optional[str] = None,
+        close_retries: int = 3,
+        close_retry_delay_seconds: float = 0.5
+    ):
+        """
+        Args:
+            upsert_events: Writes a list of message events in one call
+            max_batch_size: Flush as soon as this many messages are buffered
+            flush_interval_ms: Flush at the latest this long after the first buffered event
+            max_buffered: Messages kept while the database is unavailable;
+                the oldest are dropped beyond this
+            spill_dir: Directory for events that could not be saved at shutdown
+            close_retries: Flush retries at shutdown before events are spilled
+            close_retry_delay_seconds: Delay before the first retry, doubled for each next one
+        """
+        self.upsert_events = upsert_events
+        self.max_batch_size = max(1, max_batch_size)
+        self.flush_interval_ms = flush_interval_ms
+        self.max_buffered = max(self.max_batch_size, max_buffered)
+        self.spill_dir = spill_dir
+        self.close_retries = max(0, close_retries)
+        self.close_retry_delay_seconds = close_retry_delay_seconds
+
+        self._buffer: Dict[str, Dict] = {}
+        self._timer: Optional[asyncio.TimerHandle] = None
+        self._in_flight: set = set()
+        self._arrivals: Deque[Tuple[int, int]] = deque()
+
+        self._metrics = {
+            "events_received": 0,
+            "events_merged": 0,
+            "events_dropped": 0,
+            "flushes": 0,
+            "flush_failures": 0,
+            "events_spilled": 0,
+            "events_restored": 0,
+            "rows_flushed": 0,
+            "total_flush_latency_ms": 0.0,
+            "max_flush_latency_ms": 0.0,
+            "last_flush_latency_ms": 0.0
+        }
+
+    def add(self, event: Dict) -> None:
+        """
+        Buffer a message event without waiting for the database
+
+        Must be called from the event loop thread.
+
+        Args:
+            event: whatsapp_messages columns; message_id is required
+        """
+        self._metrics["events_received"] += 1
+        self._count_arrival()
+        self._merge(event)
+
+        if len(self._buffer) >= self.max_batch_size:
+            self._start_flush()
+        elif self._timer is None:
+            self._timer = asyncio.get_running_loop().call_later(
+                self.flush_interval_ms / 1000,
+                self._start_flush
+            )
+
+    async def close(self) -> None:
+        """
+        Flush buffered events and wait for in-flight flushes
+
+        Failed flushes are retried close_retries times with a doubling delay;
+        events still unsaved after that are written to spill_dir.
+        """
+        delay = self.close_retry_delay_seconds
+        for attempt in range(self.close_retries + 1):
+            if self._buffer:
+                self._start_flush()
+            if self._in_flight:
+                await asyncio.gather(*self._in_flight, return_exceptions=True)
+            if not self._buffer:
+                return
+            if attempt < self.close_retries:
+                await asyncio.sleep(delay)
+                delay *= 2
+
+        # Failed flushes re-arm the timer; nothing runs it after shutdown
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        self._spill()
+
+    def restore_spilled(self) -> None:
+        """
+        Buffer the events spilled by workers that shut down while the database was unavailable
+
+        Must be called from the event loop thread.
+        """
+        if not self.spill_dir:
+            return
+        for path in sorted(glob.glob(os.path.join(self.spill_dir, f"{SPILL_FILE_PREFIX}*.ndjson"))):
+            # Claim the file, so workers starting together restore it only once
+            claimed_path = f"{path}.{os.getpid()}.restoring"
+            try:
+                os.rename(path, claimed_path)
+            except OSError:
+                continue
+            try:
+                with open(claimed_path, encoding="utf-8") as spilled:
+                    for line in spilled:
+                        if line.strip():
+                            self.add(json.loads(line))
+                            self._metrics["events_restored"] += 1
+                os.remove(claimed_path)
+            except Exception as e:
+                print(f"Failed to restore spilled WhatsApp message events from {claimed_path}: {e}")
+
+    def get_metrics(self) -> Dict:
+        """
+        Get ingest and flush metrics
+
+        Returns:
+            Dict: Counters, ingest rate over the last minute, flush latencies and buffer depth
+        """
+        metrics = dict(self._metrics)
+        flushes = metrics["flushes"]
+        metrics["avg_flush_latency_ms"] = metrics["total_flush_latency_ms"] / flushes if flushes else 0.0
+        metrics["avg_flush_size"] = metrics["rows_flushed"] / flushes if flushes else 0.0
+        metrics["ingest_rate_per_second"] = self._ingest_rate()
+        metrics["buffered_messages"] = len(self._buffer)
+        metrics["in_flight_flushes"] = len(self._in_flight)
+        return metrics
+
+    def _merge(self, event: Dict) -> None:
+        message_id = event["message_id"]
+        current = self._buffer.get(message_id)
+        if current is None:
+            if len(self._buffer) >= self.max_buffered:
+                # Database has been unavailable for a while; drop the oldest message
+                del self._buffer[next(iter(self._buffer))]
+                self._metrics["events_dropped"] += 1
+            self._buffer[message_id] = dict(event)
+            return
+
+        self._metrics["events_merged"] += 1
+        # Keep values already buffered, fill in the ones still missing
+        for key, value in event.items():
+            if key != "status" and current.get(key) is None:
+                current[key] = value
+        if STATUS_RANK.get(event.get("status"), -1) > STATUS_RANK.get(current.get("status"), -1):
+            current["status"] = event["status"]
+
+    def _start_flush(self) -> None:
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+
+        batch, self._buffer = self._buffer, {}
+        if not batch:
+            return
+
+        task = asyncio.get_running_loop().create_task(self._flush(batch))
+        self._in_flight.add(task)
+        task.add_done_callback(self._in_flight.discard)
+
+    async def _flush(self, batch: Dict[str, Dict]) -> None:
+        started = time.perf_counter()
+        rows = self._uniform_rows(list(batch.values()))
+        try:
+            # The Supabase client is synchronous; keep it off the event loop
+            await asyncio.to_thread(self.upsert_events, rows)
+        except Exception as e:
+            print(f"Failed to persist {len(rows)} WhatsApp message events: {e}")
+            self._metrics["flush_failures"] += 1
+            # Put the events back so the next flush retries them
+            for event in batch.values():
+                self._merge(event)
+            if self._timer is None and self._buffer:
+                self._timer = asyncio.get_running_loop().call_later(
+                    self.flush_interval_ms / 1000,
+                    self._start_flush
+                )
+            return
+
+        latency_ms = (time.perf_counter() - started) * 1000
+        self._metrics["flushes"] += 1
+        self._metrics["rows_flushed"] += len(rows)
+        self._metrics["total_flush_latency_ms"] += latency_ms
+        self._metrics["last_flush_latency_ms"] = latency_ms
+        self._metrics["max_flush_latency_ms"] = max(self._metrics["max_flush_latency_ms"], latency_ms)
+
+    def _spill(self) -> None:
+        """Write the buffered events to spill_dir (one JSON object per line)"""
+        events, self._buffer = list(self._buffer.values()), {}
+        if not self.spill_dir:
+            print(f"Dropping {len(events)} unsaved WhatsApp message events: no spill directory configured")
+            self._metrics["events_dropped"] += len(events)
+            return
+        try:
+            os.makedirs(self.spill_dir, exist_ok=True)
+            path = os.path.join(self.spill_dir, f"{SPILL_FILE_PREFIX}{os.getpid()}-{time.time_ns()}.ndjson")
+            with open(path, "w", encoding="utf-8") as spill:
+                for event in events:
+                    spill.write(json.dumps(event) + "\n")
+            print(f"Saved {len(events)} unsaved WhatsApp message events to {path}")
+            self._metrics["events_spilled"] += len(events)
+        except Exception as e:
+            print(f"Failed to spill {len(events)} WhatsApp message events: {e}")
+            self._metrics["events_dropped"] += len(events)
+
+    @staticmethod
+    def _uniform_rows(rows: List[Dict]) -> List[Dict]:
+        """Give every row the same keys, as bulk writes require"""
+        keys = set()
+        for row in rows:
+            keys.update(row)
+        return [{key: row.get(key) for key in keys} for row in rows]
+
+    def _count_arrival(self) -> None:
+        second = int(time.monotonic())
+        if self._arrivals and self._arrivals[-1][0] == second:
+            self._arrivals[-1] = (second, self._arrivals[-1][1] + 1)
+        else:
+            self._arrivals.append((second, 1))
+        self._trim_arrivals(second)
+
+    def _ingest_rate(self) -> float:
+        now = int(time.monotonic())
+        self._trim_arrivals(now)
+        return sum(count for _, count in self._arrivals) / RATE_WINDOW_SECONDS
+
+    def _trim_arrivals(self, now: int) -> None:
+        while self._arrivals and self._arrivals[0][0] <= now - RATE_WINDOW_SECONDS:
+            self._arrivals.popleft()
@@ -1,11 +1,73 @@
-import httpx
 import json
+from datetime import datetime, timezone
+from typing import Dict, List, Optional
 from app.config.settings import settings
+from app.utils.tracing import trace_upstream
+
+# Gupshup message-event types stored in whatsapp_messages
+GUPSHUP_MESSAGE_EVENT_TYPES = {"enqueued", "sent", "delivered", "read", "failed"}
+
+def _timestamp_to_iso(value, milliseconds: bool = False) -> Optional[str]:
+    """Convert a Gupshup epoch timestamp to an ISO 8601 string"""
+    if value is None:
+        return None
+    try:
+        seconds = float(value) / 1000 if milliseconds else float(value)
+        return datetime.fromtimestamp(seconds, tz=timezone.utc).isoformat()
+    except (TypeError, ValueError):
+        return None
+
+def parse_gupshup_message_events(body: Dict) -> List[Dict]:
+    """
+    Convert a Gupshup webhook callback into whatsapp_messages events
+    
+    Only message-event callbacks (enqueued / sent / delivered / read / failed)
+    are converted; other callback types are ignored.
+    
+    Args:
+        body: Gupshup webhook JSON body (v2 format)
+        
+    Returns:
+        List[Dict]: Events keyed by Gupshup message ID
+    """
+    if not isinstance(body, dict) or body.get("type") != "message-event":
+        return []
+    
+    payload = body.get("payload") or {}
+    event_type = payload.get("type")
+    if event_type not in GUPSHUP_MESSAGE_EVENT_TYPES:
+        return []
+    
+    details = payload.get("payload") or {}
+    # "enqueued" carries the Gupshup ID in id; later events carry it in gsId
+    # and the WhatsApp message ID in id
+    gupshup_id = payload.get("gsId") or payload.get("id")
+    if not gupshup_id:
+        return []
+    whatsapp_message_id = details.get("whatsappMessageId") or (payload.get("id") if payload.get("gsId") else None)
+    
+    occurred_at = _timestamp_to_iso(details.get("ts")) or _timestamp_to_iso(body.get("timestamp"), milliseconds=True)
+    
+    event = {
+        "message_id": str(gupshup_id),
+        "whatsapp_message_id": whatsapp_message_id,
+        "destination": payload.get("destination"),
+        "status": event_type,
+        f"{event_type}_at": occurred_at or datetime.now(timezone.utc).isoformat()
+    }
+    if event_type == "failed":
+        event["error_code"] = str(details["code"]) if details.get("code") is not None else None
+        event["error_reason"] = details.get("reason")
+    return [event]
 
 class WhatsAppService:
     """Service for handling WhatsApp message sending using Gupshup API with different templates"""
     
-    def __init__(self):
+    def __init__(self, event_buffer=None):
+        """
+        Args:
+            event_buffer: Optional WhatsAppEventBuffer used to record sent messages
+        """
         self.api_url = settings.GUPSHUP_API_URL
         self.api_key = settings.GUPSHUP_API_KEY
         self.source = settings.GUPSHUP_SOURCE
@@ -15,6 +77,61 @@ class WhatsAppService:
         self.lead_status_template_id = settings.GUPSHUP_LEAD_STATUS_TEMPLATE_ID
         self.lead_creation_src_name = settings.GUPSHUP_LEAD_CREATION_SRC_NAME
         self.lead_status_src_name = settings.GUPSHUP_LEAD_STATUS_SRC_NAME
+        
+        # Shared HTTP client (connection pool), created on first use
+        self._client = None
+        
+        # Records accepted messages in whatsapp_messages (batched)
+        self.event_buffer = event_buffer
+    
+    def _record_submitted(self, response_data: Dict, destination: str, message_type: str, template_id: str, basic_application_id: Optional[str]) -> None:
+        """Record a message accepted by Gupshup so webhook events can be matched to it"""
+        message_id = response_data.get("messageId") if isinstance(response_data, dict) else None
+        if self.event_buffer is None or not message_id:
+            return
+        
+        self.event_buffer.add({
+            "message_id": str(message_id),
+            # Gupshup webhooks report the destination without the leading +
+            "destination": destination.lstrip("+"),
+            "message_type": message_type,
+            "template_id": template_id,
+            "basic_application_id": basic_application_id,
+            "status": "submitted",
+            "submitted_at": datetime.now(timezone.utc).isoformat()
+        })
+    
+    def _get_client(self):
+        """Get the shared httpx client, creating it on first use"""
+        if self._client is None:
+            # Imported lazily to keep application import time low
+            import httpx
+            self._client = httpx.AsyncClient(timeout=30.0)
+        return self._client
+    
+    async def ping(self, timeout: float = 5.0) -> None:
+        """
+        Check that the Gupshup API is reachable
+        
+        Any HTTP response counts as reachable; only connection errors fail.
+        
+        Raises:
+            Exception: If the API cannot be reached
+        """
+        await self._get_client().head(self.api_url, timeout=timeout)
+    
+    async def warm_up(self) -> None:
+        """Create the HTTP client and open a connection to Gupshup"""
+        try:
+            await self.ping()
+        except Exception as e:
+            print(f"Gupshup warm-up failed: {e}")
+    
+    async def aclose(self) -> None:
+        """Close the shared HTTP client"""
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
     
     async def send_lead_creation_confirmation(self, customer_name: str, loan_type: str, basic_application_id: str, phone_number: str) -> dict:
         """
@@ -52,34 +169,38 @@ class WhatsAppService:
         }
         
         try:
-            async with httpx.AsyncClient() as client:
+            client = self._get_client()
+            with trace_upstream("gupshup.send") as call:
                 response = await client.post(
                     self.api_url,
                     headers=headers,
                     data=data,
                     timeout=30.0
                 )
+                call["status"] = response.status_code
+            
+            # Gupshup API returns 202 for successful submissions
+            if response.status_code in [200, 202]:
+                try:
+                    response_data = response.json()
+                    data_dict = response_data if isinstance(response_data, dict) else {"response": str(response_data)}
+                except json.JSONDecodeError:
+                    data_dict = {"response": response.text}
+                
+                self._record_submitted(data_dict, phone_number, "lead_creation", self.lead_creation_template_id, basic_application_id)
+                
+                return {
+                    "success": True,
+                    "message": "Lead creation confirmation sent successfully",
+                    "data": data_dict
+                }
+            else:
+                return {
+                    "success": False,
+                    "message": f"Failed to send lead creation confirmation. Status: {response.status_code}",
+                    "data": {"error": response.text}
+                }
                 
-                # Gupshup API returns 202 for successful submissions
-                if response.status_code in [200, 202]:
-                    try:
-                        response_data = response.json()
-                        data_dict = response_data if isinstance(response_data, dict) else {"response": str(response_data)}
-                    except json.JSONDecodeError:
-                        data_dict = {"response": response.text}
-                    
-                    return {
-                        "success": True,
-                        "message": "Lead creation confirmation sent successfully",
-                        "data": data_dict
-                    }
-                else:
-                    return {
-                        "success": False,
-                        "message": f"Failed to send lead creation confirmation. Status: {response.status_code}",
-                        "data": {"error": response.text}
-                    }
-                    
         except Exception as e:
             return {
                 "success": False,
@@ -87,7 +208,7 @@ class WhatsAppService:
                 "data": {"error": str(e)}
             }
     
-    async def send_lead_status_update(self, phone_number: str, name: str, status: str) -> dict:
+    async def send_lead_status_update(self, phone_number: str, name: str, status: str, basic_application_id: Optional[str] = None) -> dict:
         """
         Send lead status update message using Gupshup template
         
@@ -95,6 +216,7 @@ class WhatsAppService:
             phone_number: Customer's phone number
             name: Customer's full name
             status: Current lead status
+            basic_application_id: Basic Application ID the update is about, if known
             
         Returns:
             dict: Response with success status and message
@@ -118,40 +240,41 @@ class WhatsAppService:
         }
         
         try:
-            async with httpx.AsyncClient() as client:
+            client = self._get_client()
+            with trace_upstream("gupshup.send") as call:
                 response = await client.post(
                     self.api_url,
                     headers=headers,
                     data=data,
                     timeout=30.0
                 )
+                call["status"] = response.status_code
+            
+            # Gupshup API returns 202 for successful submissions
+            if response.status_code in [200, 202]:
+                try:
+                    response_data = response.json()
+                    data_dict = response_data if isinstance(response_data, dict) else {"response": str(response_data)}
+                except json.JSONDecodeError:
+                    data_dict = {"response": response.text}
+                
+                self._record_submitted(data_dict, phone_number, "lead_status", self.lead_status_template_id, basic_application_id)
+                
+                return {
+                    "success": True,
+                    "message": "Lead status update sent successfully",
+                    "data": data_dict
+                }
+            else:
+                return {
+                    "success": False,
+                    "message": f"Failed to send lead status update. Status: {response.status_code}",
+                    "data": {"error": response.text}
+                }
                 
-                # Gupshup API returns 202 for successful submissions
-                if response.status_code in [200, 202]:
-                    try:
-                        response_data = response.json()
-                        data_dict = response_data if isinstance(response_data, dict) else {"response": str(response_data)}
-                    except json.JSONDecodeError:
-                        data_dict = {"response": response.text}
-                    
-                    return {
-                        "success": True,
-                        "message": "Lead status update sent successfully",
-                        "data": data_dict
-                    }
-                else:
-                    return {
-                        "success": False,
-                        "message": f"Failed to send lead status update. Status: {response.status_code}",
-                        "data": {"error": response.text}
-                    }
-                    
         except Exception as e:
             return {
                 "success": False,
                 "message": f"Error sending lead status update: {str(e)}",
                 "data": {"error": str(e)}
             }
-
-# Global instance
-whatsapp_service = WhatsAppService() 
\ No newline at end of file
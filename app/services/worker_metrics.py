@@ -0,0 +1,174 @@
+import asyncio
+import os
+import socket
+import time
+from collections import Counter
+from typing import Any, Callable, Dict, Optional
+from app.services.shared_state import SharedState
+
+WORKER_KEY_PREFIX = "metrics:worker:"
+REQUEST_KEY_PREFIX = "requests|"
+SUPERVISOR_KEY_PREFIX = "supervisor|"
+
+
+def combine_metrics(snapshots: Dict[str, Dict]) -> Dict:
+    """
+    Combine the metric dicts of several workers into one
+
+    Counters and gauges are summed, max_* and peak_* values take the maximum,
+    and avg_* / last_* values are left out: they only make sense per worker.
+    Strings are kept when all workers agree.
+
+    Args:
+        snapshots: Metric dicts by worker
+    """
+    combined: Dict[str, Any] = {}
+    for metrics in snapshots.values():
+        for key, value in metrics.items():
+            if key.startswith(("avg_", "last_")):
+                continue
+            current = combined.get(key)
+            if isinstance(value, dict):
+                combined[key] = combine_metrics({"current": current or {}, "worker": value})
+            elif isinstance(value, bool) or not isinstance(value, (int, float)):
+                combined[key] = value if current is None or current == value else "mixed"
+            elif current is None:
+                combined[key] = value
+            elif key.startswith(("max_", "peak_")):
+                combined[key] = max(current, value)
+            else:
+                combined[key] = current + value
+    return combined
+
+
+class WorkerMetrics:
+    """
+    Per-worker metrics published to the shared state and combined across workers
+
+    Each worker counts its requests locally (no shared state access on the
+    request path) and, every interval_seconds, adds the new counts to shared
+    counters and stores a snapshot of its service metrics. Snapshots expire
+    when a worker stops publishing, so /metrics only lists live workers while
+    request counts of recycled workers are kept.
+    """
+
+    def __init__(
+        self,
+        shared_state: SharedState,
+        collect: Callable[[], Dict[str, Dict]],
+        interval_seconds: float = 5.0
+    ):
+        """
+        Args:
+            shared_state: Store shared by all workers
+            collect: Returns this worker's service metrics by section
+            interval_seconds: Delay between publishes
+        """
+        self.shared_state = shared_state
+        self.collect = collect
+        self.interval_seconds = interval_seconds
+        self.started_at = time.time()
+
+        self._requests: Counter = Counter()
+        self._requests_served = 0
+        self._task: Optional[asyncio.Task] = None
+
+    @property
+    def worker_id(self) -> str:
+        # Resolved on use: the container may be imported before the worker is spawned
+        return f"{socket.gethostname()}:{os.getpid()}"
+
+    def count_request(self, method: str, route: str, status: int) -> None:
+        """Count a finished request (called on the event loop for every request)"""
+        self._requests[f"{method} {route}|{status}"] += 1
+        self._requests_served += 1
+
+    async def start(self) -> None:
+        """Publish now and then every interval_seconds"""
+        await self.publish()
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        """Stop publishing, flush the last request counts and withdraw this worker's snapshot"""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        try:
+            await self.flush_requests()
+            await self.shared_state.delete(WORKER_KEY_PREFIX + self.worker_id)
+        except Exception as e:
+            print(f"Error publishing final worker metrics: {e}")
+
+    async def flush_requests(self) -> None:
+        """Add the requests counted since the last flush to the shared counters"""
+        counts, self._requests = self._requests, Counter()
+        for key, count in counts.items():
+            await self.shared_state.incr(REQUEST_KEY_PREFIX + key, count)
+
+    async def publish(self) -> None:
+        """Flush request counts and store a snapshot of this worker's metrics"""
+        await self.flush_requests()
+        await self.shared_state.set(
+            WORKER_KEY_PREFIX + self.worker_id,
+            {
+                "pid": os.getpid(),
+                "started_at": self.started_at,
+                "published_at": time.time(),
+                "requests_served": self._requests_served,
+                "metrics": self.collect()
+            },
+            # Outlives a few missed publishes, not a dead worker
+            ttl_seconds=self.interval_seconds * 3
+        )
+
+    async def get_combined(self) -> Dict:
+        """
+        Get metrics of all live workers
+
+        Returns:
+            Dict: Worker list, request counts by route and status, supervisor
+                counters, combined service metrics and each worker's snapshot
+        """
+        await self.publish()
+        snapshots = await self.shared_state.items(WORKER_KEY_PREFIX)
+        per_worker = {key[len(WORKER_KEY_PREFIX):]: snapshot for key, snapshot in sorted(snapshots.items())}
+
+        by_route: Dict[str, Dict[str, int]] = {}
+        total = 0
+        for key, count in (await self.shared_state.counters(REQUEST_KEY_PREFIX)).items():
+            route, _, status = key[len(REQUEST_KEY_PREFIX):].rpartition("|")
+            by_route.setdefault(route, {})[status] = count
+            total += count
+
+        supervisor = {
+            key[len(SUPERVISOR_KEY_PREFIX):]: count
+            for key, count in (await self.shared_state.counters(SUPERVISOR_KEY_PREFIX)).items()
+        }
+
+        return {
+            "workers": {
+                "count": len(per_worker),
+                "ids": list(per_worker),
+                "backend": type(self.shared_state).__name__
+            },
+            "requests": {
+                "total": total,
+                "by_route": dict(sorted(by_route.items()))
+            },
+            "supervisor": supervisor,
+            "metrics": combine_metrics({worker: snapshot["metrics"] for worker, snapshot in per_worker.items()}),
+            "per_worker": per_worker
+        }
+
+    async def _run(self) -> None:
+        while True:
+            await asyncio.sleep(self.interval_seconds)
+            try:
+                await self.publish()
+            except Exception as e:
+                print(f"Error publishing worker metrics: {e}")
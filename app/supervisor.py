@@ -0,0 +1,311 @@
+import asyncio
+import math
+import multiprocessing
+import os
+import signal
+import socket
+import threading
+import time
+from typing import Dict, List, Optional
+from app.config.settings import settings
+
+# Crashing workers are restarted after 1, 2, 4 ... seconds, at most this long
+MAX_RESTART_BACKOFF_SECONDS = 30
+# A worker that ran this long before crashing restarts without delay
+STABLE_WORKER_SECONDS = 10
+# New workers that are not ready by then fail the reload (the old ones keep serving)
+READY_TIMEOUT_SECONDS = 120
+# CPU quota of the container (cgroup v2)
+CGROUP_CPU_MAX_PATH = "/sys/fs/cgroup/cpu.max"
+
+
+def cgroup_cpu_limit(path: str = CGROUP_CPU_MAX_PATH) -> Optional[int]:
+    """CPUs allowed by the cgroup CPU quota (rounded up), or None without a quota"""
+    try:
+        with open(path) as cpu_max:
+            quota, period = cpu_max.read().split()[:2]
+    except (OSError, ValueError):
+        return None
+    if quota == "max":
+        return None
+    return max(1, math.ceil(int(quota) / int(period)))
+
+
+def resolve_worker_count(workers: str) -> int:
+    """Number of worker processes for WORKERS ("auto" = one per usable CPU)"""
+    if workers == "auto":
+        if hasattr(os, "sched_getaffinity"):
+            cpus = len(os.sched_getaffinity(0))
+        else:
+            cpus = os.cpu_count() or 1
+        # `docker run --cpus` sets a quota, not an affinity mask
+        limit = cgroup_cpu_limit()
+        return min(cpus, limit) if limit else cpus
+    return max(1, int(workers))
+
+
+def bind_socket(host: str, port: int) -> socket.socket:
+    """Listening socket shared by all workers, bound once by the supervisor"""
+    family = socket.AF_INET6 if ":" in host else socket.AF_INET
+    sock = socket.socket(family, socket.SOCK_STREAM)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    sock.bind((host, port))
+    sock.listen(2048)
+    sock.set_inheritable(True)
+    return sock
+
+
+def _run_worker(sock: socket.socket, ready_writer, supervisor_pid: int) -> None:
+    """Worker process entry point: serve app.main:app on the inherited socket"""
+    import uvicorn
+
+    class _WorkerServer(uvicorn.Server):
+        async def startup(self, sockets=None) -> None:
+            # Lifespan (service warm-up) has run once uvicorn is listening
+            await super().startup(sockets=sockets)
+            if not self.should_exit:
+                ready_writer.send(True)
+
+    # Terminal signals go to the supervisor only; it decides how workers stop
+    os.setpgid(0, 0)
+    signal.signal(signal.SIGHUP, signal.SIG_IGN)
+
+    def watch_supervisor() -> None:
+        # Shut down gracefully instead of lingering when the supervisor is killed
+        while os.getppid() == supervisor_pid:
+            time.sleep(1)
+        os.kill(os.getpid(), signal.SIGTERM)
+
+    threading.Thread(target=watch_supervisor, name="supervisor-watch", daemon=True).start()
+
+    config = uvicorn.Config(
+        "app.main:app",
+        lifespan="on",
+        limit_max_requests=settings.WORKER_MAX_REQUESTS or None,
+        limit_max_requests_jitter=settings.WORKER_MAX_REQUESTS_JITTER,
+        timeout_graceful_shutdown=int(settings.WORKER_GRACEFUL_TIMEOUT_SECONDS)
+    )
+    _WorkerServer(config).run(sockets=[sock])
+
+
+class _Worker:
+    def __init__(self, process, ready_reader):
+        self.process = process
+        self.started_at = time.monotonic()
+        self.ready = False
+        self.retiring = False
+        self._ready_reader = ready_reader
+
+    def is_ready(self) -> bool:
+        if not self.ready and self._ready_reader.poll():
+            try:
+                self.ready = self._ready_reader.recv()
+            except EOFError:
+                # Exited before it was ready
+                pass
+        return self.ready
+
+    def close(self) -> None:
+        self.process.join()
+        self._ready_reader.close()
+
+
+class Supervisor:
+    """
+    Pre-fork style process manager for the API (python -m app.supervisor)
+
+    Binds the listening socket once and runs `workers` uvicorn processes on
+    it. Workers that exit are replaced: after WORKER_MAX_REQUESTS requests a
+    worker finishes its in-flight requests and exits (a recycle), crashes are
+    restarted with backoff. Signals:
+    - SIGHUP: graceful reload; new workers are started (with the current code)
+      and the old ones are stopped only once all new ones are ready
+    - SIGTERM / SIGINT: graceful stop; workers get WORKER_GRACEFUL_TIMEOUT_SECONDS
+      to finish in-flight requests before they are killed
+    """
+
+    def __init__(self, sock: socket.socket, workers: int, graceful_timeout_seconds: float = 30.0, shared_state=None):
+        """
+        Args:
+            sock: Bound listening socket
+            workers: Number of worker processes
+            graceful_timeout_seconds: Time workers get to finish in-flight requests
+            shared_state: Store for supervisor counters shown by /metrics
+        """
+        self.sock = sock
+        self.workers = workers
+        self.graceful_timeout_seconds = graceful_timeout_seconds
+        self.shared_state = shared_state
+
+        self._context = multiprocessing.get_context("spawn")
+        self._workers: Dict[int, _Worker] = {}
+        self._stopping = asyncio.Event()
+        self._reload_requested = False
+        self._restart_backoff = 0.0
+        self._restart_at = 0.0
+
+    async def run(self) -> None:
+        """Start the workers and keep them running until SIGTERM / SIGINT"""
+        loop = asyncio.get_running_loop()
+        loop.add_signal_handler(signal.SIGHUP, self._request_reload)
+        for signum in (signal.SIGTERM, signal.SIGINT):
+            loop.add_signal_handler(signum, self._stopping.set)
+
+        print(f"Supervisor {os.getpid()} starting {self.workers} workers on {self._address()}")
+        for _ in range(self.workers):
+            self._spawn()
+
+        while not self._stopping.is_set():
+            if self._reload_requested:
+                self._reload_requested = False
+                await self.reload()
+            await self._reap()
+            try:
+                await asyncio.wait_for(self._stopping.wait(), timeout=0.5)
+            except asyncio.TimeoutError:
+                pass
+
+        await self.stop()
+
+    async def reload(self) -> None:
+        """Replace all workers without dropping requests"""
+        old = [worker for worker in self._workers.values() if not worker.retiring]
+        new = [self._spawn() for _ in range(self.workers)]
+        print(f"Reloading: started workers {[worker.process.pid for worker in new]}")
+
+        deadline = time.monotonic() + READY_TIMEOUT_SECONDS
+        while not all(worker.is_ready() for worker in new):
+            if self._stopping.is_set():
+                return
+            if time.monotonic() > deadline or any(not worker.process.is_alive() for worker in new):
+                print("Reload failed: new workers did not become ready, keeping the current workers")
+                await self._count("reload_failures")
+                self._terminate(new)
+                return
+            await asyncio.sleep(0.1)
+
+        self._terminate(old)
+        await self._count("reloads")
+        print("Reload complete")
+
+    async def stop(self) -> None:
+        """Stop all workers, killing those still running after the graceful timeout"""
+        workers = list(self._workers.values())
+        self._terminate(workers)
+        deadline = time.monotonic() + self.graceful_timeout_seconds + 5
+        while any(worker.process.is_alive() for worker in workers) and time.monotonic() < deadline:
+            await asyncio.sleep(0.1)
+        for worker in workers:
+            if worker.process.is_alive():
+                print(f"Worker {worker.process.pid} did not stop in time, killing it")
+                worker.process.kill()
+            worker.close()
+        self._workers.clear()
+        if self.shared_state is not None:
+            await self.shared_state.close()
+        print("Supervisor stopped")
+
+    def _request_reload(self) -> None:
+        self._reload_requested = True
+
+    def _spawn(self) -> _Worker:
+        # A pipe rather than an Event: no semaphore, so no resource tracker process
+        ready_reader, ready_writer = self._context.Pipe(duplex=False)
+        process = self._context.Process(
+            target=_run_worker,
+            args=(self.sock, ready_writer, os.getpid()),
+            name="lead-api-worker"
+        )
+        process.start()
+        ready_writer.close()
+        worker = _Worker(process, ready_reader)
+        self._workers[process.pid] = worker
+        return worker
+
+    def _terminate(self, workers: List[_Worker]) -> None:
+        for worker in workers:
+            worker.retiring = True
+            if worker.process.is_alive():
+                worker.process.terminate()
+
+    async def _reap(self) -> None:
+        """Collect exited workers and start replacements"""
+        for pid, worker in list(self._workers.items()):
+            if worker.process.is_alive():
+                continue
+            worker.close()
+            del self._workers[pid]
+            if worker.retiring:
+                continue
+
+            exitcode = worker.process.exitcode
+            if exitcode == 0:
+                # Reached WORKER_MAX_REQUESTS
+                await self._count("worker_recycles")
+            else:
+                print(f"Worker {pid} exited with code {exitcode}")
+                await self._count("worker_crashes")
+                if time.monotonic() - worker.started_at < STABLE_WORKER_SECONDS:
+                    self._restart_backoff = min(MAX_RESTART_BACKOFF_SECONDS, self._restart_backoff * 2 or 1)
+                    self._restart_at = time.monotonic() + self._restart_backoff
+                else:
+                    self._restart_backoff = 0.0
+
+        active = sum(1 for worker in self._workers.values() if not worker.retiring)
+        if active < self.workers and time.monotonic() >= self._restart_at:
+            for _ in range(self.workers - active):
+                self._spawn()
+            await self._count("worker_restarts", self.workers - active)
+
+    async def _count(self, name: str, amount: int = 1) -> None:
+        if self.shared_state is None:
+            return
+        try:
+            await self.shared_state.incr(f"supervisor|{name}", amount)
+        except Exception as e:
+            print(f"Error recording supervisor counter {name}: {e}")
+
+    def _address(self) -> str:
+        host, port = self.sock.getsockname()[:2]
+        return f"http://{host}:{port}"
+
+
+def main() -> None:
+    """Run the API with WORKERS processes (python -m app.supervisor)"""
+    workers = resolve_worker_count(settings.WORKERS)
+
+    # Per-process state would diverge between workers: share it through an mmap
+    # table on this host unless Redis is configured. Workers read the settings
+    # from the environment they are spawned with.
+    from app.services.container import shared_state_path
+    from app.services.shared_state import MmapSharedState, RedisSharedState
+
+    if settings.SHARED_STATE_BACKEND == "redis":
+        shared_state = RedisSharedState(settings.REDIS_URL)
+    else:
+        path = shared_state_path()
+        os.environ["SHARED_STATE_BACKEND"] = "mmap"
+        os.environ["SHARED_STATE_PATH"] = path
+        # Start every deployment from an empty table
+        shared_state = MmapSharedState(
+            path=path,
+            slots=settings.SHARED_STATE_SLOTS,
+            slot_bytes=settings.SHARED_STATE_SLOT_BYTES,
+            reset=True
+        )
+
+    if workers > 1 and settings.STATUS_PUBSUB_BACKEND != "redis":
+        print("Warning: STATUS_PUBSUB_BACKEND is not redis; every worker polls its own lead status subscriptions")
+
+    sock = bind_socket(settings.HOST, settings.PORT)
+    supervisor = Supervisor(
+        sock=sock,
+        workers=workers,
+        graceful_timeout_seconds=settings.WORKER_GRACEFUL_TIMEOUT_SECONDS,
+        shared_state=shared_state
+    )
+    asyncio.run(supervisor.run())
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,84 @@
+import time
+import threading
+from typing import Any, Callable, Dict, Hashable, List, Optional, Tuple
+
+
+class TTLCache:
+    """Small thread-safe in-process cache with a per-entry time to live"""
+    
+    def __init__(self, ttl_seconds: float, max_entries: int = 1024):
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self._entries: Dict[Hashable, Tuple[float, Any]] = {}
+        self._lock = threading.Lock()
+    
+    def get(self, key: Hashable) -> Optional[Any]:
+        """
+        Get a cached value
+        
+        Args:
+            key: Cache key
+            
+        Returns:
+            Optional[Any]: Cached value or None if missing or expired
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            expires_at, value = entry
+            if expires_at <= time.monotonic():
+                del self._entries[key]
+                return None
+            return value
+    
+    def set(self, key: Hashable, value: Any, ttl_seconds: Optional[float] = None) -> None:
+        """
+        Store a value for the configured time to live
+        
+        Args:
+            key: Cache key
+            value: Value to cache
+            ttl_seconds: Time to live for this entry (defaults to the cache's)
+        """
+        with self._lock:
+            if key not in self._entries and len(self._entries) >= self.max_entries:
+                # Drop the entry closest to expiry to make room
+                oldest = min(self._entries, key=lambda k: self._entries[k][0])
+                del self._entries[oldest]
+            ttl = self.ttl_seconds if ttl_seconds is None else ttl_seconds
+            self._entries[key] = (time.monotonic() + ttl, value)
+    
+    def get_or_set(self, key: Hashable, loader: Callable[[], Any]) -> Any:
+        """
+        Get a cached value, loading and caching it on a miss
+        
+        Args:
+            key: Cache key
+            loader: Callable producing the value on a miss
+            
+        Returns:
+            Any: Cached or freshly loaded value
+        """
+        value = self.get(key)
+        if value is None:
+            value = loader()
+            if value is not None:
+                self.set(key, value)
+        return value
+    
+    def items(self) -> List[Tuple[Hashable, Any]]:
+        """Get all entries that have not expired"""
+        now = time.monotonic()
+        with self._lock:
+            return [(key, value) for key, (expires_at, value) in self._entries.items() if expires_at > now]
+    
+    def invalidate(self, key: Hashable) -> None:
+        """Remove a single entry"""
+        with self._lock:
+            self._entries.pop(key, None)
+    
+    def clear(self) -> None:
+        """Remove all entries"""
+        with self._lock:
+            self._entries.clear()
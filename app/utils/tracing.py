@@ -0,0 +1,76 @@
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Dict, Iterator, List, Optional
+
+# Calls kept per request; long-lived requests (SSE streams) stop collecting here
+MAX_TRACED_CALLS = 100
+
+
+class UpstreamTrace:
+    """Upstream calls made while handling one recorded request"""
+
+    def __init__(self):
+        self.calls: List[list] = []
+        # Background tasks started by the request inherit the trace;
+        # they stop adding to it once the request has finished
+        self.active = True
+
+
+# None when the current request is not being recorded
+# (see app.middleware.traffic_recorder)
+_current_trace: ContextVar[Optional[UpstreamTrace]] = ContextVar("upstream_trace", default=None)
+
+
+def start_upstream_trace() -> object:
+    """
+    Start collecting upstream calls for the current request
+
+    Returns:
+        object: Token for end_upstream_trace()
+    """
+    return _current_trace.set(UpstreamTrace())
+
+
+def end_upstream_trace(token: object) -> List[list]:
+    """
+    Stop collecting upstream calls
+
+    Returns:
+        List[list]: [name, latency_ms, status] for every traced call, in order
+    """
+    trace = _current_trace.get()
+    _current_trace.reset(token)
+    if trace is None:
+        return []
+    trace.active = False
+    return trace.calls
+
+
+@contextmanager
+def trace_upstream(name: str) -> Iterator[Dict]:
+    """
+    Time an upstream call made while handling a recorded request
+
+    The context is copied into asyncio.to_thread() workers, so synchronous
+    clients can be traced too. Callers may set call["status"] (an HTTP status
+    code, or "hit" / "miss" for lookups); it is "error" when the block raises.
+    Does nothing beyond yielding a dict when the request is not recorded.
+
+    Args:
+        name: Upstream and operation, e.g. "basic_api.get_activity"
+    """
+    call: Dict = {}
+    trace = _current_trace.get()
+    if trace is None or not trace.active or len(trace.calls) >= MAX_TRACED_CALLS:
+        yield call
+        return
+
+    started = time.perf_counter()
+    try:
+        yield call
+    except BaseException:
+        call.setdefault("status", "error")
+        raise
+    finally:
+        trace.calls.append([name, round((time.perf_counter() - started) * 1000, 2), call.get("status")])
@@ -1,17 +1,39 @@
 import re
+from typing import Optional
 from app.config.settings import settings
 
+# Patterns are compiled once at import time
+PAN_NUMBER_PATTERN = re.compile(r'[A-Z]{5}[0-9]{4}[A-Z]')
+MOBILE_NUMBER_PATTERN = re.compile(r'[0-9]{10}')
+PIN_CODE_PATTERN = re.compile(r'[0-9]{6}')
+
+def _normalize_loan_type_key(loan_type: str) -> str:
+    """Lowercase and collapse underscores / repeated whitespace to single spaces"""
+    return " ".join(loan_type.replace("_", " ").lower().split())
+
+# Normalized loan type -> Basic Application API loan type code
+NORMALIZED_LOAN_TYPE_MAPPING = {
+    _normalize_loan_type_key(name): code
+    for name, code in settings.LOAN_TYPE_MAPPING.items()
+}
+
+def normalize_loan_type(loan_type: str) -> Optional[str]:
+    """Get the Basic Application API code for a loan type in any casing, or None if unknown"""
+    if not loan_type:
+        return None
+    return NORMALIZED_LOAN_TYPE_MAPPING.get(_normalize_loan_type_key(loan_type))
+
 def validate_pan_number(pan: str) -> bool:
     """Validate PAN number format"""
-    return bool(re.match(r'^[A-Z]{5}[0-9]{4}[A-Z]{1}$', pan))
+    return PAN_NUMBER_PATTERN.fullmatch(pan) is not None
 
 def validate_mobile_number(mobile: str) -> bool:
     """Validate mobile number format"""
-    return bool(re.match(r'^[0-9]{10}$', mobile))
+    return MOBILE_NUMBER_PATTERN.fullmatch(mobile) is not None
 
 def validate_pin_code(pin: str) -> bool:
     """Validate PIN code format"""
-    return bool(re.match(r'^[0-9]{6}$', pin))
+    return PIN_CODE_PATTERN.fullmatch(pin) is not None
 
 def validate_loan_amount(amount: float) -> bool:
     """Validate loan amount"""
@@ -23,5 +45,4 @@ def validate_loan_tenure(tenure: int) -> bool:
 
 def validate_loan_type(loan_type: str) -> bool:
     """Validate loan type"""
-    valid_types = settings.LOAN_TYPE_MAPPING.keys()
-    return loan_type in valid_types 
\ No newline at end of file
+    return normalize_loan_type(loan_type) is not None
@@ -0,0 +1,108 @@
+"""
+Benchmark the request/response cycle of POST /api/v1/lead/create on one core
+
+Upstream services are replaced with in-memory stand-ins through FastAPI
+dependency overrides, so the numbers cover request parsing, validation,
+endpoint logic and response serialization only. Run from the repository root:
+
+    python scripts/benchmark_request_cycle.py --requests 5000
+"""
+import argparse
+import asyncio
+import json
+import os
+import sys
+import time
+
+sys.path.insert(0, os.getcwd())
+os.environ.setdefault("SERVICE_WARMUP_ENABLED", "False")
+
+import httpx
+from app.main import app
+from app.models.schemas import LeadCreateRequest
+from app.services.container import (
+    get_basic_application_service, get_database_service, get_whatsapp_service
+)
+
+PAYLOAD = {
+    "loan_type": "Home Loan",
+    "loan_amount": 5000000,
+    "loan_tenure": 20,
+    "pan_number": "ABCDE1234F",
+    "first_name": "John",
+    "last_name": "Doe",
+    "gender": "Male",
+    "mobile_number": "9876543210",
+    "email": "john.doe@example.com",
+    "dob": "1990-01-01",
+    "pin_code": "123456"
+}
+
+
+class StubBasicApplicationService:
+    def create_lead(self, lead_data):
+        return {"result": {"basicAppId": "BENCH0001", "id": 1, "primaryBorrower": {"customerId": 1}}}
+
+
+class StubDatabaseService:
+    def save_lead_data(self, lead_data, basic_api_response):
+        return {"success": True, "database_id": 1}
+
+    async def save_lead_data_batched(self, lead_data, basic_api_response):
+        return self.save_lead_data(lead_data, basic_api_response)
+
+
+class StubWhatsAppService:
+    async def send_lead_creation_confirmation(self, **kwargs):
+        return {"success": True}
+
+
+def benchmark_validation(iterations: int) -> float:
+    """Payload parses (JSON -> validated model) per second"""
+    body = json.dumps(PAYLOAD)
+    started = time.perf_counter()
+    for _ in range(iterations):
+        LeadCreateRequest.model_validate_json(body)
+    return iterations / (time.perf_counter() - started)
+
+
+async def benchmark_requests(total: int, concurrency: int) -> float:
+    """Full ASGI request cycles per second"""
+    app.dependency_overrides[get_basic_application_service] = StubBasicApplicationService
+    app.dependency_overrides[get_database_service] = StubDatabaseService
+    app.dependency_overrides[get_whatsapp_service] = StubWhatsAppService
+
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://benchmark") as client:
+        remaining = iter(range(total))
+
+        async def worker():
+            for _ in remaining:
+                response = await client.post("/api/v1/lead/create", json=PAYLOAD)
+                assert response.status_code == 200, response.text
+
+        # Warm up routing and model caches before timing
+        await client.post("/api/v1/lead/create", json=PAYLOAD)
+        started = time.perf_counter()
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+        elapsed = time.perf_counter() - started
+
+    app.dependency_overrides.clear()
+    return total / elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=5000, help="Number of requests to send")
+    parser.add_argument("--concurrency", type=int, default=16, help="Concurrent in-flight requests")
+    args = parser.parse_args()
+
+    results = {
+        "validations_per_second": round(benchmark_validation(args.requests * 4)),
+        "requests_per_second_per_core": round(asyncio.run(benchmark_requests(args.requests, args.concurrency)))
+    }
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
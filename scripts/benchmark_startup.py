@@ -0,0 +1,81 @@
+"""
+Benchmark application import time and first-request latency
+
+Each measurement runs in a fresh interpreter so module caches do not hide
+cold-start costs. Run from the repository root:
+
+    python scripts/benchmark_startup.py --runs 5
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+IMPORT_SNIPPET = """
+import json, time
+started = time.perf_counter()
+import app.main
+print(json.dumps({"import_ms": (time.perf_counter() - started) * 1000}))
+"""
+
+FIRST_REQUEST_SNIPPET = """
+import json, time
+import app.main
+from fastapi.testclient import TestClient
+started = time.perf_counter()
+with TestClient(app.main.app) as client:
+    startup_ms = (time.perf_counter() - started) * 1000
+    started = time.perf_counter()
+    client.post("/api/v1/lead/status", json={"basic_application_id": "BENCHMARK"})
+    first_ms = (time.perf_counter() - started) * 1000
+    started = time.perf_counter()
+    client.post("/api/v1/lead/status", json={"basic_application_id": "BENCHMARK"})
+    second_ms = (time.perf_counter() - started) * 1000
+print(json.dumps({"startup_ms": startup_ms, "first_request_ms": first_ms, "second_request_ms": second_ms}))
+"""
+
+
+def run_snippet(snippet: str, env: dict) -> dict:
+    """Run a snippet in a fresh interpreter and parse its JSON output"""
+    output = subprocess.run(
+        [sys.executable, "-c", snippet],
+        env=env,
+        capture_output=True,
+        text=True,
+        check=True
+    ).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def summarize(samples: list) -> dict:
+    """Median, min and max of each measured value"""
+    return {
+        key: {
+            "median": round(statistics.median(s[key] for s in samples), 2),
+            "min": round(min(s[key] for s in samples), 2),
+            "max": round(max(s[key] for s in samples), 2)
+        }
+        for key in samples[0]
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=5, help="Number of fresh-interpreter runs per measurement")
+    args = parser.parse_args()
+
+    env = dict(os.environ, PYTHONPATH=os.getcwd())
+    results = {"import": summarize([run_snippet(IMPORT_SNIPPET, env) for _ in range(args.runs)])}
+
+    for warm_up in ("True", "False"):
+        env["SERVICE_WARMUP_ENABLED"] = warm_up
+        samples = [run_snippet(FIRST_REQUEST_SNIPPET, env) for _ in range(args.runs)]
+        results[f"first_request_warmup_{warm_up.lower()}"] = summarize(samples)
+
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,76 @@
+"""
+Import leads from a CSV or NDJSON file
+
+Rows are streamed, validated, de-duplicated by PAN and mobile number, and
+created through the Basic Application API. Progress is checkpointed in
+LEAD_IMPORT_DIR; running the same command again after a crash resumes where
+the previous run stopped. Run from the repository root:
+
+    python scripts/import_leads.py partner_leads.csv --concurrency 8
+"""
+import argparse
+import asyncio
+import os
+import sys
+
+sys.path.insert(0, os.getcwd())
+
+from app.services.container import container
+
+
+def print_progress(job) -> None:
+    print(
+        f"rows={job.rows_done} created={job.created} duplicates={job.duplicates} "
+        f"invalid={job.invalid} failed={job.failed}",
+        flush=True
+    )
+
+
+async def run_import(args) -> int:
+    import_service = container.lead_import_service
+    if args.concurrency:
+        import_service.concurrency = args.concurrency
+    if args.batch_size:
+        import_service.batch_size = args.batch_size
+
+    job = import_service.get_or_create_job(args.path, job_id=args.job_id)
+    if import_service.is_running(job.job_id):
+        print(f"Job {job.job_id} is already running in another process")
+        await container.shutdown()
+        return 1
+
+    if args.restart and os.path.exists(job.checkpoint_path):
+        os.remove(job.checkpoint_path)
+        if os.path.exists(job.errors_path):
+            os.remove(job.errors_path)
+        job = import_service.get_or_create_job(args.path, job_id=args.job_id)
+
+    if job.rows_done:
+        print(f"Resuming job {job.job_id} after row {job.rows_done}")
+    else:
+        print(f"Starting job {job.job_id}")
+
+    try:
+        job = await import_service.run(job, on_progress=print_progress)
+    finally:
+        await container.shutdown()
+
+    print(f"Job {job.job_id} {job.status}. Rejected rows are listed in {job.errors_path}")
+    if job.error:
+        print(f"Error: {job.error}")
+    return 0 if job.status == "completed" else 1
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("path", help="CSV or NDJSON (.ndjson / .jsonl) file of leads")
+    parser.add_argument("--job-id", help="Job ID (defaults to one derived from the file path)")
+    parser.add_argument("--concurrency", type=int, help="Leads created at the same time (LEAD_IMPORT_CONCURRENCY)")
+    parser.add_argument("--batch-size", type=int, help="Rows per de-duplication batch and checkpoint (LEAD_IMPORT_BATCH_SIZE)")
+    parser.add_argument("--restart", action="store_true", help="Discard the checkpoint and import from the first row")
+    args = parser.parse_args()
+    sys.exit(asyncio.run(run_import(args)))
+
+
+if __name__ == "__main__":
+    main()
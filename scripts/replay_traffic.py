@@ -0,0 +1,451 @@
+"""
+Replay recorded traffic traces and compare latency and throughput with the recording
+
+Traces are written by the opt-in recorder (TRAFFIC_RECORDING_ENABLED=True).
+Requests are sent open-loop on the recorded schedule, divided by --speed, so
+the arrival pattern (including repeated status polling by the same customer)
+is preserved. Identifier hashes are turned into stable fake identifiers.
+
+By default the local build is run in-process and the Basic Application API,
+Supabase and Gupshup are replaced with stand-ins that answer with the latency
+and outcome recorded for each request. With --base-url the requests go to a
+running server instead, with whatever upstreams it is configured for.
+Run from the repository root:
+
+    python scripts/replay_traffic.py traces/traffic-*.ndjson --speed 10
+"""
+import argparse
+import asyncio
+import contextlib
+import hashlib
+import json
+import math
+import os
+import statistics
+import sys
+import time
+import uuid
+from collections import Counter, defaultdict, deque
+from contextvars import ContextVar
+from typing import Dict, List, Optional, Tuple
+
+sys.path.insert(0, os.getcwd())
+os.environ.setdefault("SERVICE_WARMUP_ENABLED", "False")
+# Never record the replay itself
+os.environ["TRAFFIC_RECORDING_ENABLED"] = "False"
+
+import httpx
+from fastapi import HTTPException
+from app.main import app
+from app.services.basic_application_service import BasicApplicationService
+from app.services.container import container
+from app.services.lead_write_batcher import LeadWriteBatcher
+from app.services.whatsapp_service import WhatsAppService
+
+# Routes whose requests cannot be rebuilt from a trace
+UNREPLAYABLE_ROUTES = {
+    "/api/v1/lead/status/stream/{basic_application_id}": "long-lived SSE stream",
+    "/api/v1/lead/import": "uploaded file is not recorded",
+    # The job IDs come from uploads, which are not replayed
+    "/api/v1/lead/import/{job_id}": "import job is not replayed",
+    "/api/v1/lead/import/{job_id}/resume": "import job is not replayed",
+    "/api/v1/whatsapp/webhook": "webhook body is not recorded"
+}
+
+LEAD_TEMPLATE = {
+    "loan_type": "Home Loan",
+    "loan_amount": 5000000,
+    "loan_tenure": 20,
+    "first_name": "Replay",
+    "last_name": "Customer",
+    "gender": "Male",
+    "email": "replay@example.com",
+    "dob": "1990-01-01",
+    "pin_code": "123456"
+}
+
+# Trace record of the request being replayed, read by the upstream stand-ins
+_current_record: ContextVar[Optional[Dict]] = ContextVar("replay_record", default=None)
+
+
+def fake_mobile_number(seed: str) -> str:
+    digits = str(int(hashlib.sha256(seed.encode()).hexdigest(), 16))
+    return "9" + digits[:9]
+
+
+def fake_pan_number(seed: str) -> str:
+    digest = hashlib.sha256(seed.encode()).digest()
+    letters = "".join(chr(ord("A") + byte % 26) for byte in digest[:6])
+    digits = "".join(str(byte % 10) for byte in digest[6:10])
+    return letters[:5] + digits + letters[5]
+
+
+def fake_application_id(seed: str) -> str:
+    return "RPL" + hashlib.sha256(seed.encode()).hexdigest()[:10].upper()
+
+
+def build_request(record: Dict) -> Tuple[Optional[Tuple[str, str, Optional[Dict]]], Optional[str]]:
+    """
+    Rebuild a request from a trace record
+
+    Returns:
+        Tuple: ((method, path, json body), None) or (None, reason it is skipped)
+    """
+    route, method, ids = record["route"], record["method"], record.get("ids") or {}
+    if route in UNREPLAYABLE_ROUTES:
+        return None, UNREPLAYABLE_ROUTES[route]
+
+    values = {
+        "mobile_number": fake_mobile_number(ids["mobile_number"]) if "mobile_number" in ids else None,
+        "basic_application_id": fake_application_id(ids["basic_application_id"]) if "basic_application_id" in ids else None,
+        "pan_number": fake_pan_number(ids["pan_number"]) if "pan_number" in ids else None
+    }
+    try:
+        path = route.format_map(values)
+    except (KeyError, ValueError):
+        return None, "path parameters are not recorded"
+
+    if route == "/api/v1/lead/create":
+        body = {
+            **LEAD_TEMPLATE,
+            "mobile_number": values["mobile_number"] or fake_mobile_number(str(record["ts"])),
+            "pan_number": values["pan_number"] or fake_pan_number(str(record["ts"]))
+        }
+        return (method, path, body), None
+    if route == "/api/v1/lead/status":
+        body = {key: values[key] for key in ("mobile_number", "basic_application_id") if values[key]}
+        return (method, path, body), None
+    if method not in ("GET", "HEAD"):
+        return None, "request body is not recorded"
+    return (method, path, None), None
+
+
+class UpstreamPlayback:
+    """Recorded upstream latency and outcome for each call of the request being replayed"""
+
+    def __init__(self, records: List[Dict], latency_scale: float = 1.0):
+        samples = defaultdict(list)
+        for record in records:
+            for name, latency_ms, _ in record.get("upstream") or ():
+                samples[name].append(latency_ms)
+        # Used for calls the recording does not have, e.g. after a config change
+        self.median_ms = {name: statistics.median(values) for name, values in samples.items()}
+        self.latency_scale = latency_scale
+
+    def next_call(self, name: str) -> Tuple[float, Optional[object]]:
+        """
+        Returns:
+            Tuple[float, Optional[object]]: (latency in seconds, recorded status or None)
+        """
+        record = _current_record.get()
+        calls = record["_calls"].get(name) if record else None
+        if calls:
+            latency_ms, status = calls.popleft()
+        else:
+            latency_ms, status = self.median_ms.get(name, 0.0), None
+        return latency_ms * self.latency_scale / 1000, status
+
+
+class StandInBasicApplicationService(BasicApplicationService):
+    """Basic Application API stand-in; get_lead_status runs the real lookup logic"""
+
+    def __init__(self, playback: UpstreamPlayback):
+        super().__init__()
+        self.basic_api_url = "http://basic-api.stand-in"
+        self.playback = playback
+
+    def ping(self, timeout: float = 5) -> None:
+        pass
+
+    def warm_up(self) -> None:
+        pass
+
+    def close(self) -> None:
+        pass
+
+    def create_lead(self, lead_data: Dict) -> Dict:
+        # Synchronous like the real client, so it blocks the event loop just as much
+        latency, status = self.playback.next_call("basic_api.create_lead")
+        time.sleep(latency)
+        if status == "error":
+            raise HTTPException(status_code=500, detail="Error calling Basic Application API: replayed failure")
+        if status not in (None, 200, 201):
+            raise HTTPException(status_code=400, detail=f"Failed to create lead in Basic Application API: replayed {status}")
+        return {"result": {"basicAppId": fake_application_id(lead_data["mobile_number"]), "id": 1}}
+
+    def get_activity(self, basic_application_id: str, mobile_number: str) -> Optional[Dict]:
+        latency, status = self.playback.next_call("basic_api.get_activity")
+        time.sleep(latency)
+        if status == "error":
+            raise RuntimeError("Replayed GetActivity failure")
+        if status not in (None, 200):
+            return None
+        return {"result": {"latestStatus": "Login"}}
+
+
+class StandInDatabaseService:
+    """Supabase stand-in with the DatabaseService methods used by the API"""
+
+    def __init__(self, playback: UpstreamPlayback):
+        self.playback = playback
+        self.lead_write_batcher = LeadWriteBatcher(insert_batch=lambda rows: rows, insert_one=lambda row: row)
+
+    def _call(self, name: str) -> Optional[object]:
+        latency, status = self.playback.next_call(name)
+        time.sleep(latency)
+        return status
+
+    def _lead(self, basic_application_id: str, mobile_number: str) -> Dict:
+        return {
+            "id": 1,
+            "basic_application_id": basic_application_id,
+            "mobile_number": mobile_number,
+            "first_name": "Replay",
+            "last_name": "Customer",
+            "status": "created"
+        }
+
+    def save_lead_data(self, lead_data: Dict, basic_api_response: Dict) -> Dict:
+        if self._call("supabase.insert_lead") == "error":
+            raise HTTPException(status_code=500, detail="Database error: replayed failure")
+        return {"success": True, "database_id": 1, "message": "Lead data saved to database"}
+
+    async def save_lead_data_batched(self, lead_data: Dict, basic_api_response: Dict) -> Dict:
+        latency, status = self.playback.next_call("supabase.insert_lead")
+        await asyncio.sleep(latency)
+        if status == "error":
+            raise HTTPException(status_code=500, detail="Database error: replayed failure")
+        return {"success": True, "database_id": 1, "message": "Lead data saved to database"}
+
+    def get_lead_by_application_id(self, basic_application_id: str) -> Optional[Dict]:
+        if self._call("supabase.get_lead_by_application_id") in ("miss", "error"):
+            return None
+        return self._lead(basic_application_id, fake_mobile_number(basic_application_id))
+
+    def get_lead_by_mobile(self, mobile_number: str) -> Optional[Dict]:
+        if self._call("supabase.get_lead_by_mobile") in ("miss", "error"):
+            return None
+        return self._lead(fake_application_id(mobile_number), mobile_number)
+
+    def get_lead_statistics(self) -> Optional[Dict]:
+        if self._call("supabase.get_lead_statistics") == "error":
+            return None
+        return {
+            "total_leads": 0,
+            "created_leads": 0,
+            "approved_leads": 0,
+            "rejected_leads": 0,
+            "leads_last_24h": 0,
+            "leads_last_7d": 0
+        }
+
+    def find_existing_leads(self, pan_numbers: List[str], mobile_numbers: List[str]):
+        return set(), set()
+
+    def upsert_whatsapp_message_events(self, events: List[Dict]) -> int:
+        return len(events)
+
+    def update_lead_status(self, basic_application_id: str, status: str) -> bool:
+        return True
+
+    def ping(self) -> None:
+        pass
+
+    def warm_up(self) -> None:
+        pass
+
+
+class StandInWhatsAppService(WhatsAppService):
+    """Gupshup stand-in; accepted messages still go through the event buffer"""
+
+    def __init__(self, playback: UpstreamPlayback, event_buffer=None):
+        super().__init__(event_buffer=event_buffer)
+        self.playback = playback
+
+    async def ping(self, timeout: float = 5.0) -> None:
+        pass
+
+    async def warm_up(self) -> None:
+        pass
+
+    async def aclose(self) -> None:
+        pass
+
+    async def _send(self, phone_number: str, message_type: str, template_id: str, basic_application_id: Optional[str]) -> dict:
+        latency, status = self.playback.next_call("gupshup.send")
+        await asyncio.sleep(latency)
+        if status not in (None, 200, 202):
+            return {"success": False, "message": f"Replayed Gupshup status {status}", "data": {}}
+        data = {"status": "submitted", "messageId": uuid.uuid4().hex}
+        self._record_submitted(data, phone_number, message_type, template_id, basic_application_id)
+        return {"success": True, "message": "Message sent", "data": data}
+
+    async def send_lead_creation_confirmation(self, customer_name: str, loan_type: str, basic_application_id: str, phone_number: str) -> dict:
+        return await self._send(phone_number, "lead_creation", self.lead_creation_template_id, basic_application_id)
+
+    async def send_lead_status_update(self, phone_number: str, name: str, status: str, basic_application_id: Optional[str] = None) -> dict:
+        return await self._send(phone_number, "lead_status", self.lead_status_template_id, basic_application_id)
+
+
+def install_stand_ins(playback: UpstreamPlayback) -> None:
+    """Put the stand-ins in the service container before anything builds the real services"""
+    container._database_service = StandInDatabaseService(playback)
+    container._basic_application_service = StandInBasicApplicationService(playback)
+    container._whatsapp_service = StandInWhatsAppService(playback, event_buffer=container.whatsapp_event_buffer)
+
+
+def load_records(paths: List[str], routes: List[str], limit: Optional[int]) -> List[Dict]:
+    records = []
+    for path in paths:
+        with open(path, encoding="utf-8") as traces:
+            for line in traces:
+                if not line.strip():
+                    continue
+                try:
+                    record = json.loads(line)
+                except json.JSONDecodeError:
+                    # The last line of a live trace file may be incomplete
+                    continue
+                if not routes or record.get("route") in routes:
+                    records.append(record)
+    records.sort(key=lambda record: record["ts"])
+    return records[:limit] if limit else records
+
+
+def percentile(values: List[float], q: float) -> Optional[float]:
+    if not values:
+        return None
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, math.ceil(q / 100 * len(ordered)) - 1))
+    return round(ordered[index], 2)
+
+
+def latency_summary(values: List[float]) -> Dict:
+    return {f"p{q}": percentile(values, q) for q in (50, 95, 99)}
+
+
+def change_pct(recorded: Optional[float], replayed: Optional[float]) -> Optional[float]:
+    if not recorded or replayed is None:
+        return None
+    return round((replayed - recorded) / recorded * 100, 1)
+
+
+async def send(client: httpx.AsyncClient, record: Dict, request: Tuple[str, str, Optional[Dict]], lag_ms: float) -> Dict:
+    calls = defaultdict(deque)
+    for name, latency_ms, status in record.get("upstream") or ():
+        calls[name].append((latency_ms, status))
+    _current_record.set({**record, "_calls": calls})
+
+    method, path, body = request
+    started = time.perf_counter()
+    try:
+        response = await client.request(method, path, json=body)
+        status, error = response.status_code, None
+    except Exception as e:
+        status, error = None, f"{type(e).__name__}: {e}"
+    return {
+        "route": record["route"],
+        "recorded_status": record["status"],
+        "recorded_ms": record["ms"],
+        "status": status,
+        "ms": (time.perf_counter() - started) * 1000,
+        "lag_ms": lag_ms,
+        "error": error
+    }
+
+
+async def replay(records: List[Dict], args) -> Dict:
+    skipped = Counter()
+    planned = []
+    for record in records:
+        request, reason = build_request(record)
+        if request is None:
+            skipped[f"{record['route']} ({reason})"] += 1
+        else:
+            planned.append((record, request))
+    if not planned:
+        return {"replayed": 0, "skipped": dict(skipped)}
+
+    if args.base_url:
+        transport, base_url, lifespan = None, args.base_url, contextlib.nullcontext()
+    else:
+        install_stand_ins(UpstreamPlayback(records, args.upstream_scale))
+        transport, base_url, lifespan = httpx.ASGITransport(app=app), "http://replay", app.router.lifespan_context(app)
+
+    async with lifespan:
+        async with httpx.AsyncClient(transport=transport, base_url=base_url, timeout=args.timeout) as client:
+            first_ts = planned[0][0]["ts"]
+            started = time.perf_counter()
+            tasks = []
+            # Open loop: requests are sent on schedule whether or not earlier ones finished
+            for record, request in planned:
+                due = (record["ts"] - first_ts) / args.speed if args.speed > 0 else 0.0
+                delay = due - (time.perf_counter() - started)
+                if delay > 0:
+                    await asyncio.sleep(delay)
+                lag_ms = max(0.0, -delay) * 1000 if args.speed > 0 else 0.0
+                tasks.append(asyncio.create_task(send(client, record, request, lag_ms)))
+            results = await asyncio.gather(*tasks)
+            elapsed = time.perf_counter() - started
+
+    by_route = defaultdict(list)
+    for result in results:
+        by_route[result["route"]].append(result)
+
+    routes = {}
+    for route, route_results in sorted(by_route.items()):
+        recorded = [result["recorded_ms"] for result in route_results]
+        replayed = [result["ms"] for result in route_results if result["error"] is None]
+        recorded_summary, replay_summary = latency_summary(recorded), latency_summary(replayed)
+        routes[route] = {
+            "requests": len(route_results),
+            "errors": sum(1 for result in route_results if result["error"] is not None),
+            "status_mismatches": sum(
+                1 for result in route_results
+                if result["error"] is None and result["status"] != result["recorded_status"]
+            ),
+            "recorded_ms": recorded_summary,
+            "replay_ms": replay_summary,
+            "p50_change_pct": change_pct(recorded_summary["p50"], replay_summary["p50"]),
+            "p95_change_pct": change_pct(recorded_summary["p95"], replay_summary["p95"])
+        }
+
+    recorded_span = planned[-1][0]["ts"] - first_ts
+    recorded_rps = len(planned) / recorded_span if recorded_span > 0 else None
+    errors = [result["error"] for result in results if result["error"]]
+    return {
+        "replayed": len(planned),
+        "skipped": dict(skipped),
+        "speed": args.speed,
+        "upstreams": "recorded stand-ins" if not args.base_url else args.base_url,
+        "recorded_requests_per_second": round(recorded_rps, 2) if recorded_rps else None,
+        "target_requests_per_second": round(recorded_rps * args.speed, 2) if recorded_rps and args.speed > 0 else None,
+        "achieved_requests_per_second": round(len(planned) / elapsed, 2) if elapsed > 0 else None,
+        # Late dispatches mean the process could not keep up with the schedule
+        "dispatch_lag_ms": latency_summary([result["lag_ms"] for result in results]),
+        "routes": routes,
+        "sample_errors": errors[:5]
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("traces", nargs="+", help="Trace files written by the traffic recorder")
+    parser.add_argument("--speed", type=float, default=1.0, help="Time compression: 1 = recorded pace, 10 = ten times faster, 0 = no delays")
+    parser.add_argument("--upstream-scale", type=float, default=1.0, help="Multiply recorded upstream latencies (stand-ins only)")
+    parser.add_argument("--route", action="append", default=[], help="Only replay this route template (repeatable)")
+    parser.add_argument("--limit", type=int, help="Replay at most this many requests")
+    parser.add_argument("--base-url", help="Replay against a running server instead of the in-process build")
+    parser.add_argument("--timeout", type=float, default=30.0, help="Per-request timeout in seconds")
+    args = parser.parse_args()
+
+    records = load_records(args.traces, args.route, args.limit)
+    if not records:
+        print("No trace records found", file=sys.stderr)
+        sys.exit(1)
+
+    print(json.dumps(asyncio.run(replay(records, args)), indent=2))
+
+
+if __name__ == "__main__":
+    main()
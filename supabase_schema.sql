@@ -4,7 +4,7 @@
 -- Create leads table
 CREATE TABLE IF NOT EXISTS leads (
     id BIGSERIAL PRIMARY KEY,
-    basic_application_id VARCHAR(255) UNIQUE NOT NULL,
+    basic_application_id VARCHAR(255) NOT NULL,
     customer_id VARCHAR(255),
     relation_id VARCHAR(255),
     first_name VARCHAR(100) NOT NULL,
@@ -20,17 +20,63 @@ CREATE TABLE IF NOT EXISTS leads (
     pin_code VARCHAR(10),
     basic_api_response JSONB, -- Store full Basic API response
     status VARCHAR(50) DEFAULT 'created',
-    created_at TIMESTAMP WITH TIME ZONE DEFAULT NOW(),
-    updated_at TIMESTAMP WITH TIME ZONE DEFAULT NOW()
+    -- NOT NULL: "latest lead" ordering would put NULL timestamps first
+    created_at TIMESTAMP WITH TIME ZONE NOT NULL DEFAULT NOW(),
+    updated_at TIMESTAMP WITH TIME ZONE DEFAULT NOW(),
+    -- The unique index doubles as a covering index for the status path
+    -- (application ID -> mobile number / customer name), so lookups by
+    -- basic_application_id can be answered with an index-only scan.
+    -- The status lookups select only these columns (STATUS_LOOKUP_COLUMNS in
+    -- app/services/database_service.py); see tests/test_leads_indexes.py.
+    CONSTRAINT leads_basic_application_id_key UNIQUE (basic_application_id)
+        INCLUDE (mobile_number, first_name, last_name, status)
 );
 
 -- Create indexes for better performance
-CREATE INDEX IF NOT EXISTS idx_leads_basic_application_id ON leads(basic_application_id);
-CREATE INDEX IF NOT EXISTS idx_leads_mobile_number ON leads(mobile_number);
+-- "Latest lead for a mobile number" is a single probe on this index:
+-- WHERE mobile_number = $1 ORDER BY created_at DESC LIMIT 1
+CREATE INDEX IF NOT EXISTS idx_leads_mobile_number_created_at
+    ON leads(mobile_number, created_at DESC)
+    INCLUDE (basic_application_id, first_name, last_name, status);
 CREATE INDEX IF NOT EXISTS idx_leads_email ON leads(email);
+-- Used by the bulk importer's batched PAN de-duplication
+CREATE INDEX IF NOT EXISTS idx_leads_pan_number ON leads(pan_number);
 CREATE INDEX IF NOT EXISTS idx_leads_status ON leads(status);
 CREATE INDEX IF NOT EXISTS idx_leads_created_at ON leads(created_at);
 
+-- Which of a batch's PAN / mobile numbers already have leads, one row per key
+-- (used by the bulk importer's de-duplication). Returning distinct keys keeps
+-- the result no larger than the input, so PostgREST's max-rows limit cannot
+-- truncate it the way it could a plain select of every matching lead.
+CREATE OR REPLACE FUNCTION find_existing_lead_keys(p_pan_numbers TEXT[], p_mobile_numbers TEXT[])
+RETURNS TABLE (key_type TEXT, key_value TEXT) AS $$
+    SELECT DISTINCT 'pan_number', pan_number::TEXT FROM leads WHERE pan_number = ANY(p_pan_numbers)
+    UNION
+    SELECT DISTINCT 'mobile_number', mobile_number::TEXT FROM leads WHERE mobile_number = ANY(p_mobile_numbers);
+$$ language 'sql' STABLE;
+
+-- Migration for existing databases:
+-- idx_leads_basic_application_id duplicated the UNIQUE index and
+-- idx_leads_mobile_number is a prefix of idx_leads_mobile_number_created_at.
+DROP INDEX IF EXISTS idx_leads_basic_application_id;
+DROP INDEX IF EXISTS idx_leads_mobile_number;
+-- created_at used to be nullable. Runs once: the backfill scans the table and
+-- SET NOT NULL holds an ACCESS EXCLUSIVE lock while it checks every row.
+DO $$
+BEGIN
+    IF EXISTS (
+        SELECT 1 FROM pg_attribute
+        WHERE attrelid = 'leads'::regclass AND attname = 'created_at' AND NOT attnotnull
+    ) THEN
+        UPDATE leads SET created_at = COALESCE(updated_at, NOW()) WHERE created_at IS NULL;
+        ALTER TABLE leads ALTER COLUMN created_at SET NOT NULL;
+    END IF;
+END $$;
+-- To upgrade the existing UNIQUE constraint to the covering variant:
+-- ALTER TABLE leads DROP CONSTRAINT IF EXISTS leads_basic_application_id_key;
+-- ALTER TABLE leads ADD CONSTRAINT leads_basic_application_id_key
+--     UNIQUE (basic_application_id) INCLUDE (mobile_number, first_name, last_name, status);
+
 -- Create updated_at trigger
 CREATE OR REPLACE FUNCTION update_updated_at_column()
 RETURNS TRIGGER AS $$
@@ -40,6 +86,7 @@ BEGIN
 END;
 $$ language 'plpgsql';
 
+DROP TRIGGER IF EXISTS update_leads_updated_at ON leads;
 CREATE TRIGGER update_leads_updated_at 
     BEFORE UPDATE ON leads 
     FOR EACH ROW 
@@ -58,13 +105,272 @@ CREATE TRIGGER update_leads_updated_at
 -- CREATE POLICY "Allow authenticated users to update leads" ON leads
 --     FOR UPDATE USING (auth.role() = 'authenticated');
 
--- Optional: Create a view for lead statistics
+-- Optional: Time-range partitioning on created_at
+-- PostgreSQL requires every unique constraint on a partitioned table to include
+-- the partition key, so basic_application_id would only be unique per
+-- partition. Enable this only together with an application-level uniqueness
+-- check. Run instead of the CREATE TABLE above on a fresh database.
+-- CREATE TABLE IF NOT EXISTS leads (
+--     id BIGSERIAL,
+--     basic_application_id VARCHAR(255) NOT NULL,
+--     customer_id VARCHAR(255),
+--     relation_id VARCHAR(255),
+--     first_name VARCHAR(100) NOT NULL,
+--     last_name VARCHAR(100) NOT NULL,
+--     mobile_number VARCHAR(15) NOT NULL,
+--     email VARCHAR(255),
+--     pan_number VARCHAR(10),
+--     loan_type VARCHAR(50) NOT NULL,
+--     loan_amount DECIMAL(15,2) NOT NULL,
+--     loan_tenure INTEGER NOT NULL,
+--     gender VARCHAR(10),
+--     dob VARCHAR(10),
+--     pin_code VARCHAR(10),
+--     basic_api_response JSONB,
+--     status VARCHAR(50) DEFAULT 'created',
+--     created_at TIMESTAMP WITH TIME ZONE NOT NULL DEFAULT NOW(),
+--     updated_at TIMESTAMP WITH TIME ZONE DEFAULT NOW(),
+--     PRIMARY KEY (id, created_at),
+--     CONSTRAINT leads_basic_application_id_key UNIQUE (basic_application_id, created_at)
+--         INCLUDE (mobile_number, first_name, last_name, status)
+-- ) PARTITION BY RANGE (created_at);
+--
+-- CREATE TABLE IF NOT EXISTS leads_2025_07 PARTITION OF leads
+--     FOR VALUES FROM ('2025-07-01') TO ('2025-08-01');
+-- CREATE TABLE IF NOT EXISTS leads_default PARTITION OF leads DEFAULT;
+--
+-- Indexes created on the parent (idx_leads_mobile_number_created_at,
+-- idx_leads_created_at, ...) are propagated to every partition, and queries
+-- with a created_at range only touch the matching partitions.
+
+-- Hourly lead rollups for statistics
+-- Each row counts the leads created in one hour bucket that currently have the
+-- given status. Triggers on leads keep it in sync, so reading statistics never
+-- scans the leads table.
+-- Counts are split over 16 shards (lead id % 16) and summed on read: during an
+-- insert burst every lead is in the same hour and status, and a single counter
+-- row would make concurrent inserts wait on its row lock until commit.
+CREATE TABLE IF NOT EXISTS lead_stats_hourly (
+    bucket_start TIMESTAMP WITH TIME ZONE NOT NULL,
+    status VARCHAR(50) NOT NULL,
+    shard SMALLINT NOT NULL DEFAULT 0,
+    lead_count BIGINT NOT NULL DEFAULT 0,
+    PRIMARY KEY (bucket_start, status, shard)
+);
+
+-- All-time lead counts per status (and shard), maintained alongside lead_stats_hourly
+CREATE TABLE IF NOT EXISTS lead_stats_totals (
+    status VARCHAR(50) NOT NULL,
+    shard SMALLINT NOT NULL DEFAULT 0,
+    lead_count BIGINT NOT NULL DEFAULT 0,
+    PRIMARY KEY (status, shard)
+);
+
+-- Migration for existing databases: add the shard column to the rollup keys
+-- (existing counts stay in shard 0)
+DO $$
+BEGIN
+    IF NOT EXISTS (
+        SELECT 1 FROM information_schema.columns
+        WHERE table_schema = current_schema() AND table_name = 'lead_stats_hourly' AND column_name = 'shard'
+    ) THEN
+        ALTER TABLE lead_stats_hourly ADD COLUMN shard SMALLINT NOT NULL DEFAULT 0;
+        ALTER TABLE lead_stats_hourly DROP CONSTRAINT lead_stats_hourly_pkey;
+        ALTER TABLE lead_stats_hourly ADD PRIMARY KEY (bucket_start, status, shard);
+    END IF;
+    IF NOT EXISTS (
+        SELECT 1 FROM information_schema.columns
+        WHERE table_schema = current_schema() AND table_name = 'lead_stats_totals' AND column_name = 'shard'
+    ) THEN
+        ALTER TABLE lead_stats_totals ADD COLUMN shard SMALLINT NOT NULL DEFAULT 0;
+        ALTER TABLE lead_stats_totals DROP CONSTRAINT lead_stats_totals_pkey;
+        ALTER TABLE lead_stats_totals ADD PRIMARY KEY (status, shard);
+    END IF;
+END $$;
+DROP FUNCTION IF EXISTS bump_lead_stats_hourly(TIMESTAMP WITH TIME ZONE, VARCHAR, INTEGER);
+
+CREATE INDEX IF NOT EXISTS idx_lead_stats_hourly_bucket_start ON lead_stats_hourly(bucket_start);
+
+CREATE OR REPLACE FUNCTION bump_lead_stats_hourly(
+    p_created_at TIMESTAMP WITH TIME ZONE,
+    p_status VARCHAR,
+    p_delta INTEGER,
+    p_lead_id BIGINT
+)
+RETURNS VOID AS $$
+DECLARE
+    v_shard SMALLINT := (p_lead_id % 16)::SMALLINT;
+BEGIN
+    INSERT INTO lead_stats_hourly (bucket_start, status, shard, lead_count)
+    VALUES (date_trunc('hour', COALESCE(p_created_at, NOW())), COALESCE(p_status, 'unknown'), v_shard, p_delta)
+    ON CONFLICT (bucket_start, status, shard)
+    DO UPDATE SET lead_count = lead_stats_hourly.lead_count + EXCLUDED.lead_count;
+
+    INSERT INTO lead_stats_totals (status, shard, lead_count)
+    VALUES (COALESCE(p_status, 'unknown'), v_shard, p_delta)
+    ON CONFLICT (status, shard)
+    DO UPDATE SET lead_count = lead_stats_totals.lead_count + EXCLUDED.lead_count;
+END;
+$$ language 'plpgsql';
+
+CREATE OR REPLACE FUNCTION maintain_lead_stats_hourly()
+RETURNS TRIGGER AS $$
+BEGIN
+    IF TG_OP = 'INSERT' THEN
+        PERFORM bump_lead_stats_hourly(NEW.created_at, NEW.status, 1, NEW.id);
+    ELSIF TG_OP = 'DELETE' THEN
+        PERFORM bump_lead_stats_hourly(OLD.created_at, OLD.status, -1, OLD.id);
+    ELSIF NEW.status IS DISTINCT FROM OLD.status
+        OR NEW.created_at IS DISTINCT FROM OLD.created_at THEN
+        PERFORM bump_lead_stats_hourly(OLD.created_at, OLD.status, -1, OLD.id);
+        PERFORM bump_lead_stats_hourly(NEW.created_at, NEW.status, 1, NEW.id);
+    END IF;
+    RETURN NULL;
+END;
+$$ language 'plpgsql';
+
+-- Install the trigger and backfill the rollups from existing leads, once.
+-- Writes to leads are blocked until the transaction commits, so every lead is
+-- counted exactly once: by the backfill or by the trigger.
+DO $$
+BEGIN
+    IF NOT EXISTS (
+        SELECT 1 FROM pg_trigger
+        WHERE tgrelid = 'leads'::regclass AND tgname = 'maintain_leads_stats_hourly'
+    ) THEN
+        LOCK TABLE leads IN SHARE ROW EXCLUSIVE MODE;
+        CREATE TRIGGER maintain_leads_stats_hourly
+            AFTER INSERT OR UPDATE OR DELETE ON leads
+            FOR EACH ROW
+            EXECUTE FUNCTION maintain_lead_stats_hourly();
+
+        DELETE FROM lead_stats_hourly;
+        INSERT INTO lead_stats_hourly (bucket_start, status, shard, lead_count)
+        SELECT date_trunc('hour', created_at), COALESCE(status, 'unknown'), id % 16, COUNT(*)
+        FROM leads
+        GROUP BY 1, 2, 3;
+
+        DELETE FROM lead_stats_totals;
+        INSERT INTO lead_stats_totals (status, shard, lead_count)
+        SELECT COALESCE(status, 'unknown'), id % 16, COUNT(*)
+        FROM leads
+        GROUP BY 1, 2;
+    END IF;
+END $$;
+
+-- Lead statistics, computed from the rollup tables instead of scanning leads.
+-- Totals read one row per status and shard; the time windows read at most
+-- 7 days of hourly buckets. The 24 hour / 7 day windows are aligned to whole hours.
+-- Columns are cast to BIGINT, the type of the COUNT(*) columns the view used to
+-- have: CREATE OR REPLACE VIEW cannot change a column's type.
 CREATE OR REPLACE VIEW lead_statistics AS
 SELECT 
-    COUNT(*) as total_leads,
-    COUNT(CASE WHEN status = 'created' THEN 1 END) as created_leads,
-    COUNT(CASE WHEN status = 'approved' THEN 1 END) as approved_leads,
-    COUNT(CASE WHEN status = 'rejected' THEN 1 END) as rejected_leads,
-    COUNT(CASE WHEN created_at >= NOW() - INTERVAL '24 hours' THEN 1 END) as leads_last_24h,
-    COUNT(CASE WHEN created_at >= NOW() - INTERVAL '7 days' THEN 1 END) as leads_last_7d
-FROM leads; 
\ No newline at end of file
+    totals.total_leads,
+    totals.created_leads,
+    totals.approved_leads,
+    totals.rejected_leads,
+    recent.leads_last_24h,
+    recent.leads_last_7d
+FROM (
+    SELECT
+        COALESCE(SUM(lead_count), 0)::BIGINT as total_leads,
+        COALESCE(SUM(CASE WHEN status = 'created' THEN lead_count END), 0)::BIGINT as created_leads,
+        COALESCE(SUM(CASE WHEN status = 'approved' THEN lead_count END), 0)::BIGINT as approved_leads,
+        COALESCE(SUM(CASE WHEN status = 'rejected' THEN lead_count END), 0)::BIGINT as rejected_leads
+    FROM lead_stats_totals
+) totals
+CROSS JOIN (
+    SELECT
+        COALESCE(SUM(CASE WHEN bucket_start >= date_trunc('hour', NOW() - INTERVAL '24 hours') THEN lead_count END), 0)::BIGINT as leads_last_24h,
+        COALESCE(SUM(lead_count), 0)::BIGINT as leads_last_7d
+    FROM lead_stats_hourly
+    WHERE bucket_start >= date_trunc('hour', NOW() - INTERVAL '7 days')
+) recent;
+
+-- WhatsApp message delivery tracking
+-- One row per Gupshup message. The send path records the message when Gupshup
+-- accepts it; the Gupshup webhook adds enqueued / sent / delivered / read /
+-- failed events.
+CREATE TABLE IF NOT EXISTS whatsapp_messages (
+    message_id VARCHAR(255) PRIMARY KEY, -- Gupshup message id (gsId)
+    whatsapp_message_id VARCHAR(255),
+    destination VARCHAR(20),
+    message_type VARCHAR(50), -- lead_creation / lead_status
+    template_id VARCHAR(255),
+    basic_application_id VARCHAR(255),
+    status VARCHAR(20) NOT NULL DEFAULT 'submitted',
+    error_code VARCHAR(50),
+    error_reason TEXT,
+    submitted_at TIMESTAMP WITH TIME ZONE,
+    enqueued_at TIMESTAMP WITH TIME ZONE,
+    sent_at TIMESTAMP WITH TIME ZONE,
+    delivered_at TIMESTAMP WITH TIME ZONE,
+    read_at TIMESTAMP WITH TIME ZONE,
+    failed_at TIMESTAMP WITH TIME ZONE,
+    created_at TIMESTAMP WITH TIME ZONE DEFAULT NOW(),
+    updated_at TIMESTAMP WITH TIME ZONE DEFAULT NOW()
+);
+
+CREATE INDEX IF NOT EXISTS idx_whatsapp_messages_basic_application_id ON whatsapp_messages(basic_application_id);
+CREATE INDEX IF NOT EXISTS idx_whatsapp_messages_destination ON whatsapp_messages(destination);
+
+CREATE OR REPLACE FUNCTION whatsapp_message_status_rank(p_status VARCHAR)
+RETURNS INTEGER AS $$
+    SELECT CASE p_status
+        WHEN 'submitted' THEN 0
+        WHEN 'enqueued' THEN 1
+        WHEN 'sent' THEN 2
+        WHEN 'delivered' THEN 3
+        WHEN 'read' THEN 4
+        WHEN 'failed' THEN 5
+        ELSE -1
+    END;
+$$ language 'sql' IMMUTABLE;
+
+-- Bulk upsert of message events in one statement (and one commit).
+-- Events can arrive out of order, so the status only moves forward and
+-- timestamps / metadata already stored are kept.
+CREATE OR REPLACE FUNCTION upsert_whatsapp_message_events(events JSONB)
+RETURNS INTEGER AS $$
+DECLARE
+    affected INTEGER;
+BEGIN
+    INSERT INTO whatsapp_messages AS m (
+        message_id, whatsapp_message_id, destination, message_type, template_id,
+        basic_application_id, status, error_code, error_reason,
+        submitted_at, enqueued_at, sent_at, delivered_at, read_at, failed_at
+    )
+    SELECT
+        e.message_id, e.whatsapp_message_id, e.destination, e.message_type, e.template_id,
+        e.basic_application_id, COALESCE(e.status, 'submitted'), e.error_code, e.error_reason,
+        e.submitted_at, e.enqueued_at, e.sent_at, e.delivered_at, e.read_at, e.failed_at
+    FROM jsonb_to_recordset(events) AS e (
+        message_id VARCHAR, whatsapp_message_id VARCHAR, destination VARCHAR, message_type VARCHAR,
+        template_id VARCHAR, basic_application_id VARCHAR, status VARCHAR, error_code VARCHAR,
+        error_reason TEXT, submitted_at TIMESTAMPTZ, enqueued_at TIMESTAMPTZ, sent_at TIMESTAMPTZ,
+        delivered_at TIMESTAMPTZ, read_at TIMESTAMPTZ, failed_at TIMESTAMPTZ
+    )
+    ON CONFLICT (message_id) DO UPDATE SET
+        whatsapp_message_id = COALESCE(m.whatsapp_message_id, EXCLUDED.whatsapp_message_id),
+        destination = COALESCE(m.destination, EXCLUDED.destination),
+        message_type = COALESCE(m.message_type, EXCLUDED.message_type),
+        template_id = COALESCE(m.template_id, EXCLUDED.template_id),
+        basic_application_id = COALESCE(m.basic_application_id, EXCLUDED.basic_application_id),
+        status = CASE
+            WHEN whatsapp_message_status_rank(EXCLUDED.status) > whatsapp_message_status_rank(m.status)
+            THEN EXCLUDED.status ELSE m.status
+        END,
+        error_code = COALESCE(EXCLUDED.error_code, m.error_code),
+        error_reason = COALESCE(EXCLUDED.error_reason, m.error_reason),
+        submitted_at = COALESCE(m.submitted_at, EXCLUDED.submitted_at),
+        enqueued_at = COALESCE(m.enqueued_at, EXCLUDED.enqueued_at),
+        sent_at = COALESCE(m.sent_at, EXCLUDED.sent_at),
+        delivered_at = COALESCE(m.delivered_at, EXCLUDED.delivered_at),
+        read_at = COALESCE(m.read_at, EXCLUDED.read_at),
+        failed_at = COALESCE(m.failed_at, EXCLUDED.failed_at),
+        updated_at = NOW();
+
+    GET DIAGNOSTICS affected = ROW_COUNT;
+    RETURN affected;
+END;
+$$ language 'plpgsql';
@@ -0,0 +1,52 @@
+import pytest
+from fastapi import HTTPException
+from fastapi.testclient import TestClient
+from app.config.settings import settings
+from app.main import app
+from app.services.container import get_basic_application_service, get_database_service, get_whatsapp_service
+
+LEAD = {
+    "loan_type": "home loan",
+    "loan_amount": 2500000,
+    "loan_tenure": 240,
+    "pan_number": "ABCDE1234F",
+    "first_name": "Asha",
+    "last_name": "Rao",
+    "mobile_number": "9876543210",
+    "email": "asha@example.com",
+    "dob": "15/08/1990",
+    "pin_code": "560001"
+}
+
+
+class FakeBasicApplicationService:
+    def create_lead(self, api_data):
+        return {"result": {"basicAppId": "APP1"}}
+
+
+class DuplicateLeadDatabaseService:
+    def save_lead_data(self, lead_data, basic_api_response):
+        raise HTTPException(status_code=409, detail="Lead with basic_application_id APP1 already exists")
+
+    async def save_lead_data_batched(self, lead_data, basic_api_response):
+        self.save_lead_data(lead_data, basic_api_response)
+
+
+@pytest.fixture
+def client():
+    app.dependency_overrides[get_basic_application_service] = FakeBasicApplicationService
+    app.dependency_overrides[get_database_service] = DuplicateLeadDatabaseService
+    app.dependency_overrides[get_whatsapp_service] = lambda: None
+    # Without the lifespan: no warm-up or health probes
+    yield TestClient(app)
+    app.dependency_overrides.clear()
+
+
+@pytest.mark.parametrize("write_behind", [False, True])
+def test_duplicate_lead_is_409(client, monkeypatch, write_behind):
+    monkeypatch.setattr(settings, "LEAD_WRITE_BEHIND_ENABLED", write_behind)
+
+    response = client.post("/api/v1/lead/create", json=LEAD)
+
+    assert response.status_code == 409
+    assert "already exists" in response.json()["detail"]
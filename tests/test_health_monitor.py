@@ -0,0 +1,40 @@
+import asyncio
+import threading
+import pytest
+from app.services.health_monitor import HealthMonitor
+
+
+@pytest.mark.asyncio
+async def test_hung_blocking_probe_holds_one_thread_and_recovers():
+    released = threading.Event()
+    calls = []
+
+    def ping():
+        calls.append(1)
+        released.wait(5)
+
+    monitor = HealthMonitor(
+        probes={
+            "supabase": lambda: monitor.run_in_thread(ping),
+            "gupshup": lambda: asyncio.sleep(0)
+        },
+        interval_seconds=0.05,
+        timeout_seconds=0.02
+    )
+    await monitor.start()
+    try:
+        await asyncio.sleep(0.5)
+        results = monitor.get_results()
+        # Several probe rounds, but the hung call was never repeated
+        assert len(calls) == 1
+        assert results["supabase"]["state"] == "down"
+        assert results["gupshup"]["state"] == "up"
+        assert sum(thread.name.startswith("health-probe") for thread in threading.enumerate()) == 1
+
+        released.set()
+        await asyncio.sleep(0.3)
+        assert monitor.get_results()["supabase"]["state"] == "up"
+        assert len(calls) > 1
+    finally:
+        released.set()
+        await monitor.stop()
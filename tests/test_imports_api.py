@@ -0,0 +1,68 @@
+import os
+import pytest
+from fastapi.testclient import TestClient
+from app.config.settings import settings
+from app.main import app
+from app.services.container import get_lead_import_service
+from app.services.lead_import_service import LeadImportService
+
+LEADS = b'{"loan_type": "home loan"}\n'
+
+
+class NotStartingImportService(LeadImportService):
+    """Creates jobs but does not run them"""
+
+    def start(self, job) -> None:
+        self.started = job.job_id
+
+
+@pytest.fixture
+def import_service(tmp_path, monkeypatch):
+    monkeypatch.setattr(settings, "ADMIN_API_TOKEN", "secret")
+    service = NotStartingImportService(
+        get_database_service=lambda: None,
+        get_basic_application_service=lambda: None,
+        import_dir=str(tmp_path)
+    )
+    app.dependency_overrides[get_lead_import_service] = lambda: service
+    yield service
+    app.dependency_overrides.clear()
+
+
+def _upload(headers=None, content: bytes = LEADS):
+    return TestClient(app).post(
+        "/api/v1/lead/import",
+        files={"file": ("leads.ndjson", content)},
+        headers=headers or {}
+    )
+
+
+def test_import_endpoints_do_not_exist_without_token(import_service, monkeypatch):
+    monkeypatch.setattr(settings, "ADMIN_API_TOKEN", "")
+
+    assert _upload().status_code == 404
+    assert TestClient(app).get("/api/v1/lead/import/job1").status_code == 404
+    assert os.listdir(import_service.import_dir) == []
+
+
+def test_import_needs_the_admin_token(import_service):
+    assert _upload().status_code == 401
+    assert _upload({"X-Admin-Token": "wrong"}).status_code == 401
+    assert TestClient(app).post("/api/v1/lead/import/job1/resume").status_code == 401
+
+
+def test_import_accepts_file_with_token(import_service):
+    response = _upload({"X-Admin-Token": "secret"})
+
+    assert response.status_code == 202
+    assert import_service.started == response.json()["job_id"]
+
+
+def test_upload_larger_than_the_limit_is_rejected(import_service, monkeypatch):
+    monkeypatch.setattr(settings, "LEAD_IMPORT_MAX_UPLOAD_BYTES", 1024)
+
+    response = _upload({"X-Admin-Token": "secret"}, LEADS * 200)
+
+    assert response.status_code == 413
+    assert os.listdir(import_service.import_dir) == []
+    assert not hasattr(import_service, "started")
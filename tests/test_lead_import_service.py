@@ -0,0 +1,143 @@
+import asyncio
+import json
+import threading
+import pytest
+from app.services.lead_import_service import LeadImportService
+
+
+class FakeDatabaseService:
+    existing_pans = set()
+
+    def find_existing_leads(self, pan_numbers, mobile_numbers):
+        return self.existing_pans & set(pan_numbers), set()
+
+    def save_lead_data(self, lead_data, basic_api_response):
+        pass
+
+
+class BlockingBasicApplicationService:
+    """Creates leads once released, counting every call"""
+
+    def __init__(self):
+        self.release = threading.Event()
+        self.calls = 0
+        self._lock = threading.Lock()
+
+    def create_lead(self, api_data):
+        self.release.wait(5)
+        with self._lock:
+            self.calls += 1
+            return {"result": {"basicAppId": f"APP{self.calls}"}}
+
+
+def _write_leads(path, count):
+    with open(path, "w", encoding="utf-8") as leads:
+        for n in range(count):
+            leads.write(json.dumps({
+                "loan_type": "home loan",
+                "loan_amount": 2500000,
+                "loan_tenure": 240,
+                "pan_number": f"ABCDE{n:04d}F",
+                "first_name": "Asha",
+                "last_name": "Rao",
+                "mobile_number": f"98765{n:05d}",
+                "email": "asha@example.com",
+                "dob": "15/08/1990",
+                "pin_code": "560001"
+            }) + "\n")
+
+
+def _service(import_dir, basic_service, database_service=None) -> LeadImportService:
+    database_service = database_service or FakeDatabaseService()
+    return LeadImportService(
+        get_database_service=lambda: database_service,
+        get_basic_application_service=lambda: basic_service,
+        import_dir=str(import_dir),
+        batch_size=5
+    )
+
+
+@pytest.mark.asyncio
+async def test_job_runs_in_one_worker_only(tmp_path):
+    source_path = tmp_path / "leads.ndjson"
+    _write_leads(source_path, 10)
+    basic_service = BlockingBasicApplicationService()
+    # Two workers sharing the import directory
+    first = _service(tmp_path / "imports", basic_service)
+    second = _service(tmp_path / "imports", basic_service)
+
+    job = first.get_or_create_job(str(source_path), job_id="job1")
+    first.start(job)
+    await asyncio.sleep(0.1)
+
+    assert second.is_running("job1")
+    # A resume sent to the other worker leaves the job alone
+    resumed = await second.run(second.get_job("job1"))
+    assert resumed.status == "running"
+
+    basic_service.release.set()
+    while first.is_running("job1"):
+        await asyncio.sleep(0.01)
+
+    done = first.get_job("job1")
+    assert done.status == "completed"
+    assert done.created == basic_service.calls == 10
+    assert not second.is_running("job1")
+
+
+@pytest.mark.asyncio
+async def test_job_left_running_resumes_from_the_latest_checkpoint(tmp_path):
+    source_path = tmp_path / "leads.ndjson"
+    _write_leads(source_path, 10)
+    basic_service = BlockingBasicApplicationService()
+    basic_service.release.set()
+    first = _service(tmp_path / "imports", basic_service)
+    second = _service(tmp_path / "imports", basic_service)
+
+    stale = first.get_or_create_job(str(source_path), job_id="job1")
+    # A worker that crashed after its first batch: status "running", no lock held
+    progressed = first.get_job("job1")
+    progressed.status = "running"
+    progressed.rows_done = 5
+    progressed.created = 5
+    progressed.save()
+
+    job = await second.run(stale)
+
+    assert job.status == "completed"
+    assert job.created == 10
+    assert basic_service.calls == 5
+
+
+@pytest.mark.asyncio
+async def test_rows_sent_before_an_interruption_are_reconciled_not_sent_again(tmp_path):
+    source_path = tmp_path / "leads.ndjson"
+    _write_leads(source_path, 8)
+    blocked = BlockingBasicApplicationService()
+    service = _service(tmp_path / "imports", blocked)
+    job = service.get_or_create_job(str(source_path), job_id="job1")
+
+    task = asyncio.ensure_future(service.run(job))
+    # The first batch is checkpointed before any of its rows is sent
+    while not service.get_job("job1").sending:
+        await asyncio.sleep(0.01)
+    assert service.get_job("job1").sending == [1, 2, 3, 4, 5]
+    task.cancel()
+    await asyncio.gather(task, return_exceptions=True)
+    blocked.release.set()
+
+    # Row 1 reached the leads table before the interruption; rows 2-5 may only exist upstream
+    database_service = FakeDatabaseService()
+    database_service.existing_pans = {"ABCDE0000F"}
+    basic_service = BlockingBasicApplicationService()
+    basic_service.release.set()
+    resumed = await _service(tmp_path / "imports", basic_service, database_service).run(service.get_job("job1"))
+
+    assert resumed.status == "completed"
+    assert resumed.sending == []
+    # Only the 3 rows of the second batch are sent
+    assert basic_service.calls == 3
+    assert (resumed.created, resumed.failed, resumed.duplicates) == (4, 4, 0)
+    with open(resumed.errors_path, encoding="utf-8") as errors:
+        failed_rows = [json.loads(line)["row"] for line in errors]
+    assert failed_rows == [2, 3, 4, 5]
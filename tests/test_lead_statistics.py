@@ -0,0 +1,73 @@
+import asyncio
+import threading
+import time
+import httpx
+import pytest
+from app.main import app
+from app.services.container import get_database_service, get_shared_state
+from app.services.shared_state import LocalSharedState
+
+STATISTICS = {
+    "total_leads": 10,
+    "created_leads": 6,
+    "approved_leads": 3,
+    "rejected_leads": 1,
+    "leads_last_24h": 2,
+    "leads_last_7d": 5
+}
+
+
+class SlowStatisticsDatabaseService:
+    """Blocking statistics read, like the synchronous Supabase client"""
+
+    def __init__(self):
+        self.calls = 0
+        self.reading = False
+        self._lock = threading.Lock()
+
+    def get_lead_statistics(self):
+        with self._lock:
+            self.calls += 1
+        self.reading = True
+        time.sleep(0.3)
+        self.reading = False
+        return dict(STATISTICS)
+
+
+@pytest.fixture
+def database_service():
+    service = SlowStatisticsDatabaseService()
+    shared_state = LocalSharedState()
+    app.dependency_overrides[get_database_service] = lambda: service
+    app.dependency_overrides[get_shared_state] = lambda: shared_state
+    yield service
+    app.dependency_overrides.clear()
+
+
+@pytest.mark.asyncio
+async def test_concurrent_cache_misses_share_one_read_off_the_loop(database_service):
+    ticks_during_read = 0
+
+    async def tick():
+        nonlocal ticks_during_read
+        for _ in range(20):
+            await asyncio.sleep(0.01)
+            ticks_during_read += database_service.reading
+
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+        results = await asyncio.gather(
+            tick(),
+            *(client.get("/api/v1/leads/stats") for _ in range(10))
+        )
+
+        responses = results[1:]
+        assert all(response.status_code == 200 for response in responses)
+        assert all(response.json() == STATISTICS for response in responses)
+        assert database_service.calls == 1
+        # The event loop kept running while the read was in flight
+        assert ticks_during_read > 0
+
+        # Served from the cache
+        assert (await client.get("/api/v1/leads/stats")).status_code == 200
+        assert database_service.calls == 1
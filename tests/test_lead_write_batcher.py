@@ -0,0 +1,198 @@
+import asyncio
+from typing import Dict, List, Optional
+import pytest
+from fastapi import HTTPException
+from app.services.lead_write_batcher import LeadWriteBatcher
+
+
+class FakeLeadsTable:
+    """In-memory leads table; every insert_batch / insert_one call is one commit"""
+
+    def __init__(self, existing_ids=(), reject_batches: bool = False, lose_batch_responses: bool = False):
+        self.rows: Dict[str, Dict] = {}
+        self.commits = 0
+        self.batch_calls = 0
+        self.reject_batches = reject_batches
+        # Commit the batch, then fail as if the response was lost
+        self.lose_batch_responses = lose_batch_responses
+        self._next_id = 1
+        for application_id in existing_ids:
+            self._insert(application_id)
+
+    def insert_batch(self, rows: List[Dict]) -> List[Dict]:
+        """Multi-row insert skipping existing basic_application_ids (ON CONFLICT DO NOTHING)"""
+        self.batch_calls += 1
+        if self.reject_batches or any(row.get("invalid") for row in rows):
+            # PostgREST rejects the whole request when one row is invalid
+            raise HTTPException(status_code=500, detail="invalid input syntax")
+        self.commits += 1
+        inserted = [
+            self._insert(row["basic_application_id"])
+            for row in rows
+            if row["basic_application_id"] not in self.rows
+        ]
+        if self.lose_batch_responses:
+            raise TimeoutError("read timed out")
+        return inserted
+
+    def insert_one(self, row: Dict) -> Dict:
+        self.commits += 1
+        if row.get("invalid"):
+            raise Exception("invalid input syntax")
+        if row["basic_application_id"] in self.rows:
+            raise HTTPException(status_code=409, detail="already exists")
+        return self._insert(row["basic_application_id"])
+
+    def get_existing(self, application_id: str) -> Optional[Dict]:
+        return self.rows.get(application_id)
+
+    def _insert(self, application_id: str) -> Dict:
+        row = {"id": self._next_id, "basic_application_id": application_id}
+        self._next_id += 1
+        self.rows[application_id] = row
+        return row
+
+
+def _batcher(table: FakeLeadsTable, max_batch_size: int = 50, max_delay_ms: float = 5.0) -> LeadWriteBatcher:
+    return LeadWriteBatcher(
+        insert_batch=table.insert_batch,
+        insert_one=table.insert_one,
+        get_existing=table.get_existing,
+        max_batch_size=max_batch_size,
+        max_delay_ms=max_delay_ms
+    )
+
+
+async def _submit_all(batcher: LeadWriteBatcher, rows: List[Dict]) -> List:
+    return await asyncio.gather(*(batcher.submit(row) for row in rows), return_exceptions=True)
+
+
+@pytest.mark.asyncio
+async def test_flushes_when_batch_is_full():
+    table = FakeLeadsTable()
+    # A long delay: only the size limit can trigger these flushes
+    batcher = _batcher(table, max_batch_size=10, max_delay_ms=60000)
+
+    results = await _submit_all(batcher, [{"basic_application_id": f"APP{n}"} for n in range(30)])
+
+    assert all(isinstance(result, dict) for result in results)
+    metrics = batcher.get_metrics()
+    assert metrics["flushes_by_size"] == 3
+    assert metrics["flushes_by_timer"] == 0
+    assert table.batch_calls == 3
+
+
+@pytest.mark.asyncio
+async def test_flushes_partial_batch_after_delay():
+    table = FakeLeadsTable()
+    batcher = _batcher(table, max_batch_size=50, max_delay_ms=5)
+
+    results = await _submit_all(batcher, [{"basic_application_id": f"APP{n}"} for n in range(3)])
+
+    assert [result["basic_application_id"] for result in results] == ["APP0", "APP1", "APP2"]
+    metrics = batcher.get_metrics()
+    assert metrics["flushes_by_timer"] == 1
+    assert metrics["flushes_by_size"] == 0
+    assert metrics["max_batch_size_seen"] == 3
+
+
+@pytest.mark.asyncio
+async def test_each_caller_gets_its_own_row():
+    table = FakeLeadsTable()
+    batcher = _batcher(table, max_batch_size=20)
+
+    application_ids = [f"APP{n}" for n in range(20)]
+    results = await _submit_all(batcher, [{"basic_application_id": application_id} for application_id in application_ids])
+
+    assert [result["basic_application_id"] for result in results] == application_ids
+    assert [result["id"] for result in results] == [table.rows[application_id]["id"] for application_id in application_ids]
+    assert len({result["id"] for result in results}) == 20
+
+
+@pytest.mark.asyncio
+async def test_duplicates_are_409_for_the_duplicate_caller_only():
+    table = FakeLeadsTable(existing_ids=["EXISTING"])
+    batcher = _batcher(table, max_batch_size=4)
+
+    results = await _submit_all(batcher, [
+        {"basic_application_id": "NEW1"},
+        {"basic_application_id": "EXISTING"},
+        {"basic_application_id": "NEW2"},
+        # Same ID twice in one batch: the first one wins
+        {"basic_application_id": "NEW1"}
+    ])
+
+    assert results[0]["basic_application_id"] == "NEW1"
+    assert results[2]["basic_application_id"] == "NEW2"
+    for duplicate in (results[1], results[3]):
+        assert isinstance(duplicate, HTTPException)
+        assert duplicate.status_code == 409
+    assert "EXISTING" in results[1].detail
+    assert "NEW1" in results[3].detail
+    assert table.batch_calls == 1
+
+
+@pytest.mark.asyncio
+async def test_rejected_batch_falls_back_to_row_by_row():
+    table = FakeLeadsTable(existing_ids=["EXISTING"])
+    batcher = _batcher(table, max_batch_size=3)
+
+    results = await _submit_all(batcher, [
+        {"basic_application_id": "GOOD"},
+        {"basic_application_id": "BAD", "invalid": True},
+        {"basic_application_id": "EXISTING"}
+    ])
+
+    assert results[0]["basic_application_id"] == "GOOD"
+    assert isinstance(results[1], HTTPException) and results[1].status_code == 500
+    assert isinstance(results[2], HTTPException) and results[2].status_code == 409
+    assert batcher.get_metrics()["fallback_flushes"] == 1
+    assert "BAD" not in table.rows
+
+
+@pytest.mark.asyncio
+async def test_rows_of_a_committed_batch_with_a_lost_response_are_saved():
+    table = FakeLeadsTable(lose_batch_responses=True)
+    batcher = _batcher(table, max_batch_size=3)
+
+    results = await _submit_all(batcher, [{"basic_application_id": f"APP{n}"} for n in range(3)])
+
+    # The retry finds the rows the failed batch committed: they are ours, not duplicates
+    assert [result["basic_application_id"] for result in results] == ["APP0", "APP1", "APP2"]
+    assert [result["id"] for result in results] == [table.rows[f"APP{n}"]["id"] for n in range(3)]
+    metrics = batcher.get_metrics()
+    assert metrics["fallback_flushes"] == 1
+    assert metrics["rows_written"] == 3
+    assert metrics["rows_failed"] == 0
+
+
+@pytest.mark.asyncio
+async def test_batching_writes_more_rows_per_commit_than_single_inserts():
+    rows = [{"basic_application_id": f"APP{n}"} for n in range(200)]
+
+    # Unbatched path: one insert (and commit) per request
+    unbatched = FakeLeadsTable()
+    await asyncio.gather(*(asyncio.to_thread(unbatched.insert_one, row) for row in rows))
+
+    batched = FakeLeadsTable()
+    results = await _submit_all(_batcher(batched, max_batch_size=50), rows)
+
+    assert all(isinstance(result, dict) for result in results)
+    assert len(batched.rows) == len(unbatched.rows) == 200
+    unbatched_rows_per_commit = len(unbatched.rows) / unbatched.commits
+    batched_rows_per_commit = len(batched.rows) / batched.commits
+    assert unbatched_rows_per_commit == 1
+    assert batched_rows_per_commit >= 50 * unbatched_rows_per_commit
+
+
+@pytest.mark.asyncio
+async def test_close_flushes_pending_rows():
+    table = FakeLeadsTable()
+    batcher = _batcher(table, max_batch_size=50, max_delay_ms=60000)
+
+    pending = asyncio.ensure_future(batcher.submit({"basic_application_id": "APP1"}))
+    await asyncio.sleep(0)
+    await batcher.close()
+
+    assert (await pending)["basic_application_id"] == "APP1"
+    assert batcher.get_metrics()["flushes_on_close"] == 1
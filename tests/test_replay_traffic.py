@@ -0,0 +1,28 @@
+import importlib.util
+import os
+
+SCRIPT_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "scripts", "replay_traffic.py")
+spec = importlib.util.spec_from_file_location("replay_traffic", SCRIPT_PATH)
+replay_traffic = importlib.util.module_from_spec(spec)
+spec.loader.exec_module(replay_traffic)
+
+
+def test_import_job_requests_are_skipped():
+    for route, method in (
+        ("/api/v1/lead/import/{job_id}", "GET"),
+        ("/api/v1/lead/import/{job_id}/resume", "POST")
+    ):
+        request, reason = replay_traffic.build_request({"route": route, "method": method, "ts": 1.0})
+        assert request is None
+        assert reason == "import job is not replayed"
+
+
+def test_status_request_uses_stable_fake_identifiers():
+    record = {"route": "/api/v1/lead/status", "method": "POST", "ts": 1.0, "ids": {"mobile_number": "9f2c41d07a5be318"}}
+
+    first, _ = replay_traffic.build_request(record)
+    second, _ = replay_traffic.build_request(record)
+
+    assert first == second
+    assert first[1] == "/api/v1/lead/status"
+    assert len(first[2]["mobile_number"]) == 10
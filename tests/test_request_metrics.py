@@ -0,0 +1,37 @@
+import os
+import subprocess
+import sys
+from fastapi.testclient import TestClient
+from app.main import app
+from app.services.container import container
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def test_importing_the_app_does_not_open_the_shared_state(tmp_path):
+    path = tmp_path / "shared-state"
+    env = dict(os.environ, SHARED_STATE_BACKEND="mmap", SHARED_STATE_PATH=str(path))
+    output = subprocess.run(
+        [
+            sys.executable, "-c",
+            "import app.main; from app.services.container import container; "
+            "print(container._worker_metrics is None and container._shared_state is None)"
+        ],
+        cwd=REPO_ROOT,
+        env=env,
+        capture_output=True,
+        text=True,
+        check=True
+    ).stdout
+    assert output.strip().splitlines()[-1] == "True"
+    assert not path.exists()
+
+
+def test_requests_are_counted_by_route_template():
+    # Without the lifespan: counts stay in the worker, nothing is published
+    TestClient(app).get("/api/v1/health/live")
+    TestClient(app).get("/no-such-path")
+
+    counts = container.worker_metrics._requests
+    assert counts["GET /api/v1/health/live|200"] >= 1
+    assert counts["GET unmatched|404"] >= 1
@@ -0,0 +1,125 @@
+import asyncio
+import time
+import httpx
+import pytest
+from fastapi import FastAPI, HTTPException
+from fastapi.testclient import TestClient
+from app.config.settings import settings
+from app.main import app
+from app.middleware.profiler import ProfilerMiddleware
+from app.services.container import get_profiler
+from app.services.sampling_profiler import SamplingProfiler
+
+
+def _block_loop(seconds: float) -> None:
+    """Blocks the event loop like a synchronous call in an async handler"""
+    time.sleep(seconds)
+
+
+def _profiled_app(profiler: SamplingProfiler) -> FastAPI:
+    profiled = FastAPI()
+    profiled.add_middleware(ProfilerMiddleware, profiler=profiler)
+
+    @profiled.get("/busy")
+    async def busy_route_handler():
+        _block_loop(0.2)
+        return {}
+
+    @profiled.get("/other")
+    async def other_route_handler():
+        _block_loop(0.2)
+        return {}
+
+    return profiled
+
+
+@pytest.fixture
+def profiler(monkeypatch):
+    monkeypatch.setattr(settings, "ADMIN_API_TOKEN", "secret")
+    profiler = SamplingProfiler(max_seconds=0.2)
+    app.dependency_overrides[get_profiler] = lambda: profiler
+    yield profiler
+    app.dependency_overrides.clear()
+
+
+def test_profile_endpoint_does_not_exist_without_token(profiler, monkeypatch):
+    monkeypatch.setattr(settings, "ADMIN_API_TOKEN", "")
+
+    assert TestClient(app).post("/api/v1/admin/profile").status_code == 404
+
+
+def test_profile_endpoint_needs_the_admin_token(profiler):
+    client = TestClient(app)
+
+    assert client.post("/api/v1/admin/profile").status_code == 401
+    assert client.post("/api/v1/admin/profile", headers={"X-Admin-Token": "wrong"}).status_code == 401
+
+
+def test_profile_endpoint_caps_the_duration(profiler):
+    response = TestClient(app).post(
+        "/api/v1/admin/profile",
+        params={"seconds": 30, "format": "collapsed"},
+        headers={"X-Admin-Token": "secret"}
+    )
+
+    assert response.status_code == 200
+    assert response.json()["duration_seconds"] < 1
+    assert not profiler.active
+
+
+@pytest.mark.asyncio
+async def test_stop_ends_a_running_profile_early():
+    profiler = SamplingProfiler(max_seconds=30)
+    task = asyncio.create_task(profiler.profile(30, 5, output="collapsed"))
+    await asyncio.sleep(0.1)
+
+    assert profiler.active
+    with pytest.raises(HTTPException) as error:
+        await profiler.profile(1, 5)
+    assert error.value.status_code == 409
+
+    _block_loop(0.05)
+    profiler.stop()
+    result = await asyncio.wait_for(task, timeout=2)
+
+    assert result["duration_seconds"] < 2
+    assert result["samples"] > 0
+    assert not profiler.active
+    assert profiler._labels == {}
+
+
+@pytest.mark.asyncio
+async def test_route_filter_keeps_only_samples_for_those_routes():
+    profiler = SamplingProfiler(max_seconds=30)
+    transport = httpx.ASGITransport(app=_profiled_app(profiler))
+    task = asyncio.create_task(profiler.profile(30, 5, routes={"/busy"}, output="collapsed"))
+    await asyncio.sleep(0.05)
+
+    async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+        assert (await client.get("/other")).status_code == 200
+        assert (await client.get("/busy")).status_code == 200
+    profiler.stop()
+    result = await task
+
+    assert result["routes"] == ["/busy"]
+    assert "busy_route_handler" in result["profile"]
+    assert "other_route_handler" not in result["profile"]
+    assert {stall["route"] for stall in result["event_loop"]["stalls"]} == {"/busy"}
+
+
+@pytest.mark.asyncio
+async def test_blocked_loop_is_reported_as_a_stall():
+    profiler = SamplingProfiler(max_seconds=30, stall_threshold_ms=100)
+    task = asyncio.create_task(profiler.profile(30, 5))
+    await asyncio.sleep(0.05)
+
+    _block_loop(0.3)
+    await asyncio.sleep(0.05)
+    profiler.stop()
+    report = (await task)["event_loop"]
+
+    assert report["stall_count"] == 1
+    stall = report["stalls"][0]
+    assert stall["duration_ms"] >= 250
+    assert stall["location"].startswith("_block_loop (tests/test_sampling_profiler.py:")
+    assert report["slow_callbacks"][0]["location"] == stall["location"]
@@ -0,0 +1,116 @@
+import time
+import pytest
+from app.services.shared_state import MmapSharedState
+
+
+@pytest.fixture
+def path(tmp_path):
+    return str(tmp_path / "shared_state")
+
+
+def _occupied_slots(state: MmapSharedState) -> int:
+    return sum(1 for slot in range(state.slots) if state._slot_header(slot)[0] != state.EMPTY)
+
+
+@pytest.mark.asyncio
+async def test_get_set_delete_and_ttl(path):
+    state = MmapSharedState(path, slots=64, slot_bytes=512)
+
+    await state.set("lead:1", {"status": "Login"})
+    await state.set("lead:2", [1, 2], ttl_seconds=0.05)
+    assert await state.get("lead:1") == {"status": "Login"}
+    assert await state.get("lead:2") == [1, 2]
+    assert await state.items("lead:") == {"lead:1": {"status": "Login"}, "lead:2": [1, 2]}
+
+    time.sleep(0.1)
+    assert await state.get("lead:2") is None
+    await state.delete("lead:1")
+    assert await state.get("lead:1") is None
+    assert await state.items("lead:") == {}
+
+    # Too large for a slot: not cached
+    await state.set("lead:3", "x" * 1024)
+    assert await state.get("lead:3") is None
+    await state.close()
+
+
+@pytest.mark.asyncio
+async def test_incr_is_shared_by_instances_on_the_same_file(path):
+    first = MmapSharedState(path, slots=64, slot_bytes=512, reset=True)
+    # Attaches with the geometry stored in the file
+    second = MmapSharedState(path, slots=8, slot_bytes=256)
+
+    assert second.slots == 64
+    assert await first.incr("requests:1") == 1
+    assert await second.incr("requests:1", 5) == 6
+    assert await first.incr("requests:2") == 1
+    assert await second.counters("requests:") == {"requests:1": 6, "requests:2": 1}
+    await first.close()
+    await second.close()
+
+
+@pytest.mark.asyncio
+async def test_take_token_limits_and_refills(path):
+    state = MmapSharedState(path, slots=64, slot_bytes=512)
+
+    assert await state.take_token("rate:otp", rate_per_second=20, capacity=2)
+    assert await state.take_token("rate:otp", rate_per_second=20, capacity=2)
+    assert not await state.take_token("rate:otp", rate_per_second=20, capacity=2)
+
+    time.sleep(0.1)
+    assert await state.take_token("rate:otp", rate_per_second=20, capacity=2)
+    await state.close()
+
+
+@pytest.mark.asyncio
+async def test_full_table_drops_new_keys(path):
+    state = MmapSharedState(path, slots=4, slot_bytes=256)
+    for index in range(4):
+        await state.set(f"key:{index}", index)
+
+    await state.set("key:new", "dropped")
+
+    assert await state.get("key:new") is None
+    assert await state.incr("counter") == 0
+    # Fails open rather than rejecting traffic
+    assert await state.take_token("rate:otp", rate_per_second=1, capacity=1)
+    assert await state.items("key:") == {f"key:{index}": index for index in range(4)}
+    await state.close()
+
+
+@pytest.mark.asyncio
+async def test_expired_and_deleted_keys_do_not_accumulate(path):
+    state = MmapSharedState(path, slots=64, slot_bytes=256)
+    await state.set("live", "value")
+
+    # Per-worker keys of recycled workers: written once, then left to expire
+    for worker in range(200):
+        for index in range(4):
+            await state.set(f"worker:{worker}:{index}", index, ttl_seconds=0.001)
+        await state.set(f"deleted:{worker}", worker)
+        await state.delete(f"deleted:{worker}")
+        time.sleep(0.002)
+
+    assert _occupied_slots(state) < 32
+    assert await state.get("live") == "value"
+    await state.set("new", "stored")
+    assert await state.get("new") == "stored"
+    await state.close()
+
+
+@pytest.mark.asyncio
+async def test_rehash_keeps_live_keys_reachable(path):
+    state = MmapSharedState(path, slots=32, slot_bytes=256)
+    for index in range(8):
+        await state.set(f"live:{index}", index)
+    await state.incr("counter", 3)
+    for index in range(16):
+        await state.set(f"gone:{index}", index)
+        await state.delete(f"gone:{index}")
+
+    state._rehash(time.time())
+
+    assert _occupied_slots(state) == 9
+    assert await state.items("live:") == {f"live:{index}": index for index in range(8)}
+    assert await state.incr("counter") == 4
+    await state.close()
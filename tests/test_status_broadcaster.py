@@ -0,0 +1,146 @@
+import asyncio
+import threading
+import pytest
+from fastapi import HTTPException
+from app.services.status_broadcaster import InMemoryStatusBus, StatusBroadcaster
+
+
+class FakeDatabaseService:
+    def __init__(self):
+        self.lookups = 0
+
+    def get_lead_by_application_id(self, basic_application_id):
+        self.lookups += 1
+        return {"basic_application_id": basic_application_id, "mobile_number": "9876543210"}
+
+
+class FakeBasicApplicationService:
+    def __init__(self, status: str = "Login"):
+        self.status = status
+        self.calls = 0
+        self._lock = threading.Lock()
+
+    def get_activity(self, basic_application_id, mobile_number):
+        with self._lock:
+            self.calls += 1
+        return {"result": {"latestStatus": self.status}}
+
+
+class SlowStartBus(InMemoryStatusBus):
+    """Bus whose start yields to the event loop, like connecting to Redis"""
+
+    async def start(self, on_message) -> None:
+        await asyncio.sleep(0.01)
+        await super().start(on_message)
+
+
+def _broadcaster(bus=None, **kwargs):
+    database_service = FakeDatabaseService()
+    basic_service = FakeBasicApplicationService()
+    broadcaster = StatusBroadcaster(
+        get_database_service=lambda: database_service,
+        get_basic_application_service=lambda: basic_service,
+        bus=bus,
+        **kwargs
+    )
+    return broadcaster, database_service, basic_service
+
+
+async def _wait_for(condition, timeout: float = 2.0) -> None:
+    deadline = asyncio.get_running_loop().time() + timeout
+    while not condition():
+        assert asyncio.get_running_loop().time() < deadline, "condition not met in time"
+        await asyncio.sleep(0.005)
+
+
+@pytest.mark.asyncio
+async def test_one_poll_fans_out_to_every_subscriber():
+    broadcaster, _, basic_service = _broadcaster(poll_interval_seconds=60)
+    subscriptions = [await broadcaster.subscribe("APP1") for _ in range(3)]
+
+    messages = [await asyncio.wait_for(subscription.queue.get(), 2) for subscription in subscriptions]
+
+    assert [message["status"] for message in messages] == ["Login"] * 3
+    assert basic_service.calls == 1
+    metrics = broadcaster.get_metrics()
+    assert metrics["active_pollers"] == 1
+    assert metrics["messages_published"] == 1
+    assert metrics["messages_delivered"] == 3
+    await broadcaster.stop()
+
+
+@pytest.mark.asyncio
+async def test_status_changes_are_delivered_once():
+    broadcaster, _, basic_service = _broadcaster(poll_interval_seconds=0.02)
+    subscription = await broadcaster.subscribe("APP1")
+    assert (await asyncio.wait_for(subscription.queue.get(), 2))["status"] == "Login"
+
+    basic_service.status = "Sanctioned"
+    assert (await asyncio.wait_for(subscription.queue.get(), 2))["status"] == "Sanctioned"
+    await _wait_for(lambda: basic_service.calls >= 4)
+
+    # Unchanged statuses are not queued again
+    assert subscription.queue.empty()
+    await broadcaster.stop()
+
+
+@pytest.mark.asyncio
+async def test_last_unsubscribe_stops_the_poller():
+    broadcaster, _, _ = _broadcaster(poll_interval_seconds=60)
+    first = await broadcaster.subscribe("APP1")
+    second = await broadcaster.subscribe("APP1")
+    await asyncio.wait_for(first.queue.get(), 2)
+    poller = broadcaster._pollers["APP1"]
+
+    await broadcaster.unsubscribe(first)
+    assert broadcaster.get_metrics()["active_pollers"] == 1
+
+    await broadcaster.unsubscribe(second)
+    await asyncio.gather(poller, return_exceptions=True)
+    metrics = broadcaster.get_metrics()
+    assert metrics["active_pollers"] == 0
+    assert metrics["active_connections"] == 0
+    assert await broadcaster.bus.get_last("APP1") is None
+    await broadcaster.stop()
+
+
+@pytest.mark.asyncio
+async def test_resubscribe_while_the_poller_stops_keeps_the_application_state():
+    broadcaster, database_service, basic_service = _broadcaster(poll_interval_seconds=60)
+    subscription = await broadcaster.subscribe("APP1")
+    await asyncio.wait_for(subscription.queue.get(), 2)
+
+    # The old poller is cancelled but has not run its cleanup yet
+    await broadcaster.unsubscribe(subscription)
+    resubscription = await broadcaster.subscribe("APP1")
+
+    # The last status is known, so it is queued right away
+    assert resubscription.queue.get_nowait()["status"] == "Login"
+    await _wait_for(lambda: basic_service.calls == 2)
+    await asyncio.sleep(0.01)
+
+    assert await broadcaster.bus.get_last("APP1") is not None
+    # The old poller neither dropped the cached mobile number nor the last status
+    assert database_service.lookups == 1
+    assert broadcaster.get_metrics()["messages_published"] == 1
+    assert resubscription.queue.empty()
+    await broadcaster.stop()
+
+
+@pytest.mark.asyncio
+async def test_concurrent_subscribes_respect_the_connection_cap():
+    broadcaster, _, _ = _broadcaster(bus=SlowStartBus(), max_connections=2, poll_interval_seconds=60)
+
+    results = await asyncio.gather(
+        *(broadcaster.subscribe(f"APP{n}") for n in range(5)),
+        return_exceptions=True
+    )
+
+    rejected = [result for result in results if isinstance(result, HTTPException)]
+    assert len(rejected) == 3
+    assert all(result.status_code == 503 for result in rejected)
+    metrics = broadcaster.get_metrics()
+    assert metrics["active_connections"] == 2
+    assert metrics["peak_connections"] == 2
+    assert metrics["connections_rejected"] == 3
+    await broadcaster.stop()
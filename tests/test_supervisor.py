@@ -0,0 +1,30 @@
+import os
+import pytest
+from app import supervisor
+
+
+@pytest.mark.parametrize("cpu_max, expected", [
+    ("max 100000\n", None),
+    ("200000 100000\n", 2),
+    ("150000 100000\n", 2),
+    ("50000 100000\n", 1)
+])
+def test_cgroup_cpu_limit(tmp_path, cpu_max, expected):
+    path = tmp_path / "cpu.max"
+    path.write_text(cpu_max)
+    assert supervisor.cgroup_cpu_limit(str(path)) == expected
+
+
+def test_cgroup_cpu_limit_without_cgroup_file(tmp_path):
+    assert supervisor.cgroup_cpu_limit(str(tmp_path / "missing")) is None
+
+
+@pytest.mark.skipif(not hasattr(os, "sched_getaffinity"), reason="needs sched_getaffinity")
+def test_auto_workers_respect_the_cpu_quota(monkeypatch):
+    monkeypatch.setattr(os, "sched_getaffinity", lambda pid: set(range(16)))
+    monkeypatch.setattr(supervisor, "cgroup_cpu_limit", lambda: 2)
+    assert supervisor.resolve_worker_count("auto") == 2
+
+    monkeypatch.setattr(supervisor, "cgroup_cpu_limit", lambda: None)
+    assert supervisor.resolve_worker_count("auto") == 16
+    assert supervisor.resolve_worker_count("3") == 3
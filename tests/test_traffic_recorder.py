@@ -0,0 +1,17 @@
+import pytest
+from app.middleware.traffic_recorder import TrafficRecorder
+
+
+def test_recorder_needs_a_salt(tmp_path):
+    with pytest.raises(ValueError):
+        TrafficRecorder(path=str(tmp_path / "traffic.ndjson"), salt="")
+
+
+def test_hashes_match_across_recorders_with_the_same_salt(tmp_path):
+    # Each worker builds its own recorder
+    first = TrafficRecorder(path=str(tmp_path / "a.ndjson"), salt="shared")
+    second = TrafficRecorder(path=str(tmp_path / "b.ndjson"), salt="shared")
+    other = TrafficRecorder(path=str(tmp_path / "c.ndjson"), salt="other")
+
+    assert first.hash_identifier("9876543210") == second.hash_identifier("9876543210")
+    assert first.hash_identifier("9876543210") != other.hash_identifier("9876543210")
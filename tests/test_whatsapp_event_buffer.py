@@ -0,0 +1,83 @@
+import os
+import pytest
+from app.services.whatsapp_event_buffer import WhatsAppEventBuffer
+
+
+class FlakyStore:
+    """upsert_events that fails a given number of times, then stores the rows"""
+
+    def __init__(self, failures: int = 0):
+        self.failures = failures
+        self.calls = 0
+        self.rows = {}
+
+    def upsert(self, rows):
+        self.calls += 1
+        if self.calls <= self.failures:
+            raise ConnectionError("database unavailable")
+        for row in rows:
+            self.rows[row["message_id"]] = row
+        return len(rows)
+
+
+def _buffer(store: FlakyStore, spill_dir) -> WhatsAppEventBuffer:
+    return WhatsAppEventBuffer(
+        upsert_events=store.upsert,
+        flush_interval_ms=60000,
+        spill_dir=str(spill_dir),
+        close_retries=2,
+        close_retry_delay_seconds=0.01
+    )
+
+
+@pytest.mark.asyncio
+async def test_events_merge_per_message():
+    store = FlakyStore()
+    buffer = _buffer(store, "unused")
+
+    buffer.add({"message_id": "m1", "status": "sent", "sent_at": "t1"})
+    buffer.add({"message_id": "m1", "status": "read", "read_at": "t3"})
+    buffer.add({"message_id": "m1", "status": "delivered", "delivered_at": "t2"})
+    await buffer.close()
+
+    assert store.calls == 1
+    assert store.rows["m1"]["status"] == "read"
+    assert (store.rows["m1"]["sent_at"], store.rows["m1"]["delivered_at"]) == ("t1", "t2")
+
+
+@pytest.mark.asyncio
+async def test_close_retries_a_failed_final_flush(tmp_path):
+    store = FlakyStore(failures=2)
+    buffer = _buffer(store, tmp_path)
+
+    buffer.add({"message_id": "m1", "status": "delivered"})
+    await buffer.close()
+
+    assert store.calls == 3
+    assert "m1" in store.rows
+    assert os.listdir(tmp_path) == []
+
+
+@pytest.mark.asyncio
+async def test_unsaved_events_are_spilled_and_restored_on_start(tmp_path):
+    store = FlakyStore(failures=100)
+    buffer = _buffer(store, tmp_path)
+
+    buffer.add({"message_id": "m1", "status": "delivered"})
+    buffer.add({"message_id": "m2", "status": "read"})
+    await buffer.close()
+
+    assert store.calls == 3
+    assert len(os.listdir(tmp_path)) == 1
+    assert buffer.get_metrics()["events_spilled"] == 2
+
+    # The next worker re-queues them
+    store.failures = 0
+    restarted = _buffer(store, tmp_path)
+    restarted.restore_spilled()
+    await restarted.close()
+
+    assert set(store.rows) == {"m1", "m2"}
+    assert store.rows["m2"]["status"] == "read"
+    assert restarted.get_metrics()["events_restored"] == 2
+    assert os.listdir(tmp_path) == []
@@ -0,0 +1,53 @@
+import pytest
+from fastapi.testclient import TestClient
+from app.config.settings import settings
+from app.main import app
+from app.services.container import get_whatsapp_event_buffer
+
+CALLBACK = {
+    "type": "message-event",
+    "payload": {"gsId": "gs-1", "type": "delivered", "destination": "919876543210"}
+}
+
+
+class FakeEventBuffer:
+    def __init__(self):
+        self.events = []
+
+    def add(self, event):
+        self.events.append(event)
+
+
+@pytest.fixture
+def buffer():
+    event_buffer = FakeEventBuffer()
+    app.dependency_overrides[get_whatsapp_event_buffer] = lambda: event_buffer
+    yield event_buffer
+    app.dependency_overrides.clear()
+
+
+def test_webhook_does_not_exist_without_token(buffer, monkeypatch):
+    monkeypatch.setattr(settings, "GUPSHUP_WEBHOOK_TOKEN", "")
+
+    response = TestClient(app).post("/api/v1/whatsapp/webhook", json=CALLBACK)
+
+    assert response.status_code == 404
+    assert buffer.events == []
+
+
+def test_webhook_rejects_wrong_token(buffer, monkeypatch):
+    monkeypatch.setattr(settings, "GUPSHUP_WEBHOOK_TOKEN", "secret")
+
+    response = TestClient(app).post("/api/v1/whatsapp/webhook?token=wrong", json=CALLBACK)
+
+    assert response.status_code == 401
+    assert buffer.events == []
+
+
+def test_webhook_accepts_configured_token(buffer, monkeypatch):
+    monkeypatch.setattr(settings, "GUPSHUP_WEBHOOK_TOKEN", "secret")
+
+    response = TestClient(app).post("/api/v1/whatsapp/webhook?token=secret", json=CALLBACK)
+
+    assert response.status_code == 200
+    assert response.json()["events"] == len(buffer.events) == 1